@@ -0,0 +1,100 @@
+"""
+Helpers shared by the benchmark scripts.
+
+The scripts are run from the repository root as modules, e.g.
+``python -m benchmarks.read_path``, and print their results as JSON.
+"""
+import json
+import os
+import statistics
+import time
+from contextlib import contextmanager
+
+
+def setup_django(settings_module="mfas.settings"):
+    """
+    Configure Django for a standalone script.
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    import django
+
+    django.setup()
+
+
+@contextmanager
+def test_database(verbosity=0, name=None):
+    """
+    Create a throwaway test database (in memory for SQLite, unless ``name`` gives it a file),
+    migrate it, and drop it afterwards.
+    """
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    if name is not None:
+        connection.settings_dict["TEST"]["NAME"] = name
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=verbosity, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        teardown_test_environment()
+
+
+def percentile(samples, pct):
+    """
+    Return the pct-th percentile of the samples (nearest-rank).
+    """
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(samples):
+    """
+    Summarize timings in seconds as milliseconds.
+    """
+    return {
+        "runs": len(samples),
+        "min_ms": round(min(samples) * 1000, 3),
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+    }
+
+
+def load_summary(latencies, elapsed):
+    """
+    Summarize the latencies in seconds of requests completed in ``elapsed`` seconds.
+    """
+    return {
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def time_calls(fn, repeat, warmup=1):
+    """
+    Call fn ``warmup`` times untimed, then ``repeat`` times, returning each duration in seconds.
+    """
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def emit(results, output=None):
+    """
+    Print the results as JSON, and write them to ``output`` when given.
+    """
+    text = json.dumps(results, indent=2, sort_keys=True)
+    print(text)
+    if output:
+        with open(output, "w") as handle:
+            handle.write(text + "\n")
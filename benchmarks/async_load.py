@@ -0,0 +1,131 @@
+"""
+Load test of the sync (WSGI-style) views against their native async (ASGI) variants.
+
+The sync views are driven the way a threaded WSGI worker serves them: one request per
+thread, ``--concurrency`` threads. The async views are driven the way an ASGI worker
+serves them: ``--concurrency`` requests in flight on one event loop. Both run in-process
+against the same seeded test database and report throughput and latency percentiles.
+
+    python -m benchmarks.async_load --requests 500 --concurrency 1 16 64
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks._common import emit, load_summary, setup_django, test_database
+
+ENDPOINTS = {
+    "mutual-funds": (
+        "/api/mf/mutual-funds/?page_size=100", "/api/mf/mutual-funds/async/?page_size=100",
+    ),
+    "investments": ("/api/ums/investments/", "/api/ums/investments/async/"),
+    "report": ("/api/ums/report/", "/api/ums/report/async/"),
+    "report-aggregated": (
+        "/api/ums/report/?aggregate=true", "/api/ums/report/async/?aggregate=true",
+    ),
+}
+
+
+def seed(investments):
+    from mutualfunds.models import MutualFunds
+    from ums.models import Holding, User, UserInvestment
+
+    funds = MutualFunds.objects.bulk_create(
+        MutualFunds(
+            name=f"Scheme {i}", fund_type=("EQUITY", "DEBT", "HYBRID")[i % 3], nav=10 + i % 90
+        )
+        for i in range(500)
+    )
+    user = User(username="bench")
+    user.set_password("bench-password")
+    user.save()
+    UserInvestment.objects.bulk_create(
+        (
+            UserInvestment(user=user, mutual_fund=funds[i % len(funds)], units=1)
+            for i in range(investments)
+        ),
+        batch_size=2000,
+    )
+    Holding.objects.bulk_create(
+        Holding(user=user, mutual_fund=fund, units=investments // len(funds))
+        for fund in funds[:investments]
+    )
+    return user
+
+
+def run_sync(url, headers, requests, concurrency):
+    from django.db import connection
+    from django.test import Client
+
+    def call(_):
+        client = Client()
+        started = time.perf_counter()
+        response = client.get(
+            url, **{f"HTTP_{name.upper()}": value for name, value in headers.items()}
+        )
+        assert response.status_code == 200, response.content
+        latency = time.perf_counter() - started
+        connection.close()
+        return latency
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(call, range(requests)))
+    return load_summary(latencies, time.perf_counter() - started)
+
+
+async def run_async(url, headers, requests, concurrency):
+    from django.test import AsyncClient
+
+    client = AsyncClient()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call():
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get(url, headers=headers)
+            assert response.status_code == 200, response.content
+            return time.perf_counter() - started
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(call() for _ in range(requests)))
+    return load_summary(latencies, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--requests", type=int, default=500, help="Requests per endpoint, mode and concurrency."
+    )
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument(
+        "--investments", type=int, default=2000, help="Investments seeded for the user."
+    )
+    parser.add_argument("--output", help="Also write the JSON results to this file.")
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    with test_database():
+        user = seed(args.investments)
+        headers = {"Authorization": f"Bearer {AccessToken.for_user(user)}"}
+
+        results = {"requests": args.requests, "endpoints": {}}
+        for name, (sync_url, async_url) in ENDPOINTS.items():
+            results["endpoints"][name] = {
+                str(concurrency): {
+                    "wsgi": run_sync(sync_url, headers, args.requests, concurrency),
+                    "asgi": asyncio.run(run_async(async_url, headers, args.requests, concurrency)),
+                }
+                for concurrency in args.concurrency
+            }
+
+    emit(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Read/write contention benchmark of the SQLite database profile.
+
+Runs reader and writer threads against a file database for a fixed time, once with
+Django's stock SQLite setup (rollback journal, deferred transactions, a new connection per
+request) and once with the tuned profile from settings (WAL, synchronous=NORMAL, mmap,
+busy_timeout, immediate transactions and persistent connections). Readers fetch a page of
+the fund catalogue and a user's holdings; writers record an investment and its holding in
+one transaction, like the investment endpoint does.
+
+    python -m benchmarks.db_contention --readers 8 --writers 2 --seconds 10
+"""
+import argparse
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from benchmarks._common import emit, percentile, setup_django
+
+STOCK_OPTIONS = {"init_command": "PRAGMA journal_mode=DELETE;"}
+
+
+def configure(path, options, conn_max_age):
+    """
+    Point the default database at a fresh file with the given options.
+    """
+    from django.db import connections
+
+    connections.close_all()
+    settings_dict = connections.settings["default"]
+    settings_dict.update(NAME=str(path), OPTIONS=dict(options), CONN_MAX_AGE=conn_max_age)
+
+
+def seed():
+    from django.core.management import call_command
+
+    from mutualfunds.models import MutualFunds
+    from ums.models import User
+
+    call_command("migrate", verbosity=0)
+    funds = MutualFunds.objects.bulk_create(
+        MutualFunds(
+            name=f"Scheme {i}", fund_type=("EQUITY", "DEBT", "HYBRID")[i % 3], nav=10 + i % 90
+        )
+        for i in range(500)
+    )
+    user = User(username="bench")
+    user.set_password("bench-password")
+    user.save()
+    return user, funds
+
+
+def read(user, funds):
+    from mutualfunds.models import MutualFunds
+    from ums.models import Holding
+
+    list(MutualFunds.objects.order_by("id").values("id", "name", "nav", "fund_type")[:100])
+    list(Holding.objects.filter(user=user).values("mutual_fund", "units"))
+
+
+def write(user, funds, i):
+    from django.db import transaction
+
+    from ums.models import Holding, UserInvestment
+
+    fund = funds[i % len(funds)]
+    with transaction.atomic():
+        UserInvestment.objects.create(user=user, mutual_fund=fund, units=1)
+        Holding.objects.increment(user, fund, 1)
+
+
+def worker(operation, stop, latencies, errors):
+    from django.db import close_old_connections, connection
+
+    i = 0
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            operation(i)
+        except Exception as exc:
+            errors.append(type(exc).__name__ + ": " + str(exc))
+        else:
+            latencies.append(time.perf_counter() - started)
+        # The end of a request: closes the connection unless CONN_MAX_AGE keeps it.
+        close_old_connections()
+        i += 1
+    connection.close()
+
+
+def summarize_op(latencies, errors, seconds):
+    return {
+        "ops": len(latencies),
+        "ops_per_sec": round(len(latencies) / seconds, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3) if latencies else None,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+    }
+
+
+def run_profile(path, options, conn_max_age, readers, writers, seconds):
+    configure(path, options, conn_max_age)
+    user, funds = seed()
+
+    stop = threading.Event()
+    reads, read_errors, writes, write_errors = [], [], [], []
+    reader = (lambda i: read(user, funds), stop, reads, read_errors)
+    writer = (lambda i: write(user, funds, i), stop, writes, write_errors)
+    threads = [
+        threading.Thread(target=worker, args=reader) for _ in range(readers)
+    ] + [
+        threading.Thread(target=worker, args=writer) for _ in range(writers)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    from django.db import connections
+
+    connections.close_all()
+    return {
+        "reads": summarize_op(reads, read_errors, seconds),
+        "writes": summarize_op(writes, write_errors, seconds),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--readers", type=int, default=8, help="Reader threads.")
+    parser.add_argument("--writers", type=int, default=2, help="Writer threads.")
+    parser.add_argument("--seconds", type=float, default=10, help="Duration of each profile's run.")
+    parser.add_argument(
+        "--directory",
+        help="Where to create the database files (a temporary directory by default); put them "
+        "on the disk the deployment uses, since fsync cost drives the difference.",
+    )
+    parser.add_argument("--output", help="Also write the JSON results to this file.")
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+
+    if settings.DB_PROFILE != "sqlite":
+        parser.error(
+            "the contention benchmark compares SQLite setups; run it with MFAS_DB_PROFILE=sqlite"
+        )
+    # configure() edits the settings dict in place, so take the tuned values first.
+    tuned_options = dict(settings.DATABASES["default"]["OPTIONS"])
+    tuned_conn_max_age = settings.DATABASES["default"]["CONN_MAX_AGE"]
+
+    results = {"readers": args.readers, "writers": args.writers, "seconds": args.seconds}
+    with tempfile.TemporaryDirectory(dir=args.directory) as directory:
+        results["stock"] = run_profile(
+            Path(directory) / "stock.sqlite3", STOCK_OPTIONS, 0,
+            args.readers, args.writers, args.seconds
+        )
+        results["tuned"] = run_profile(
+            Path(directory) / "tuned.sqlite3", tuned_options, tuned_conn_max_age,
+            args.readers, args.writers, args.seconds
+        )
+
+    emit(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark of the fund name search (mutualfunds.search) over a large catalogue.
+
+Seeds ``--funds`` funds with the seed_data command, then times search_funds() for queries
+of each kind: a short and a longer prefix, a prefix that every fund matches, several
+words, words misspelled, and no match. For comparison it also times the unindexed
+alternative, a case-insensitive LIKE of every word.
+
+    python -m benchmarks.fund_search --funds 50000
+"""
+import argparse
+import io
+
+from benchmarks._common import emit, setup_django, summarize, test_database, time_calls
+
+QUERIES = {
+    "short_prefix": "bl",
+    "prefix": "bluech",
+    "common_prefix": "fund",
+    "words": "aurora flexi 12",
+    "typo": "bluchip",
+    "typo_and_words": "evergren liquid",
+    "no_match": "zzzz",
+}
+
+
+def naive_search(query, limit):
+    from mutualfunds.models import MutualFunds
+    from mutualfunds.search import query_words
+
+    queryset = MutualFunds.objects.all()
+    for word in query_words(query):
+        queryset = queryset.filter(name__icontains=word)
+    return list(queryset.values("id", "name", "nav", "fund_type")[:limit])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--funds", type=int, default=50000, help="Funds seeded.")
+    parser.add_argument("--limit", type=int, default=10, help="Funds returned per search.")
+    parser.add_argument("--repeat", type=int, default=50, help="Timed runs per query.")
+    parser.add_argument("--output", help="Also write the JSON results to this file.")
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.management import call_command
+
+    from mutualfunds.search import search_funds
+
+    with test_database():
+        call_command("seed_data", funds=args.funds, users=0, investments=0, stdout=io.StringIO())
+        results = {
+            "funds": args.funds,
+            "limit": args.limit,
+            "search": {
+                kind: {
+                    "query": query,
+                    "results": len(search_funds(query, args.limit)),
+                    **summarize(time_calls(lambda: search_funds(query, args.limit), args.repeat)),
+                }
+                for kind, query in QUERIES.items()
+            },
+            "naive": {
+                kind: summarize(time_calls(
+                    lambda: naive_search(query, args.limit), max(1, args.repeat // 10)
+                ))
+                for kind, query in QUERIES.items()
+            },
+        }
+
+    emit(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
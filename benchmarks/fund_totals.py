@@ -0,0 +1,99 @@
+"""
+Benchmark of the funds' stored totals (ums.fund_totals) against aggregating the holdings.
+
+Seeds a catalogue and investments with the seed_data command, then times:
+
+- the top ``--limit`` funds by AUM read from the stored totals, as the top funds endpoint
+  does, and computed from the holdings with a GROUP BY over the whole table;
+- one fund's totals read from the fund, and aggregated from its holdings;
+- recording a buy, which now also updates its fund's totals;
+- a full reconcile_fund_totals.
+
+    python -m benchmarks.fund_totals --funds 5000 --users 10000 --investments 1000000
+"""
+import argparse
+import io
+
+from benchmarks._common import emit, setup_django, summarize, test_database, time_calls
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--funds", type=int, default=5000, help="Funds seeded.")
+    parser.add_argument("--users", type=int, default=10000, help="Users seeded.")
+    parser.add_argument("--investments", type=int, default=1000000, help="Investments seeded.")
+    parser.add_argument("--limit", type=int, default=10, help="Funds in the top funds list.")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per measurement.")
+    parser.add_argument("--output", help="Also write the JSON results to this file.")
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.management import call_command
+    from django.db.models import Count, F, Q, Sum
+    from django.utils import timezone
+
+    from mutualfunds.api.v1.views import MutualFundsTopApiView
+    from ums.enums import TransactionType
+    from ums.fund_totals import reconcile_fund_totals
+    from ums.ledger import CLOSED_UNITS
+    from ums.models import Holding, LedgerEntry, User
+
+    with test_database():
+        call_command(
+            "seed_data", funds=args.funds, users=args.users, investments=args.investments,
+            nav_days=0, stdout=io.StringIO(),
+        )
+        fund = Holding.objects.values_list("mutual_fund", flat=True).first()
+        user = User.objects.order_by("pk").first()
+
+        def stored_top():
+            return list(MutualFundsTopApiView().get_queryset().values("id", "aum")[:args.limit])
+
+        def aggregated_top():
+            return list(
+                Holding.objects.values("mutual_fund")
+                .annotate(aum=Sum(F("units") * F("mutual_fund__nav")))
+                .order_by("-aum", "mutual_fund")[:args.limit]
+            )
+
+        def stored_fund():
+            return MutualFundsTopApiView().get_queryset().values(
+                "total_units", "investor_count", "aum"
+            ).get(pk=fund)
+
+        def aggregated_fund():
+            return Holding.objects.filter(mutual_fund=fund).aggregate(
+                total_units=Sum("units"),
+                investor_count=Count("pk", filter=Q(units__gt=CLOSED_UNITS)),
+            )
+
+        def buy():
+            LedgerEntry.objects.record([LedgerEntry(
+                user=user, mutual_fund_id=fund, transaction_type=TransactionType.BUY,
+                trade_date=timezone.localdate(), units=1, nav=10,
+            )])
+
+        results = {
+            "funds": args.funds,
+            "investments": args.investments,
+            "holdings": Holding.objects.count(),
+            "limit": args.limit,
+            "top_funds": {
+                "stored": summarize(time_calls(stored_top, args.repeat)),
+                "aggregated": summarize(time_calls(aggregated_top, max(1, args.repeat // 5))),
+            },
+            "one_fund": {
+                "stored": summarize(time_calls(stored_fund, args.repeat)),
+                "aggregated": summarize(time_calls(aggregated_fund, args.repeat)),
+            },
+            "record_buy": summarize(time_calls(buy, args.repeat)),
+            "reconcile": summarize(time_calls(reconcile_fund_totals, max(1, args.repeat // 5))),
+        }
+
+    emit(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
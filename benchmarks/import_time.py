@@ -0,0 +1,145 @@
+"""
+Benchmark of a worker's cold start: the time a fresh process takes to import the WSGI
+application and serve its first request, for each settings module in ``--settings``.
+
+Every run starts a new interpreter with ``-X importtime`` that imports ``mfas.wsgi`` and
+sends ``--path`` straight to the WSGI application; the default, an unauthenticated
+request of the investments endpoint, goes through the URLconf, the middleware and DRF
+without touching the database. The runs report:
+
+- the time to import the application;
+- the time of the first request, which loads the URLconf and the views;
+- their sum, the time to first request;
+- the wall time of the whole process.
+
+From the ``-X importtime`` output they report the modules imported and the ``--top``
+packages that took longest to import. The timings include ``-X importtime``'s own
+overhead, the same for every settings module.
+
+    python -m benchmarks.import_time --runs 10
+    python -m benchmarks.import_time --settings mfas.settings_lean --path /api/mf/mutual-funds/
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from benchmarks._common import emit, summarize
+
+ROOT = Path(__file__).resolve().parent.parent
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+\d+ \|\s*(\S+)")
+
+# Run in each fresh interpreter: argv[1] is the path to request.
+CHILD = """
+import io, json, sys, time
+started = time.perf_counter()
+from mfas.wsgi import application
+imported = time.perf_counter()
+statuses = []
+path, _, query = sys.argv[1].partition("?")
+environ = {
+    "REQUEST_METHOD": "GET", "PATH_INFO": path, "QUERY_STRING": query,
+    "SERVER_NAME": "localhost", "SERVER_PORT": "80", "SERVER_PROTOCOL": "HTTP/1.1",
+    "wsgi.input": io.BytesIO(), "wsgi.url_scheme": "http",
+}
+b"".join(application(environ, lambda status, headers, exc_info=None: statuses.append(status)))
+print(json.dumps({
+    "import_seconds": imported - started,
+    "first_request_seconds": time.perf_counter() - imported,
+    "status": statuses[0],
+}))
+"""
+
+
+def cold_start(settings_module, path):
+    """
+    Start a worker process, returning its timings and the self time in microseconds of every
+    module it imported.
+    """
+    environment = {**os.environ, "DJANGO_SETTINGS_MODULE": settings_module}
+    started = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD, path],
+        cwd=ROOT, env=environment, capture_output=True, text=True, check=True,
+    )
+    elapsed = time.perf_counter() - started
+    imports = {}
+    for line in process.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            imports[match.group(2)] = int(match.group(1))
+    return {**json.loads(process.stdout.splitlines()[-1]), "process_seconds": elapsed}, imports
+
+
+def summarize_runs(runs, top):
+    """
+    Summarize the (timings, imports) of the cold starts of one settings module.
+    """
+    timings = [timing for timing, _ in runs]
+    packages = defaultdict(list)
+    for _, imports in runs:
+        per_package = defaultdict(int)
+        for module, microseconds in imports.items():
+            per_package[module.partition(".")[0]] += microseconds
+        for package, microseconds in per_package.items():
+            packages[package].append(microseconds)
+
+    heaviest = sorted(
+        packages.items(), key=lambda item: statistics.median(item[1]), reverse=True
+    )[:top]
+    return {
+        "status": sorted({timing["status"] for timing in timings}),
+        "import": summarize([timing["import_seconds"] for timing in timings]),
+        "first_request": summarize([timing["first_request_seconds"] for timing in timings]),
+        "time_to_first_request": summarize(
+            [timing["import_seconds"] + timing["first_request_seconds"] for timing in timings]
+        ),
+        "process": summarize([timing["process_seconds"] for timing in timings]),
+        "modules_imported": statistics.median(len(imports) for _, imports in runs),
+        "slowest_packages_ms": {
+            package: round(statistics.median(samples) / 1000, 3) for package, samples in heaviest
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--settings", nargs="+", default=["mfas.settings", "mfas.settings_lean"],
+                        help="Settings modules to start workers with.")
+    parser.add_argument(
+        "--path", default="/api/ums/investments/", help="Path of the first request."
+    )
+    parser.add_argument(
+        "--runs", type=int, default=5, help="Worker processes started per settings module."
+    )
+    parser.add_argument("--top", type=int, default=15, help="Slowest packages to import to report.")
+    parser.add_argument("--output", help="Also write the JSON results to this file.")
+    args = parser.parse_args()
+
+    # The settings modules take turns, so drift in the machine's load hits them alike.
+    runs = defaultdict(list)
+    for _ in range(args.runs):
+        for settings_module in args.settings:
+            runs[settings_module].append(cold_start(settings_module, args.path))
+
+    results = {
+        "path": args.path,
+        "runs": args.runs,
+        "settings": {
+            settings_module: summarize_runs(runs[settings_module], args.top)
+            for settings_module in args.settings
+        },
+    }
+    emit(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""
+Load test of every API endpoint against a large seeded dataset.
+
+Seeds ``--funds`` funds with ``--nav-days`` of NAV history, ``--users`` users and
+``--investments`` investments into a throwaway test database with the seed_data command, then
+drives each endpoint with ``--requests`` requests at each ``--concurrency``, in-process through
+the Django test client, one thread per request in flight like a threaded WSGI worker. The
+authenticated requests are spread over the first ``--active-users`` users.
+
+With ``--base-url`` it drives a running server over HTTP instead, logged in as
+``--username``, against whatever that server's database holds. Queries per request are
+only counted in-process.
+
+Every endpoint reports latency percentiles, throughput, errors (responses with another
+status than expected) and mean queries per request, as JSON to diff between releases.
+
+    python -m benchmarks.load_test --funds 50000 --users 100000 --investments 10000000 --workers 8
+    python -m benchmarks.load_test --base-url http://127.0.0.1:8000 --username user0
+"""
+import argparse
+import io
+import itertools
+import json
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from benchmarks._common import emit, load_summary, setup_django, test_database
+
+PASSWORD = "bench-password"
+REQUEST_NUMBERS = itertools.count()
+
+# ``payload`` builds the JSON body of a request from the session it is sent with and the
+# request's number, unique within the run.
+Endpoint = namedtuple("Endpoint", "name method path payload status authenticated")
+
+ENDPOINTS = [
+    Endpoint("mutual-funds", "GET", "/api/mf/mutual-funds/?page_size=100", None, 200, True),
+    Endpoint(
+        "mutual-funds-filtered", "GET",
+        "/api/mf/mutual-funds/?fund_type=EQUITY&nav_min=20&page_size=100", None, 200, True,
+    ),
+    Endpoint(
+        "mutual-funds-async", "GET", "/api/mf/mutual-funds/async/?page_size=100", None, 200, True
+    ),
+    Endpoint("mutual-funds-search", "GET", "/api/mf/mutual-funds/search/?q=blue", None, 200, False),
+    Endpoint("register", "POST", "/api/ums/register/", lambda session, i: {
+        "username": f"load-{session['run']}-{i}", "password1": PASSWORD, "password2": PASSWORD,
+    }, 201, False),
+    Endpoint("login", "POST", "/api/ums/login/", lambda session, i: {
+        "username": session["username"], "password": session["password"],
+    }, 200, False),
+    Endpoint("refresh", "POST", "/api/ums/token/refresh/", lambda session, i: {
+        "refresh": session["refresh"],
+    }, 200, False),
+    Endpoint("investments", "GET", "/api/ums/investments/", None, 200, True),
+    Endpoint("invest", "POST", "/api/ums/investments/", lambda session, i: {
+        "mutual_fund": session["funds"][i % len(session["funds"])], "units": 1,
+    }, 200, True),
+    Endpoint("report", "GET", "/api/ums/report/", None, 200, True),
+    Endpoint("report-aggregated", "GET", "/api/ums/report/?aggregate=true", None, 200, True),
+    Endpoint("report-csv", "GET", "/api/ums/report/?format=csv", None, 200, True),
+    Endpoint("report-returns", "GET", "/api/ums/report/returns/", None, 200, True),
+    Endpoint("report-history", "GET", "/api/ums/report/history/?interval=weekly", None, 200, True),
+    Endpoint("ledger", "GET", "/api/ums/ledger/?page_size=100", None, 200, True),
+    Endpoint("ledger-holdings", "GET", "/api/ums/ledger/holdings/", None, 200, True),
+    # Sells a sliver of the units the invest endpoint keeps buying, so it never oversells.
+    Endpoint("sell", "POST", "/api/ums/ledger/", lambda session, i: {
+        "transaction_type": "SELL",
+        "mutual_fund": session["funds"][i % len(session["funds"])],
+        "units": 0.001,
+    }, 201, True),
+]
+
+
+def seed(funds, users, investments, nav_days, workers):
+    """
+    Seed the dataset with the seed_data command.
+
+    Returns:
+        list: The ids of the seeded users, in creation order.
+    """
+    from django.core.management import call_command
+
+    from ums.models import User
+
+    call_command(
+        "seed_data", funds=funds, users=users, investments=investments, nav_days=nav_days,
+        workers=workers, prefix="user", password=PASSWORD, stdout=io.StringIO(),
+    )
+    return list(
+        User.objects.filter(username__startswith="user").order_by("id").values_list("id", flat=True)
+    )
+
+
+def local_sessions(user_ids, fund_ids):
+    """
+    Sessions of seeded users, with tokens minted directly and the funds they hold (any fund for
+    the users without one, which the invest endpoint then buys first).
+    """
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    from ums.models import Holding, User
+
+    held = {}
+    holdings = Holding.objects.filter(user_id__in=user_ids)
+    for user_id, fund_id in holdings.values_list("user_id", "mutual_fund_id"):
+        held.setdefault(user_id, []).append(fund_id)
+    sessions = []
+    for user in User.objects.filter(id__in=user_ids).order_by("id"):
+        refresh = RefreshToken.for_user(user)
+        sessions.append({
+            "username": user.username,
+            "password": PASSWORD,
+            "access": str(refresh.access_token),
+            "refresh": str(refresh),
+            "funds": held.get(user.id) or fund_ids[:1],
+        })
+    return sessions
+
+
+class InProcessTransport:
+    """
+    Send requests through the Django test client, counting the queries each one runs.
+    """
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def send(self, method, path, body, headers):
+        from django.db import connection
+        from django.test import Client
+        from django.test.utils import CaptureQueriesContext
+
+        if not hasattr(self.local, "client"):
+            self.local.client = Client()
+        extra = {f"HTTP_{name.upper()}": value for name, value in headers.items()}
+        with CaptureQueriesContext(connection) as queries:
+            if method == "GET":
+                response = self.local.client.get(path, **extra)
+            else:
+                response = self.local.client.post(
+                    path, json.dumps(body), content_type="application/json", **extra
+                )
+            if response.streaming:
+                b"".join(response.streaming_content)
+        return response.status_code, len(queries)
+
+
+class HttpTransport:
+    """
+    Send requests to a running server; the queries they run aren't visible from here.
+    """
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    def send(self, method, path, body, headers):
+        data = None if body is None else json.dumps(body).encode()
+        request = urllib.request.Request(self.base_url + path, data=data, method=method, headers={
+            "Content-Type": "application/json", **headers,
+        })
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                return response.status, None
+        except urllib.error.HTTPError as error:
+            return error.code, None
+
+    def login(self, username, password):
+        request = urllib.request.Request(
+            self.base_url + "/api/ums/login/",
+            data=json.dumps({"username": username, "password": password}).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request) as response:
+            tokens = json.load(response)["data"]
+        return tokens["access"], tokens["refresh"]
+
+
+def run_endpoint(transport, endpoint, sessions, requests, concurrency):
+    """
+    Send ``requests`` requests to the endpoint, ``concurrency`` at a time.
+    """
+
+    def call(i):
+        session = sessions[i % len(sessions)]
+        body = endpoint.payload(session, next(REQUEST_NUMBERS)) if endpoint.payload else None
+        headers = {"Authorization": f"Bearer {session['access']}"} if endpoint.authenticated else {}
+        started = time.perf_counter()
+        status, queries = transport.send(endpoint.method, endpoint.path, body, headers)
+        return time.perf_counter() - started, status == endpoint.status, queries
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        calls = list(pool.map(call, range(requests)))
+    elapsed = time.perf_counter() - started
+
+    queries = [count for _, _, count in calls if count is not None]
+    return {
+        **load_summary([latency for latency, _, _ in calls], elapsed),
+        "errors": sum(not ok for _, ok, _ in calls),
+        "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--funds", type=int, default=5000, help="Funds seeded.")
+    parser.add_argument("--users", type=int, default=1000, help="Users seeded.")
+    parser.add_argument(
+        "--investments", type=int, default=100000, help="Investments seeded, over random users."
+    )
+    parser.add_argument(
+        "--nav-days", type=int, default=365, help="Days of NAV history seeded for every fund."
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Processes seeding the data.")
+    parser.add_argument(
+        "--active-users", type=int, default=100, help="Seeded users the requests are spread over."
+    )
+    parser.add_argument(
+        "--requests", type=int, default=200, help="Requests per endpoint and concurrency."
+    )
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--endpoints", nargs="+", choices=[endpoint.name for endpoint in ENDPOINTS],
+                        help="Only drive these endpoints (default: all).")
+    parser.add_argument(
+        "--base-url", help="Drive the server at this URL instead of an in-process test database."
+    )
+    parser.add_argument("--username", default="user0", help="User to log in as with --base-url.")
+    parser.add_argument(
+        "--password", default=PASSWORD, help="Password to log in with with --base-url."
+    )
+    parser.add_argument(
+        "--directory",
+        help="Where to create the SQLite database file (a temporary directory by default).",
+    )
+    parser.add_argument("--output", help="Also write the JSON results to this file.")
+    args = parser.parse_args()
+    endpoints = [
+        endpoint for endpoint in ENDPOINTS if not args.endpoints or endpoint.name in args.endpoints
+    ]
+    run = int(time.time())
+
+    results = {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "mode": "http" if args.base_url else "in-process",
+        "endpoints": {},
+    }
+
+    def drive(transport, sessions):
+        for session in sessions:
+            session["run"] = run
+        for endpoint in endpoints:
+            results["endpoints"][endpoint.name] = {
+                str(concurrency): run_endpoint(
+                    transport, endpoint, sessions, args.requests, concurrency
+                )
+                for concurrency in args.concurrency
+            }
+
+    if args.base_url:
+        transport = HttpTransport(args.base_url)
+        access, refresh = transport.login(args.username, args.password)
+        # The server's fund ids aren't known here: the write endpoints trade fund 1.
+        drive(transport, [{
+            "username": args.username, "password": args.password,
+            "access": access, "refresh": refresh, "funds": [1],
+        }])
+    else:
+        setup_django()
+        from django.db import connection
+        from django.test.utils import override_settings
+
+        # Concurrent writers need a file: SQLite's shared in-memory databases lock whole tables
+        # and don't wait for them.
+        with tempfile.TemporaryDirectory(dir=args.directory) as directory, test_database(
+            name=str(Path(directory) / "load.sqlite3") if connection.vendor == "sqlite" else None
+        ):
+            started = time.perf_counter()
+            user_ids = seed(args.funds, args.users, args.investments, args.nav_days, args.workers)
+            results["seed"] = {
+                "funds": args.funds,
+                "users": args.users,
+                "investments": args.investments,
+                "nav_days": args.nav_days,
+                "seconds": round(time.perf_counter() - started, 2),
+            }
+            from mutualfunds.models import MutualFunds
+            from ums.last_login import last_login_buffer
+
+            fund_ids = list(MutualFunds.objects.order_by("id").values_list("id", flat=True)[:1])
+            # Serve like a deployment; the queries are still captured for counting.
+            with override_settings(DEBUG=False):
+                drive(InProcessTransport(), local_sessions(user_ids[:args.active_users], fund_ids))
+            # Write the buffered logins while the database is still there, not at exit.
+            last_login_buffer.stop()
+
+    emit(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Login throughput of the sync login view against the async view at several hashing pool sizes.
+
+Every login runs a full PBKDF2 check. The sync view hashes on the request thread, so
+concurrent logins queue behind each other; the async view hashes in the pool, so
+throughput should grow with the pool size up to the number of cores.
+
+    python -m benchmarks.login_throughput --logins 64 --concurrency 16
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks._common import emit, setup_django, test_database
+
+
+async def run_logins(client, url, logins, concurrency):
+    """
+    Send ``logins`` login requests, at most ``concurrency`` at a time, returning logins/sec.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    body = {"username": "bench", "password": "bench-password"}
+
+    async def login():
+        async with semaphore:
+            response = await client.post(url, body, content_type="application/json")
+            assert response.status_code == 200, response.content
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    return logins / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--logins", type=int, default=64, help="Logins per measurement.")
+    parser.add_argument("--concurrency", type=int, default=16, help="Logins in flight at once.")
+    parser.add_argument(
+        "--workers", type=int, nargs="+",
+        help="Hashing pool sizes to measure (default: powers of two up to the CPU count).",
+    )
+    parser.add_argument("--output", help="Also write the JSON results to this file.")
+    args = parser.parse_args()
+
+    cores = os.cpu_count()
+    powers = {2 ** i for i in range(cores.bit_length()) if 2 ** i <= cores}
+    workers = args.workers or sorted(powers | {cores})
+
+    setup_django()
+    from django.test import AsyncClient
+    from django.test.utils import override_settings
+
+    from ums.hashing import shutdown_hashing_executor
+    from ums.models import User
+
+    with test_database():
+        user = User(username="bench")
+        user.set_password("bench-password")
+        user.save()
+        client = AsyncClient()
+
+        results = {
+            "cores": cores,
+            "logins": args.logins,
+            "concurrency": args.concurrency,
+            "sync_logins_per_sec": round(
+                asyncio.run(run_logins(client, "/api/ums/login/", args.logins, args.concurrency)), 2
+            ),
+            "async_logins_per_sec": {},
+        }
+        for size in workers:
+            with override_settings(PASSWORD_HASHING_WORKERS=size):
+                shutdown_hashing_executor()
+                rate = asyncio.run(
+                    run_logins(client, "/api/ums/login/async/", args.logins, args.concurrency)
+                )
+                results["async_logins_per_sec"][str(size)] = round(rate, 2)
+        shutdown_hashing_executor()
+
+    emit(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark of the portfolio value time series (ums.history) on a multi-year history.
+
+Seeds ``--funds`` funds with ``--years`` years of weekday NAVs and one user with
+``--transactions`` ledger entries over them, then times portfolio_history() over the whole
+range at each interval, with the number of queries it runs. For comparison it also times
+the naive approach, one NAV lookup per fund per day, over the last ``--naive-days`` days.
+
+    python -m benchmarks.portfolio_history --funds 20 --years 5 --transactions 2000
+"""
+import argparse
+import datetime
+import random
+
+from benchmarks._common import emit, setup_django, summarize, test_database, time_calls
+
+
+def seed(funds, years, transactions):
+    from django.utils import timezone
+
+    from mutualfunds.models import MutualFunds, NavHistory
+    from ums.enums import TransactionType
+    from ums.models import LedgerEntry, User
+
+    rng = random.Random(0)
+    today = timezone.localdate()
+    days = [today - datetime.timedelta(days=offset) for offset in range(365 * years, 0, -1)]
+    fund_rows = MutualFunds.objects.bulk_create(
+        MutualFunds(
+            name=f"Scheme {i}", fund_type=("EQUITY", "DEBT", "HYBRID")[i % 3], nav=10 + i % 40
+        )
+        for i in range(funds)
+    )
+    NavHistory.objects.bulk_create(
+        (
+            NavHistory(fund=fund, date=day, nav=rng.uniform(5, 50))
+            for fund in fund_rows for day in days if day.weekday() < 5
+        ),
+        batch_size=5000,
+    )
+    user = User(username="bench")
+    user.set_password("bench-password")
+    user.save()
+    LedgerEntry.objects.bulk_create(
+        (
+            LedgerEntry(
+                user=user,
+                mutual_fund=fund_rows[i % funds],
+                # One sale for every five buys, small enough never to oversell.
+                transaction_type=TransactionType.SELL if i % 6 == 5 else TransactionType.BUY,
+                trade_date=rng.choice(days),
+                units=rng.uniform(1, 2) if i % 6 == 5 else rng.uniform(5, 20),
+                nav=rng.uniform(5, 50),
+            )
+            for i in range(transactions)
+        ),
+        batch_size=2000,
+    )
+    return user, days[0], today
+
+
+def naive_history(user, start, end):
+    """
+    One query per fund per day: units held from the ledger, NAV from the history.
+    """
+    from mutualfunds.models import MutualFunds
+    from ums.ledger import nav_on, positions_as_of
+
+    funds = MutualFunds.objects.in_bulk()
+    points = []
+    day = start
+    while day <= end:
+        positions = positions_as_of(user, day)
+        points.append(sum(
+            position["units"] * nav_on(funds[fund_id], day)
+            for fund_id, position in positions.items()
+        ))
+        day += datetime.timedelta(days=1)
+    return points
+
+
+def count_queries(fn):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as queries:
+        fn()
+    return len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--funds", type=int, default=20, help="Funds seeded, each with a full NAV history."
+    )
+    parser.add_argument("--years", type=int, default=5, help="Years of NAV history and of trades.")
+    parser.add_argument(
+        "--transactions", type=int, default=2000, help="Ledger entries seeded for the user."
+    )
+    parser.add_argument(
+        "--naive-days", type=int, default=30, help="Days valued by the naive approach."
+    )
+    parser.add_argument("--repeat", type=int, default=10, help="Timed runs per measurement.")
+    parser.add_argument("--output", help="Also write the JSON results to this file.")
+    args = parser.parse_args()
+
+    setup_django()
+    from ums.enums import INTERVALS
+    from ums.history import portfolio_history
+
+    with test_database():
+        user, start, end = seed(args.funds, args.years, args.transactions)
+        naive_start = end - datetime.timedelta(days=args.naive_days - 1)
+
+        results = {
+            "funds": args.funds,
+            "years": args.years,
+            "transactions": args.transactions,
+            "portfolio_history": {
+                interval: {
+                    "points": len(portfolio_history(user, start, end, interval)),
+                    "queries": count_queries(lambda: portfolio_history(user, start, end, interval)),
+                    **summarize(time_calls(
+                        lambda: portfolio_history(user, start, end, interval), args.repeat
+                    )),
+                }
+                for interval in INTERVALS
+            },
+            "naive": {
+                "points": args.naive_days,
+                "queries": count_queries(lambda: naive_history(user, naive_start, end)),
+                **summarize(time_calls(
+                    lambda: naive_history(user, naive_start, end), max(1, args.repeat // 5)
+                )),
+            },
+        }
+
+    emit(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
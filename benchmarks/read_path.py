@@ -0,0 +1,102 @@
+"""
+Micro-benchmark of the list endpoints: DRF serializers vs the FAST_READ_PATH.
+
+Seeds an in-memory test database, then times each GET endpoint end to end with the
+setting off and on, and times the stock JSONRenderer against FastJSONRenderer on the
+same payload.
+
+    python -m benchmarks.read_path --rows 20000 --repeat 20
+"""
+import argparse
+
+from benchmarks._common import emit, setup_django, summarize, test_database, time_calls
+
+
+def seed(rows):
+    from mutualfunds.models import MutualFunds
+    from ums.models import Holding, User, UserInvestment
+
+    funds = MutualFunds.objects.bulk_create(
+        MutualFunds(
+            name=f"Scheme {i}", fund_type=("EQUITY", "DEBT", "HYBRID")[i % 3], nav=10 + i % 90
+        )
+        for i in range(1000)
+    )
+    user = User(username="bench")
+    user.set_password("bench-password")
+    user.save()
+    UserInvestment.objects.bulk_create(
+        (
+            UserInvestment(user=user, mutual_fund=funds[i % len(funds)], units=1 + i % 7)
+            for i in range(rows)
+        ),
+        batch_size=2000,
+    )
+    Holding.objects.bulk_create(
+        Holding(user=user, mutual_fund=fund, units=1) for fund in funds
+    )
+    return user
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type=int, default=20000, help="Investments seeded for the user.")
+    parser.add_argument(
+        "--repeat", type=int, default=20, help="Timed requests per endpoint and mode."
+    )
+    parser.add_argument("--output", help="Also write the JSON results to this file.")
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test.utils import override_settings
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.test import APIClient
+
+    from mfas.renderers import FastJSONRenderer, orjson
+    from mutualfunds.cache import get_catalogue_cache
+
+    endpoints = {
+        "mutual-funds": "/api/mf/mutual-funds/?page_size=1000",
+        "investments": "/api/ums/investments/",
+        "report": "/api/ums/report/",
+        "report-aggregated": "/api/ums/report/?aggregate=true",
+    }
+
+    with test_database():
+        user = seed(args.rows)
+        client = APIClient()
+        client.force_authenticate(user)
+
+        def request(url):
+            # Measure the database and serialization work, not the catalogue cache.
+            get_catalogue_cache().clear()
+            response = client.get(url)
+            assert response.status_code == 200, response.content
+            return response
+
+        results = {"rows": args.rows, "orjson": orjson is not None, "endpoints": {}, "render": {}}
+        for name, url in endpoints.items():
+            timings = {}
+            for mode, fast in (("serializer", False), ("fast", True)):
+                with override_settings(FAST_READ_PATH=fast):
+                    timings[mode] = summarize(time_calls(lambda: request(url), args.repeat))
+            timings["speedup"] = round(
+                timings["serializer"]["median_ms"] / timings["fast"]["median_ms"], 2
+            )
+            results["endpoints"][name] = timings
+
+        with override_settings(FAST_READ_PATH=True):
+            payload = request(endpoints["investments"]).json()
+        renderers = {"JSONRenderer": JSONRenderer(), "FastJSONRenderer": FastJSONRenderer()}
+        for name, renderer in renderers.items():
+            results["render"][name] = summarize(
+                time_calls(lambda: renderer.render(payload), args.repeat)
+            )
+
+    emit(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Benchmark of the returns engine (ums.returns) on a large ledger.
+
+Seeds one user with ``--transactions`` ledger entries spread over ``--funds`` funds and
+``--years`` years, then times compute_returns() end to end (query included), the batched
+XIRR solve alone, and a plain Python Newton loop per fund on the same cash flows.
+
+    python -m benchmarks.returns --transactions 10000 --funds 50
+"""
+import argparse
+import datetime
+import random
+
+from benchmarks._common import emit, setup_django, summarize, test_database, time_calls
+
+
+def seed(transactions, funds, years):
+    from django.utils import timezone
+
+    from mutualfunds.models import MutualFunds
+    from ums.enums import TransactionType
+    from ums.models import LedgerEntry, User
+
+    rng = random.Random(0)
+    fund_rows = MutualFunds.objects.bulk_create(
+        MutualFunds(
+            name=f"Scheme {i}", fund_type=("EQUITY", "DEBT", "HYBRID")[i % 3], nav=10 + i % 40
+        )
+        for i in range(funds)
+    )
+    user = User(username="bench")
+    user.set_password("bench-password")
+    user.save()
+    today = timezone.localdate()
+    LedgerEntry.objects.bulk_create(
+        (
+            LedgerEntry(
+                user=user,
+                mutual_fund=fund_rows[i % funds],
+                # One sale for every five buys, small enough never to oversell.
+                transaction_type=TransactionType.SELL if i % 6 == 5 else TransactionType.BUY,
+                trade_date=today - datetime.timedelta(days=rng.randrange(1, 365 * years)),
+                units=rng.uniform(1, 2) if i % 6 == 5 else rng.uniform(5, 20),
+                nav=rng.uniform(5, 50),
+            )
+            for i in range(transactions)
+        ),
+        batch_size=2000,
+    )
+    return user
+
+
+def python_xirr(flows):
+    """
+    Newton's method on one fund's [(years, amount)] flows, in plain Python.
+    """
+    rate = 0.1
+    for _ in range(50):
+        npv = sum(amount * (1 + rate) ** -years for years, amount in flows)
+        slope = sum(-years * amount * (1 + rate) ** (-years - 1) for years, amount in flows)
+        step = npv / slope
+        rate -= step
+        if abs(step) < 1e-9:
+            return rate
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--transactions", type=int, default=10000, help="Ledger entries seeded for the user."
+    )
+    parser.add_argument("--funds", type=int, default=50, help="Funds the entries are spread over.")
+    parser.add_argument(
+        "--years", type=int, default=5, help="Years of history the entries are spread over."
+    )
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per measurement.")
+    parser.add_argument("--output", help="Also write the JSON results to this file.")
+    args = parser.parse_args()
+
+    setup_django()
+    import numpy as np
+
+    from ums import returns
+
+    with test_database():
+        user = seed(args.transactions, args.funds, args.years)
+
+        columns = returns.ledger_columns(user)
+        outflow = np.isin(columns["kind"], returns.OUTFLOW_KINDS)
+        value = columns["units"] * columns["nav"]
+        amounts = np.where(outflow, value, -value)
+        _, series = np.unique(columns["mutual_fund_id"], return_inverse=True)
+        years = (columns["day"] - columns["day"].min()) / returns.DAYS_PER_YEAR
+        # Close every series with its net flow as a positive final value, so each one has a rate.
+        final = np.maximum(-np.bincount(series, weights=amounts), 1.0) * 1.1
+        amounts = np.concatenate([amounts, final])
+        years = np.concatenate([years, np.full(args.funds, years.max() + 0.01)])
+        series = np.concatenate([series, np.arange(args.funds)])
+        per_fund = [
+            list(zip(years[series == i].tolist(), amounts[series == i].tolist()))
+            for i in range(args.funds)
+        ]
+
+        results = {
+            "transactions": args.transactions,
+            "funds": args.funds,
+            "compute_returns": summarize(time_calls(
+                lambda: returns.compute_returns(user), args.repeat
+            )),
+            "ledger_query": summarize(time_calls(
+                lambda: returns.ledger_columns(user), args.repeat
+            )),
+            "batched_xirr": summarize(time_calls(
+                lambda: returns.xirr(amounts, years, series, args.funds), args.repeat
+            )),
+            "python_loop_xirr": summarize(time_calls(
+                lambda: [python_xirr(flows) for flows in per_fund], max(1, args.repeat // 4)
+            )),
+        }
+
+    emit(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 ASGI config for mfas project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Async views (e.g. ``/api/ums/login/async/``) run natively on its event loop.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -11,6 +12,11 @@ import os
 
 from django.core.asgi import get_asgi_application
 
+from mfas.startup import load_application
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mfas.settings')
+# Persistent connections are per thread and event loop under ASGI and leak rather than
+# being reused, so the ASGI server closes them after each request unless told otherwise.
+os.environ.setdefault('MFAS_DB_CONN_MAX_AGE', '0')
 
-application = get_asgi_application()
+application = load_application(get_asgi_application)
@@ -0,0 +1,94 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import (
+    APIException,
+    NotAuthenticated,
+    ParseError,
+    UnsupportedMediaType,
+)
+from rest_framework.settings import api_settings
+
+from mfas.renderers import FastJSONRenderer
+
+
+class AsyncAPIView(View):
+    """
+    Base class for native async views served over ASGI.
+
+    DRF's APIView only runs synchronously, so these views are plain Django views that keep
+    the same conventions as the rest of the API: JSON request bodies, ``{"message", "data"}``
+    payloads and DRF-style error bodies for raised APIExceptions. Requests are authenticated
+    with the same DRF authentication classes as the sync views.
+    """
+    renderer = FastJSONRenderer()
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    # Set to False, or override requires_authentication, for public views.
+    authentication_required = True
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            if self.requires_authentication(request):
+                await self.authenticate(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            data = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+            response = self.respond(data, status=exc.status_code)
+            if exc.status_code == status.HTTP_401_UNAUTHORIZED and self.authentication_classes:
+                authenticator = self.authentication_classes[0]()
+                response["WWW-Authenticate"] = authenticator.authenticate_header(request)
+            return response
+
+    def requires_authentication(self, request):
+        """
+        Whether this request must carry valid credentials.
+        """
+        return self.authentication_required
+
+    async def authenticate(self, request):
+        """
+        Authenticate the request with the configured DRF authentication classes, setting
+        ``request.user`` and ``request.auth``.
+
+        The authenticators are sync (they may read the user from the cache or the database),
+        so they run through sync_to_async.
+        """
+        for authentication_class in self.authentication_classes:
+            result = await sync_to_async(authentication_class().authenticate)(request)
+            if result is not None:
+                request.user, request.auth = result
+                return
+        raise NotAuthenticated()
+
+    def parse_body(self, request):
+        """
+        Decode the JSON request body.
+
+        Returns:
+            dict | list: The decoded body ({} when empty).
+        """
+        if not request.body:
+            return {}
+        if request.content_type != "application/json":
+            raise UnsupportedMediaType(request.content_type)
+        try:
+            return json.loads(request.body)
+        except ValueError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+
+    def respond(self, data, status=status.HTTP_200_OK) -> HttpResponse:
+        """
+        Render the data as JSON.
+        """
+        return HttpResponse(
+            self.renderer.render(data), content_type="application/json", status=status
+        )
@@ -0,0 +1,39 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from mfas.schema import compressed_path, render_schema, write_schema
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the OpenAPI schema to SCHEMA_FILE, with a gzipped copy, for /api/schema/ to serve "
+        "when SERVE_PRECOMPUTED_SCHEMA is on. Run it when building every release."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output", type=Path, help="Where to write the schema (default: SCHEMA_FILE)."
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Write nothing; fail if the file on disk differs from the schema of the code.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["output"] or Path(settings.SCHEMA_FILE)
+        content = render_schema()
+
+        if options["check"]:
+            if not path.exists() or path.read_bytes() != content:
+                raise CommandError(f"{path} is out of date; run generate_schema.")
+            self.stdout.write(self.style.SUCCESS(f"{path} is up to date."))
+            return
+
+        write_schema(path, content)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {path} ({len(content)} bytes) and {compressed_path(path).name} "
+            f"({compressed_path(path).stat().st_size} bytes)."
+        ))
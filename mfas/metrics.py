@@ -0,0 +1,354 @@
+"""
+Per-request instrumentation, served in the Prometheus text format.
+
+MetricsMiddleware attributes every request to the view that served it (for example
+``InvestmentApiView.get``) and records its total latency, the number and total duration of
+the SQL queries it ran, the time its DRF serializers spent building their ``data`` (the
+queries they ran aside), and the time the renderer spent encoding the response body.
+Queries are seen by a database execute wrapper installed on every connection, and
+serializers by a wrapper around ``Serializer.data`` and ``ListSerializer.data``; both report
+to the request being served through a context variable, so they work for sync and async
+views alike and don't need DEBUG's query log. Streaming responses are measured until the response is
+returned, not while their body is streamed.
+
+The figures go into in-process histograms that ``metrics_view`` serves at ``/metrics``.
+Each server process keeps its own, so scrape every worker. Requests slower than
+``METRICS_SLOW_REQUEST_SECONDS``, or running one SQL statement
+``METRICS_REPEATED_QUERY_THRESHOLD`` times or more (the N+1 pattern), are also counted and
+logged as warnings.
+"""
+import contextvars
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+# Label of the requests no view served (404s, redirects of CommonMiddleware)
+UNRESOLVED_VIEW = "unresolved"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class RequestStats:
+    """
+    What the request being served did, filled in while it runs.
+    """
+    __slots__ = (
+        "view", "queries", "query_seconds", "statements", "serializing", "serialize_seconds",
+        "render_seconds",
+    )
+
+    def __init__(self):
+        self.view = UNRESOLVED_VIEW
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.statements = defaultdict(int)  # Runs of each SQL statement, parameters aside
+        self.serializing = False  # Inside a serializer's data, whose nested ones aren't timed again
+        self.serialize_seconds = 0.0
+        self.render_seconds = 0.0
+
+
+current_request = contextvars.ContextVar("metrics_current_request", default=None)
+
+
+def label_value(value):
+    """
+    Escape a label value for the text format.
+    """
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class HistogramMetric:
+    """
+    A Prometheus histogram with one series per view.
+    """
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self._series = {}  # view: [per-bucket counts, with one past the last bucket], sum
+        self._lock = threading.Lock()
+
+    def observe(self, view, value):
+        with self._lock:
+            counts, total = self._series.get(view) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[bisect_left(self.buckets, value)] += 1
+            self._series[view] = counts, total + value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted(
+                (view, list(counts), total) for view, (counts, total) in self._series.items()
+            )
+        for view, counts, total in series:
+            label = f'view="{label_value(view)}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {sum(counts)}')
+            lines.append(f"{self.name}_sum{{{label}}} {total}")
+            lines.append(f"{self.name}_count{{{label}}} {sum(counts)}")
+        return lines
+
+
+class CounterMetric:
+    """
+    A Prometheus counter with one series per view.
+    """
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._series = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def increment(self, view):
+        with self._lock:
+            self._series[view] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            series = sorted(self._series.items())
+        lines.extend(f'{self.name}{{view="{label_value(view)}"}} {count}' for view, count in series)
+        return lines
+
+
+REQUEST_SECONDS = HistogramMetric(
+    "mfas_request_duration_seconds", "Time to serve the request, rendering included.",
+    LATENCY_BUCKETS,
+)
+QUERY_COUNT = HistogramMetric(
+    "mfas_db_queries_per_request", "SQL queries run by the request.", QUERY_COUNT_BUCKETS
+)
+QUERY_SECONDS = HistogramMetric(
+    "mfas_db_query_duration_seconds", "Time the request spent running SQL queries.", LATENCY_BUCKETS
+)
+SERIALIZE_SECONDS = HistogramMetric(
+    "mfas_serialization_duration_seconds",
+    "Time DRF serializers spent building their data, SQL queries aside.", LATENCY_BUCKETS,
+)
+RENDER_SECONDS = HistogramMetric(
+    "mfas_render_duration_seconds", "Time the renderer spent encoding the response body.",
+    LATENCY_BUCKETS,
+)
+SLOW_REQUESTS = CounterMetric(
+    "mfas_slow_requests_total", "Requests slower than METRICS_SLOW_REQUEST_SECONDS."
+)
+REPEATED_QUERY_REQUESTS = CounterMetric(
+    "mfas_repeated_query_requests_total",
+    "Requests running one SQL statement METRICS_REPEATED_QUERY_THRESHOLD times or more.",
+)
+METRICS = (
+    REQUEST_SECONDS, QUERY_COUNT, QUERY_SECONDS, SERIALIZE_SECONDS, RENDER_SECONDS,
+    SLOW_REQUESTS, REPEATED_QUERY_REQUESTS,
+)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper timing the queries of the request being served, if any.
+    """
+    stats = current_request.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.query_seconds += time.perf_counter() - started
+        stats.statements[sql] += 1
+
+
+def install_query_recorder(connection, **kwargs):
+    """
+    Add record_query to a connection's execute wrappers, once.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(
+    install_query_recorder, dispatch_uid="mfas.metrics.install_query_recorder"
+)
+
+
+def timed_data(data):
+    """
+    Wrap a serializer's ``data`` property to add the time it takes, less the time of the SQL
+    queries run meanwhile, to the request being served, if any.
+    """
+    build = data.fget
+
+    def timed(serializer):
+        stats = current_request.get()
+        if stats is None or stats.serializing:
+            return build(serializer)
+        stats.serializing = True
+        query_seconds = stats.query_seconds
+        started = time.perf_counter()
+        try:
+            return build(serializer)
+        finally:
+            stats.serializing = False
+            stats.serialize_seconds += (
+                time.perf_counter() - started - (stats.query_seconds - query_seconds)
+            )
+
+    timed.timed = True
+    return property(timed, doc=data.__doc__)
+
+
+def install_serializer_timing():
+    """
+    Time the ``data`` of DRF's serializers and list serializers, once.
+    """
+    from rest_framework.serializers import ListSerializer, Serializer
+
+    for serializer_class in (Serializer, ListSerializer):
+        data = serializer_class.__dict__["data"]
+        if not getattr(data.fget, "timed", False):
+            serializer_class.data = timed_data(data)
+
+
+def view_label(view_func, request):
+    """
+    ``ViewClass.method`` for class-based views, the function's name otherwise.
+    """
+    view_class = getattr(view_func, "view_class", None)
+    if view_class is None:
+        return getattr(view_func, "__name__", type(view_func).__name__)
+    return f"{view_class.__name__}.{request.method.lower()}"
+
+
+class MetricsMiddleware:
+    """
+    Record the latency, SQL queries, serialization and rendering time of every request, per
+    view.
+
+    Put it first in MIDDLEWARE so its latency covers the other middleware too. It is left
+    out when METRICS_ENABLED is off.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        # Connections opened before the signal receiver was connected.
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+        install_serializer_timing()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = current_request.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+        self.record(request, stats, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = current_request.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_request.reset(token)
+        self.record(request, stats, time.perf_counter() - started)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        stats = current_request.get()
+        if stats is not None:
+            # The scrapes would drown the views they report on.
+            stats.view = None if view_func is metrics_view else view_label(view_func, request)
+
+    def process_template_response(self, request, response):
+        """
+        Time the rendering of DRF responses, which happens after the view returns. It only
+        encodes the data the view's serializers built, which is timed apart.
+        """
+        stats = current_request.get()
+        if stats is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                stats.render_seconds += time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def record(self, request, stats, elapsed):
+        view = stats.view
+        if view is None:
+            return
+        REQUEST_SECONDS.observe(view, elapsed)
+        QUERY_COUNT.observe(view, stats.queries)
+        QUERY_SECONDS.observe(view, stats.query_seconds)
+        SERIALIZE_SECONDS.observe(view, stats.serialize_seconds)
+        RENDER_SECONDS.observe(view, stats.render_seconds)
+
+        if elapsed >= settings.METRICS_SLOW_REQUEST_SECONDS:
+            SLOW_REQUESTS.increment(view)
+            logger.warning(
+                "Slow request: %s %s (%s) took %.3fs, %d queries in %.3fs",
+                request.method, request.path, view, elapsed, stats.queries, stats.query_seconds,
+            )
+        if stats.statements:
+            sql, runs = max(stats.statements.items(), key=lambda item: item[1])
+            if runs >= settings.METRICS_REPEATED_QUERY_THRESHOLD:
+                REPEATED_QUERY_REQUESTS.increment(view)
+                logger.warning(
+                    "Repeated query: %s %s (%s) ran one statement %d times (N+1?): %s",
+                    request.method, request.path, view, runs, sql[:500],
+                )
+
+
+def render_metrics():
+    """
+    All the metrics, in the Prometheus text format.
+    """
+    return "\n".join(line for metric in METRICS for line in metric.render()) + "\n"
+
+
+def metrics_view(request):
+    """
+    Serve the metrics of this process to Prometheus.
+
+    Scrapes must send METRICS_TOKEN as a bearer token. Without a token the figures are only
+    served in DEBUG: in production they would be public.
+    """
+    token = settings.METRICS_TOKEN
+    if not token:
+        if not settings.DEBUG:
+            return HttpResponseForbidden()
+    elif not constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE)
@@ -0,0 +1,250 @@
+"""
+On-demand profiling of single requests.
+
+A staff user (by session, or by any of the API's authentication classes) sends the
+``X-Profile`` header to have their request profiled: ``X-Profile: cprofile`` (or any other
+value) runs it under cProfile and writes a pstats file, ``X-Profile: sample`` samples its
+stack every ``PROFILING_SAMPLE_INTERVAL`` seconds and writes collapsed stacks, the input of
+flamegraph.pl, speedscope and most flame graph tools. ``PROFILING_ALL_REQUESTS`` profiles
+every request with cProfile instead, to reproduce a problem locally.
+
+Profiles go to ``PROFILING_DIR``, named after the time, the view, the query count and the
+duration of the request, and the response names its file in ``X-Profile-File``. Requests
+without the header cost one dictionary lookup.
+
+Async views are profiled on the event loop's thread, so other requests served at the same
+time can show up in their profile.
+"""
+import cProfile
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from importlib import import_module
+from pathlib import Path
+from types import SimpleNamespace
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from mfas.metrics import current_request, view_label
+
+HEADER = "HTTP_X_PROFILE"
+SAMPLE_MODE = "sample"
+
+
+class StackSampler:
+    """
+    Sample the stack of one thread at an interval, counting each distinct stack.
+    """
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = defaultdict(int)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiling-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def dump(self, path):
+        """
+        Write the samples as collapsed stacks: one ``frame;frame;frame count`` line per stack.
+        """
+        with open(path, "w") as output:
+            output.writelines(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+
+class DeterministicProfiler:
+    """
+    cProfile behind the StackSampler interface.
+    """
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def dump(self, path):
+        self.profile.dump_stats(path)
+
+
+class QueryCounter:
+    """
+    Count the request's queries: through the metrics middleware's figures when it runs,
+    otherwise with an execute wrapper on this thread's connection.
+    """
+
+    def __init__(self):
+        self.stats = current_request.get()
+        self.queries = 0
+        self._wrapper = None
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        if self.stats is not None:
+            self.queries = -self.stats.queries
+        else:
+            self._wrapper = connection.execute_wrapper(self)
+            self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._wrapper is not None:
+            self._wrapper.__exit__(*exc_info)
+        else:
+            self.queries += self.stats.queries
+        return False
+
+
+def session_user(request):
+    """
+    The user signed in to the request's session, or None.
+
+    The middleware runs before SessionMiddleware and AuthenticationMiddleware, so it loads
+    the session from its cookie itself, as they would.
+    """
+    user = getattr(request, "user", None)
+    if user is not None:
+        return user
+    session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not session_key or not apps.is_installed("django.contrib.sessions"):
+        return None
+    session = import_module(settings.SESSION_ENGINE).SessionStore(session_key)
+    return get_user(SimpleNamespace(session=session))
+
+
+def is_staff(request):
+    """
+    Whether the request comes from a staff user, signed in to the admin or to the API.
+    """
+    user = session_user(request)
+    if user is not None and user.is_staff:
+        return True
+    api_request = Request(request)
+    for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        try:
+            authenticated = authentication_class().authenticate(api_request)
+        except APIException:
+            return False
+        if authenticated is not None:
+            return authenticated[0].is_staff
+    return False
+
+
+class ProfilingMiddleware:
+    """
+    Profile the requests asked for, writing one file per request to PROFILING_DIR.
+
+    Put it right after MetricsMiddleware. It is left out when PROFILING_ENABLED is off.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        mode = self.requested_mode(request)
+        if mode is None or not (settings.PROFILING_ALL_REQUESTS or is_staff(request)):
+            return self.get_response(request)
+
+        profiler = self.profiler(mode)
+        started = time.perf_counter()
+        with QueryCounter() as queries:
+            profiler.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.stop()
+        elapsed = time.perf_counter() - started
+        return self.save(request, response, profiler, mode, queries.queries, elapsed)
+
+    async def __acall__(self, request):
+        mode = self.requested_mode(request)
+        if mode is None or not (
+            settings.PROFILING_ALL_REQUESTS or await sync_to_async(is_staff)(request)
+        ):
+            return await self.get_response(request)
+
+        profiler = self.profiler(mode)
+        started = time.perf_counter()
+        with QueryCounter() as queries:
+            profiler.start()
+            try:
+                response = await self.get_response(request)
+            finally:
+                profiler.stop()
+        elapsed = time.perf_counter() - started
+        return self.save(request, response, profiler, mode, queries.queries, elapsed)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.profiled_view = view_label(view_func, request)
+
+    def requested_mode(self, request):
+        """
+        The profiling mode asked for by the header, or by PROFILING_ALL_REQUESTS; None when
+        the request isn't to be profiled.
+        """
+        mode = request.META.get(HEADER)
+        if mode is None and settings.PROFILING_ALL_REQUESTS:
+            return "cprofile"
+        return mode
+
+    def profiler(self, mode):
+        if mode == SAMPLE_MODE:
+            return StackSampler(threading.get_ident(), settings.PROFILING_SAMPLE_INTERVAL)
+        return DeterministicProfiler()
+
+    def save(self, request, response, profiler, mode, queries, elapsed):
+        """
+        Write the profile, tagged with the view and its query count, and name it in the response.
+        """
+        view = re.sub(r"[^\w.-]", "_", getattr(request, "profiled_view", "unresolved"))
+        directory = Path(settings.PROFILING_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        stamp = timezone.now().strftime("%Y%m%dT%H%M%S.%f")
+        extension = "collapsed" if mode == SAMPLE_MODE else "pstats"
+        path = directory / f"{stamp}-{view}-{queries}q-{elapsed * 1000:.0f}ms.{extension}"
+        profiler.dump(path)
+        response["X-Profile-File"] = path.name
+        return response
@@ -0,0 +1,33 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stock encoder is used without it.
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed.
+
+    The output decodes to the same values as the stock renderer's: compact UTF-8, with
+    dates, times and datetimes formatted by DRF's encoder (milliseconds, ``Z`` for UTC) and
+    U+2028 / U+2029 escaped. Two differences remain: floats may be spelled differently
+    (``1e-5`` for ``1e-05``), and NaN and infinities are encoded as null where the stock
+    renderer raises under STRICT_JSON. Indented output, and anything orjson can't encode
+    even with DRF's encoder as a fallback, go through the stock renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            rendered = orjson.dumps(
+                data, default=self.encoder_class().default, option=orjson.OPT_PASSTHROUGH_DATETIME
+            )
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Line and paragraph separators are valid JSON but not valid JavaScript.
+        return rendered.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
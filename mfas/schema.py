@@ -0,0 +1,125 @@
+"""
+The OpenAPI schema, rendered once at build time instead of on every request.
+
+drf-spectacular's SpectacularAPIView introspects every view to build the schema each time
+it is fetched. ``manage.py generate_schema`` renders it to ``SCHEMA_FILE`` as JSON, next to
+a gzipped copy, and with ``SERVE_PRECOMPUTED_SCHEMA`` on (the default outside DEBUG)
+``/api/schema/`` serves those files instead: read once per process, gzipped to the clients
+that accept it, with a strong ETag and a long ``Cache-Control`` max-age.
+"""
+import gzip
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+
+CONTENT_TYPE = "application/vnd.oai.openapi+json"
+
+
+def render_schema():
+    """
+    Render the public schema of the API as JSON, as SpectacularAPIView serves it.
+
+    Returns:
+        bytes: The schema.
+    """
+    # Only the build imports the schema tooling; serving the file doesn't need it.
+    from drf_spectacular.renderers import OpenApiJsonRenderer
+    from drf_spectacular.settings import spectacular_settings
+
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(request=None, public=True)
+    return OpenApiJsonRenderer().render(schema, renderer_context={})
+
+
+def compressed_path(path):
+    return Path(f"{path}.gz")
+
+
+def write_schema(path, content):
+    """
+    Write the schema and its gzipped copy, each replacing the previous file in one rename so
+    a server reading them never sees half a file.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # mtime=0 keeps the gzipped copy byte-identical across builds of the same schema.
+    compressed = gzip.compress(content, 9, mtime=0)
+    for target, data in ((path, content), (compressed_path(path), compressed)):
+        partial = target.with_name(f".{target.name}.partial")
+        partial.write_bytes(data)
+        partial.replace(target)
+
+
+def etag_of(data):
+    return quote_etag(hashlib.sha256(data).hexdigest())
+
+
+@lru_cache(maxsize=1)
+def load_schema(path, modified):
+    """
+    The schema file and its gzipped copy, each with its own ETag, cached until the file changes.
+
+    Returns:
+        tuple: ((content, etag), (gzipped content, etag)).
+    """
+    content = Path(path).read_bytes()
+    compressed = compressed_path(path).read_bytes()
+    return (content, etag_of(content)), (compressed, etag_of(compressed))
+
+
+def accepts_gzip(accept_encoding):
+    """
+    Whether an Accept-Encoding header accepts gzip: listed, or covered by ``*``, with a
+    q-value above 0.
+    """
+    qualities = {}
+    for item in accept_encoding.split(","):
+        coding, *params = (part.strip() for part in item.split(";"))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            qualities[coding.lower()] = quality
+    quality = qualities.get("gzip", qualities.get("x-gzip", qualities.get("*", 0.0)))
+    return quality > 0
+
+
+def precomputed_schema_view(request):
+    """
+    Serve the schema generate_schema wrote to SCHEMA_FILE.
+
+    The gzipped copy is served to clients accepting gzip. The two are different
+    representations, so each has its own ETag, and a 304 Not Modified answers a client whose
+    If-None-Match matches the one it would get.
+    """
+    path = Path(settings.SCHEMA_FILE)
+    try:
+        identity, gzipped = load_schema(path, path.stat().st_mtime_ns)
+    except FileNotFoundError:
+        raise ImproperlyConfigured(
+            f"No precomputed schema at {path}: run `manage.py generate_schema` when building the "
+            "release."
+        )
+
+    compress = accepts_gzip(request.headers.get("Accept-Encoding", ""))
+    content, etag = gzipped if compress else identity
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content, content_type=CONTENT_TYPE)
+        if compress:
+            response["Content-Encoding"] = "gzip"
+    response["ETag"] = etag
+    patch_vary_headers(response, ("Accept-Encoding",))
+    patch_cache_control(response, public=True, max_age=settings.SCHEMA_CACHE_SECONDS)
+    return response
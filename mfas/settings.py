@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -37,6 +40,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    "mfas",
     "ums",
     "mutualfunds",
     'rest_framework',
@@ -45,6 +49,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'mfas.metrics.MetricsMiddleware',
+    'mfas.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -77,14 +83,125 @@ WSGI_APPLICATION = 'mfas.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
+#
+# The profile is picked with the MFAS_DB_PROFILE environment variable: "sqlite" (the
+# default) or "postgresql".
+
+DB_PROFILE = os.environ.get('MFAS_DB_PROFILE', 'sqlite')
+
+if DB_PROFILE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('MFAS_SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            # Keep connections open between requests, so the pragmas run once per connection.
+            # Under ASGI persistent connections leak per thread and event loop, so mfas.asgi
+            # defaults MFAS_DB_CONN_MAX_AGE to 0.
+            'CONN_MAX_AGE': int(os.environ.get('MFAS_DB_CONN_MAX_AGE', 600)),
+            'OPTIONS': {
+                # WAL lets readers carry on while a write is in progress, and synchronous=NORMAL
+                # is durable under WAL except for the last commits on power loss. Writers wait
+                # up to busy_timeout ms for the write lock instead of failing with "database is
+                # locked".
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA mmap_size=268435456;'
+                    'PRAGMA busy_timeout=5000;'
+                ),
+                # Take the write lock when a transaction starts, so two transactions that read
+                # and then write wait on busy_timeout instead of deadlocking on the upgrade.
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
+    }
+elif DB_PROFILE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('MFAS_DB_NAME', 'mfas'),
+            'USER': os.environ.get('MFAS_DB_USER', 'mfas'),
+            'PASSWORD': os.environ.get('MFAS_DB_PASSWORD', ''),
+            'HOST': os.environ.get('MFAS_DB_HOST', 'localhost'),
+            'PORT': os.environ.get('MFAS_DB_PORT', '5432'),
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+    if os.environ.get('MFAS_DB_POOL', '').lower() in ('1', 'true', 'yes'):
+        # psycopg's connection pool (needs psycopg[pool]); CONN_MAX_AGE must stay 0 with it.
+        DATABASES['default']['OPTIONS'] = {
+            'pool': {
+                'min_size': int(os.environ.get('MFAS_DB_POOL_MIN_SIZE', 2)),
+                'max_size': int(os.environ.get('MFAS_DB_POOL_MAX_SIZE', 10)),
+            },
+        }
+    else:
+        # 0 under ASGI, where mfas.asgi sets the default (see the SQLite profile).
+        DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('MFAS_DB_CONN_MAX_AGE', 600))
+else:
+    raise ImproperlyConfigured(
+        f"Unknown MFAS_DB_PROFILE {DB_PROFILE!r}, expected 'sqlite' or 'postgresql'."
+    )
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
 
-DATABASES = {
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Shared by every worker process on the host, so a write made through one of them
+    # invalidates the catalogue pages all of them serve. Use Redis or Memcached across hosts.
+    'catalogue': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('MFAS_CATALOGUE_CACHE_DIR', BASE_DIR / 'cache' / 'catalogue'),
+    },
 }
 
+# Cache holding the rendered mutual fund catalogue and its version. It must be shared by
+# the worker processes: a local-memory cache would let the others serve the old pages
+# until MUTUAL_FUNDS_CACHE_TIMEOUT after a write.
+MUTUAL_FUNDS_CACHE_ALIAS = 'catalogue'
+MUTUAL_FUNDS_CACHE_TIMEOUT = 300
+
+# Cache of users resolved from JWTs. The timeout bounds how long a change made without
+# saving the model (e.g. a QuerySet.update deactivating users) can go unseen.
+USER_CACHE_ALIAS = 'default'
+USER_CACHE_TIMEOUT = 60
+
+
+# Threads hashing passwords for the async login/register views (the CPU count when None).
+PASSWORD_HASHING_WORKERS = None
+
+
+# Buffer last_login updates in memory and write them in one batched UPDATE every
+# LAST_LOGIN_FLUSH_INTERVAL seconds. Set to False to save last_login during the login request.
+LAST_LOGIN_WRITE_BEHIND = True
+LAST_LOGIN_FLUSH_INTERVAL = 5
+
+
+# Per-request latency, SQL query and rendering figures per view (mfas.metrics), served in
+# the Prometheus format at /metrics. Each server process keeps its own figures. Requests
+# slower than METRICS_SLOW_REQUEST_SECONDS, or running one statement
+# METRICS_REPEATED_QUERY_THRESHOLD times or more (N+1), are also logged as warnings.
+# Scrapes must send MFAS_METRICS_TOKEN as a bearer token; it is required outside DEBUG, where
+# /metrics answers 403 until it is set.
+METRICS_ENABLED = True
+METRICS_SLOW_REQUEST_SECONDS = 1.0
+METRICS_REPEATED_QUERY_THRESHOLD = 10
+METRICS_TOKEN = os.environ.get('MFAS_METRICS_TOKEN')
+
+# On-demand profiling of single requests (mfas.profiling): a staff user sending the
+# X-Profile header gets their request profiled with cProfile (pstats), or with
+# "X-Profile: sample" by a stack sampler taking a sample every PROFILING_SAMPLE_INTERVAL
+# seconds (collapsed stacks, for flame graphs). The profiles are written to PROFILING_DIR.
+# PROFILING_ALL_REQUESTS profiles every request, whoever sends it: for local debugging only.
+PROFILING_ENABLED = True
+PROFILING_ALL_REQUESTS = False
+PROFILING_DIR = BASE_DIR / 'profiles'
+PROFILING_SAMPLE_INTERVAL = 0.001
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -134,10 +251,19 @@ REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+        'ums.authentication.CachedJWTAuthentication',
+    ),
+    # Encodes with orjson when it is installed, otherwise behaves like JSONRenderer.
+    'DEFAULT_RENDERER_CLASSES': (
+        'mfas.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
 
+# Serve the list endpoints straight from values() rows instead of running every row
+# through the DRF serializers. The JSON produced is the same; it is only faster.
+FAST_READ_PATH = False
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Mutual Funds",
     "DESCRIPTION": "Documentation of API endpoints of Mutual Funds ",
@@ -149,4 +275,11 @@ SPECTACULAR_SETTINGS = {
     },
     "SCHEMA_PATH_PREFIX": r"/api/",
     "COMPONENT_SPLIT_REQUEST": True,
-}
\ No newline at end of file
+}
+
+# Outside DEBUG, /api/schema/ serves the schema `manage.py generate_schema` rendered to
+# SCHEMA_FILE at build time (mfas.schema), gzipped and cacheable for SCHEMA_CACHE_SECONDS,
+# instead of introspecting every view on each request.
+SERVE_PRECOMPUTED_SCHEMA = not DEBUG
+SCHEMA_FILE = BASE_DIR / 'build' / 'openapi.json'
+SCHEMA_CACHE_SECONDS = 60 * 60 * 24
@@ -0,0 +1,61 @@
+"""
+Lean production settings: mfas.settings without what an API worker doesn't serve.
+
+Workers started with ``DJANGO_SETTINGS_MODULE=mfas.settings_lean`` skip importing and
+setting up the admin, the messages and static files apps, drf-spectacular and corsheaders,
+and reach their first request sooner. The API and its precomputed schema
+(``manage.py generate_schema``) are served the same; the admin and the Swagger UI are not.
+Run management commands and the development server with mfas.settings.
+
+``python -m benchmarks.import_time`` compares the two.
+"""
+import os
+
+from mfas.settings import *  # noqa: F401,F403
+from mfas.settings import INSTALLED_APPS, MIDDLEWARE, REST_FRAMEWORK, TEMPLATES
+
+DEBUG = False
+
+# Comma-separated host names the workers answer to.
+ALLOWED_HOSTS = os.environ.get('MFAS_ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',')
+
+# The precomputed schema stands in for drf-spectacular's live generation, whatever DEBUG says.
+SERVE_PRECOMPUTED_SCHEMA = True
+
+# corsheaders isn't in MIDDLEWARE, so it only ever contributed its system checks.
+LEAN_EXCLUDED_APPS = (
+    'django.contrib.admin',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'drf_spectacular',
+    'corsheaders',
+)
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in LEAN_EXCLUDED_APPS]
+
+MIDDLEWARE = [
+    middleware for middleware in MIDDLEWARE
+    if middleware != 'django.contrib.messages.middleware.MessageMiddleware'
+]
+
+TEMPLATES = [
+    {
+        **template,
+        'OPTIONS': {
+            **template['OPTIONS'],
+            'context_processors': [
+                processor for processor in template['OPTIONS']['context_processors']
+                if processor != 'django.contrib.messages.context_processors.messages'
+            ],
+        },
+    }
+    for template in TEMPLATES
+]
+
+# @extend_schema builds its schema class on the view's when the views are imported, which
+# with drf-spectacular's AutoSchema imports its whole generator. Nothing inspects the views
+# here, so DRF's AutoSchema, loaded by rest_framework.views anyway, stands in.
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_SCHEMA_CLASS': 'rest_framework.schemas.openapi.AutoSchema',
+}
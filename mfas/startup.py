@@ -0,0 +1,26 @@
+"""
+Worker start-up, shared by mfas.wsgi and mfas.asgi.
+"""
+import gc
+
+from django.urls import get_resolver
+
+
+def load_application(get_application):
+    """
+    Build the application and import the URLconf, and with it the views, with the garbage
+    collector paused.
+
+    Start-up creates hundreds of thousands of objects that live as long as the process, and
+    the collector would scan them again and again as they pile up. Once loaded they're frozen
+    out of its scans for good, which also spares forked workers from copying the memory
+    pages holding them. The views are imported here rather than by the first request.
+    """
+    gc.disable()
+    try:
+        application = get_application()
+        get_resolver().url_patterns
+    finally:
+        gc.freeze()
+        gc.enable()
+    return application
@@ -0,0 +1,50 @@
+"""
+Helpers shared by the apps' test suites.
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+EXPLAINED_STATEMENTS = ("SELECT", "UPDATE", "DELETE")
+
+
+def full_scans(sql):
+    """
+    Return the tables (or aliases) SQLite reads with a full table scan to run the query.
+
+    Scans of an index ("SCAN t USING [COVERING] INDEX i") are not full table scans.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        details = [row[-1] for row in cursor.fetchall()]
+    return {
+        detail.split()[1] for detail in details
+        if detail.startswith("SCAN ") and " USING " not in detail and detail != "SCAN CONSTANT ROW"
+    }
+
+
+class QueryPlanTestMixin:
+    """
+    TestCase mixin asserting that the queries a request runs are served by indexes.
+
+    The check reads SQLite's EXPLAIN QUERY PLAN, so use it on test cases skipped on other
+    database vendors.
+    """
+
+    def assertIndexedQueries(self, request, allowed_scans=()):
+        """
+        Run ``request()`` and fail if one of its queries fully scans a table not in
+        ``allowed_scans``.
+
+        Returns:
+            The return value of ``request()``, usually the response.
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = request()
+
+        for query in context.captured_queries:
+            sql = query["sql"]
+            if not sql.lstrip().upper().startswith(EXPLAINED_STATEMENTS):
+                continue
+            scans = full_scans(sql) - set(allowed_scans)
+            self.assertFalse(scans, f"Full scan of {', '.join(sorted(scans))} in: {sql}")
+        return response
@@ -14,14 +14,38 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
+from django.apps import apps
+from django.conf import settings
 from django.urls import include, path
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+
+from mfas.metrics import metrics_view
 
 urlpatterns = [
-    path("admin/", admin.site.urls),
-    path("", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger-ui"),
-    path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     path("api/ums/", include("ums.api.v1.urls", namespace="ums")),
     path("api/mf/", include("mutualfunds.api.v1.urls", namespace="mutual_funds")),
 ]
+
+# drf-spectacular's views build the schema generator, so they're only imported when served.
+if settings.SERVE_PRECOMPUTED_SCHEMA:
+    from mfas.schema import precomputed_schema_view
+
+    urlpatterns.append(path("api/schema/", precomputed_schema_view, name="schema"))
+else:
+    from drf_spectacular.views import SpectacularAPIView
+
+    urlpatterns.append(path("api/schema/", SpectacularAPIView.as_view(), name="schema"))
+
+if apps.is_installed("drf_spectacular"):
+    from drf_spectacular.views import SpectacularSwaggerView
+
+    urlpatterns.append(
+        path("", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger-ui")
+    )
+
+if apps.is_installed("django.contrib.admin"):
+    from django.contrib import admin
+
+    urlpatterns.append(path("admin/", admin.site.urls))
+
+if settings.METRICS_ENABLED:
+    urlpatterns.append(path("metrics", metrics_view, name="metrics"))
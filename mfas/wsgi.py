@@ -11,6 +11,8 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
+from mfas.startup import load_application
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mfas.settings')
 
-application = get_wsgi_application()
+application = load_application(get_wsgi_application)
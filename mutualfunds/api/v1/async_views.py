@@ -0,0 +1,113 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework import status
+from rest_framework.utils.urls import replace_query_param
+
+from mfas.async_views import AsyncAPIView
+from mutualfunds.api.v1.pagination import KeysetPagination
+from mutualfunds.api.v1.serializers import MutualFundsFilterSerializer
+from mutualfunds.api.v1.views import MutualFundsApiView
+from mutualfunds.cache import (
+    aget_catalogue_version,
+    cached_page_response,
+    catalogue_page_key,
+    get_catalogue_cache,
+    make_cached_page,
+)
+from mutualfunds.models import MutualFunds
+
+
+class AsyncMutualFundsApiView(AsyncAPIView):
+    """
+    Async variant of MutualFundsApiView for ASGI deployments.
+
+    Pages are read with Django's async ORM and cached under the same catalogue version as
+    the sync view's, so a fund write invalidates both. Listing is public; creating funds
+    needs a user, and goes through the sync view's serializers, run through sync_to_async.
+    """
+    serializer_class = MutualFundsApiView.serializer_class  # Serializer to handle mutual fund data.
+    filter_serializer_class = MutualFundsFilterSerializer  # Serializer to validate list filters.
+    pagination_class = KeysetPagination  # Keyset pagination on the fund id.
+    bulk_max_items = MutualFundsApiView.bulk_max_items  # Largest JSON array a POST accepts.
+    get_write_serializer = MutualFundsApiView.get_write_serializer  # One fund, or a list of them.
+    read_fields = MutualFundsApiView.fast_read_fields  # Columns of a page.
+
+    def requires_authentication(self, request):
+        return request.method != "GET"
+
+    async def get(self, request, *args, **kwargs):
+        """
+        Handle GET requests to fetch a page of mutual funds.
+
+        Args:
+            request: The HTTP request to fetch mutual fund data.
+            *args: Additional positional arguments.
+            **kwargs: Additional keyword arguments.
+
+        Returns:
+            HttpResponse: The rendered page of mutual funds, or a 304 Not Modified response.
+        """
+
+        version = await aget_catalogue_version()
+        cache = get_catalogue_cache()
+        key = catalogue_page_key(version, request.build_absolute_uri())
+        page = await cache.aget(key)
+        if page is None:
+            page = make_cached_page(self.renderer.render(await self.get_page(request)))
+            await cache.aset(key, page, settings.MUTUAL_FUNDS_CACHE_TIMEOUT)
+        return cached_page_response(request, page, version)
+
+    async def get_page(self, request) -> dict:
+        """
+        Build one page of mutual funds with the async ORM.
+
+        Args:
+            request: The HTTP request carrying the filters and the pagination cursor.
+
+        Returns:
+            dict: A success message, the link to the next page and the page of mutual funds.
+        """
+
+        filters = self.filter_serializer_class(data=request.GET)
+        filters.is_valid(raise_exception=True)
+        queries = filters.filter_queryset(MutualFunds.objects.all()).values(*self.read_fields)
+
+        paginator = self.pagination_class()
+        page_size = paginator.get_page_size(request.GET)
+        queries = paginator.slice_queryset(queries, paginator.get_after(request.GET), page_size)
+        rows, next_after = paginator.split_page([row async for row in queries], page_size)
+
+        next_link = None
+        if next_after is not None:
+            next_link = replace_query_param(
+                request.build_absolute_uri(), paginator.after_query_param, next_after
+            )
+        return {
+            "message": "Mutual Funds fetched successfully",
+            "next": next_link,
+            "data": rows
+        }
+
+    async def post(self, request, *args, **kwargs):
+        """
+        Handle POST requests to create a new mutual fund, or many at once from a JSON array.
+
+        Args:
+            request: The HTTP request containing mutual fund data.
+            *args: Additional positional arguments.
+            **kwargs: Additional keyword arguments.
+
+        Returns:
+            HttpResponse: A JSON response containing a success message and the created mutual
+            fund data.
+        """
+
+        serializer = self.get_write_serializer(self.parse_body(request))
+        # Validating a mutual fund doesn't touch the database; saving runs in a transaction and
+        # invalidates the cached catalogue, as in the sync view.
+        serializer.is_valid(raise_exception=True)
+        await sync_to_async(serializer.save)()
+        return self.respond({
+            "message": "Mutual Funds Created Successfully",
+            "data": serializer.data
+        }, status=status.HTTP_201_CREATED)
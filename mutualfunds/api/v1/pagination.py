@@ -0,0 +1,96 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination on the primary key.
+
+    Instead of an OFFSET, each page is fetched with ``id > <after>`` ordered by ``id``,
+    so the cost of a page stays the same however deep into the table the client is.
+    The ``next`` link carries the last id of the current page as the new ``after``.
+    """
+    after_query_param = "after"
+    page_size_query_param = "page_size"
+    page_size = 100
+    max_page_size = 1000
+    ordering = "id"
+
+    def get_after(self, query_params):
+        """
+        Read the ``after`` cursor from the query params.
+
+        Returns:
+            int | None: The last id seen by the client, or None for the first page.
+        """
+        after = query_params.get(self.after_query_param)
+        if after in (None, ""):
+            return None
+        try:
+            return int(after)
+        except ValueError:
+            raise ValidationError({self.after_query_param: "A valid integer is required."})
+
+    def get_page_size(self, query_params):
+        """
+        Read the requested page size, clamped to ``max_page_size``.
+
+        Returns:
+            int: The number of rows to return on this page.
+        """
+        page_size = query_params.get(self.page_size_query_param)
+        if page_size in (None, ""):
+            return self.page_size
+        try:
+            page_size = int(page_size)
+        except ValueError:
+            raise ValidationError({self.page_size_query_param: "A valid integer is required."})
+        if page_size < 1:
+            raise ValidationError({self.page_size_query_param: "Must be greater than zero."})
+        return min(page_size, self.max_page_size)
+
+    def slice_queryset(self, queryset, after, page_size):
+        """
+        Apply the keyset condition and fetch one extra row to detect a next page.
+
+        Returns:
+            QuerySet: The sliced queryset, not yet evaluated.
+        """
+        if after is not None:
+            queryset = queryset.filter(**{f"{self.ordering}__gt": after})
+        return queryset.order_by(self.ordering)[:page_size + 1]
+
+    def split_page(self, rows, page_size):
+        """
+        Split the over-fetched rows into the page and the ``after`` value for the next one.
+
+        Returns:
+            tuple: (rows of this page, last id if a next page exists else None)
+        """
+        rows = list(rows)
+        if len(rows) <= page_size:
+            return rows, None
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_after = last[self.ordering] if isinstance(last, dict) else getattr(last, self.ordering)
+        return rows, next_after
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Return a single page of results and remember the link to the next one.
+        """
+        page_size = self.get_page_size(request.query_params)
+        after = self.get_after(request.query_params)
+        rows, next_after = self.split_page(
+            self.slice_queryset(queryset, after, page_size), page_size
+        )
+        self.next_link = None
+        if next_after is not None:
+            self.next_link = replace_query_param(
+                request.build_absolute_uri(), self.after_query_param, next_after
+            )
+        return rows
+
+    def get_next_link(self):
+        return self.next_link
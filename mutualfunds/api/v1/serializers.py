@@ -1,6 +1,27 @@
+from django.db import transaction
 from rest_framework import serializers
 
+from mutualfunds.cache import bump_catalogue_version
+from mutualfunds.enums import MutualFundsChoice
 from mutualfunds.models import MutualFunds
+from mutualfunds.search import query_words
+
+
+class MutualFundsListSerializer(serializers.ListSerializer):
+
+    batch_size = 1000  # Rows per INSERT statement
+
+    def create(self, validated_data):
+        """
+        Insert all the mutual funds in batched INSERTs inside one transaction
+        """
+        with transaction.atomic():
+            funds = MutualFunds.objects.bulk_create(
+                [MutualFunds(**item) for item in validated_data], batch_size=self.batch_size
+            )
+            # bulk_create sends no post_save, so invalidate the cached catalogue here.
+            transaction.on_commit(bump_catalogue_version)
+        return funds
 
 
 class MutualFundsSerializer(serializers.ModelSerializer):
@@ -9,4 +30,65 @@ class MutualFundsSerializer(serializers.ModelSerializer):
         model = MutualFunds
         fields = [
             "id","name","nav","fund_type"
-        ]
\ No newline at end of file
+        ]
+        list_serializer_class = MutualFundsListSerializer
+
+
+class MutualFundsFilterSerializer(serializers.Serializer):
+
+    fund_type = serializers.ChoiceField(choices=MutualFundsChoice.choices, required=False)
+    nav_min = serializers.FloatField(required=False)
+    nav_max = serializers.FloatField(required=False)
+
+    def validate(self, attrs):
+        """
+        Ensure the NAV range is not inverted
+        """
+        nav_min = attrs.get("nav_min")
+        nav_max = attrs.get("nav_max")
+        if nav_min is not None and nav_max is not None and nav_min > nav_max:
+            raise serializers.ValidationError("nav_min can't be greater than nav_max.")
+        return attrs
+
+    def filter_queryset(self, queryset):
+        """
+        Apply the validated filters to the given queryset
+        """
+        filters = self.validated_data
+        if "fund_type" in filters:
+            queryset = queryset.filter(fund_type=filters["fund_type"])
+        if "nav_min" in filters:
+            queryset = queryset.filter(nav__gte=filters["nav_min"])
+        if "nav_max" in filters:
+            queryset = queryset.filter(nav__lte=filters["nav_max"])
+        return queryset
+
+
+class MutualFundsSearchSerializer(serializers.Serializer):
+
+    q = serializers.CharField(max_length=100)  # Words, or the starts of words, of the fund's name
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)  # Most funds returned
+
+    def validate_q(self, value):
+        """
+        Ensure the query has a word to search for
+        """
+        if not query_words(value):
+            raise serializers.ValidationError("Enter a word of the fund's name.")
+        return value
+
+
+class MutualFundsTotalsSerializer(serializers.ModelSerializer):
+
+    aum = serializers.FloatField()  # Assets under management: total_units x nav
+
+    class Meta:
+        model = MutualFunds
+        fields = [
+            "id","name","nav","fund_type","total_units","investor_count","aum"
+        ]
+
+
+class MutualFundsTopQuerySerializer(serializers.Serializer):
+
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)  # Funds returned
@@ -1,10 +1,18 @@
 from django.urls import path
 
-from mutualfunds.api.v1.views import MutualFundsApiView
+from mutualfunds.api.v1.async_views import AsyncMutualFundsApiView
+from mutualfunds.api.v1.views import (
+    MutualFundsApiView,
+    MutualFundsSearchApiView,
+    MutualFundsTopApiView,
+)
 
 app_name = "mutual_funds"
 
 
 urlpatterns = [
-    path("mutual-funds/",MutualFundsApiView.as_view(),name="mutual-funds")
+    path("mutual-funds/",MutualFundsApiView.as_view(),name="mutual-funds"),
+    path("mutual-funds/async/",AsyncMutualFundsApiView.as_view(),name="mutual-funds-async"),
+    path("mutual-funds/search/",MutualFundsSearchApiView.as_view(),name="mutual-funds-search"),
+    path("mutual-funds/top/",MutualFundsTopApiView.as_view(),name="mutual-funds-top"),
 ]
@@ -1,12 +1,33 @@
-from drf_spectacular.utils import extend_schema
+from django.conf import settings
+from django.db.models import F
+from django.http import HttpResponse
+from drf_spectacular.utils import OpenApiParameter, extend_schema
 
 from rest_framework import status
 
+from rest_framework.permissions import IsAdminUser
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from mutualfunds.api.v1.serializers import MutualFundsSerializer
+from mutualfunds.api.v1.pagination import KeysetPagination
+from mutualfunds.api.v1.serializers import (
+    MutualFundsFilterSerializer,
+    MutualFundsSearchSerializer,
+    MutualFundsSerializer,
+    MutualFundsTopQuerySerializer,
+    MutualFundsTotalsSerializer,
+)
+from mutualfunds.cache import (
+    cached_page_response,
+    catalogue_page_key,
+    get_catalogue_cache,
+    get_catalogue_version,
+    make_cached_page,
+)
+from mutualfunds.enums import MutualFundsChoice
 from mutualfunds.models import MutualFunds
+from mutualfunds.search import search_funds
 
 
 @extend_schema(
@@ -16,6 +37,14 @@ from mutualfunds.models import MutualFunds
     This API endpoint allows users to manage mutual funds. 
     Users can fetch a list of all mutual funds (GET) or create new mutual fund records (POST).
     The mutual fund data includes important details like the fund's name, NAV (Net Asset Value), and other relevant financial data.
+    POST also accepts a JSON array of mutual funds, created all-or-nothing in one transaction;
+    errors are reported per item.
+    The list is paginated on the fund id: follow the `next` link (which carries `after`) to fetch
+    the following page.
+    It can be filtered by `fund_type` and by a NAV range with `nav_min` / `nav_max`.
+    Pages carry an `ETag` header; send it back in `If-None-Match` to get a 304 Not Modified while
+    the catalogue hasn't changed. `Last-Modified` is informational only: `If-Modified-Since` is
+    not honoured.
     """,
     request=MutualFundsSerializer,  # Serializer used to handle mutual fund data in the request body for POST requests.
     responses={
@@ -35,18 +64,26 @@ class MutualFundsApiView(APIView):
     """
     API View to handle Mutual Funds operations.
 
-    This view allows fetching all mutual funds (GET) and creating new mutual funds (POST).
+    This view allows fetching mutual funds page by page (GET) and creating new mutual funds (POST).
     """
     serializer_class = MutualFundsSerializer  # Serializer to handle mutual fund data.
+    filter_serializer_class = MutualFundsFilterSerializer  # Serializer to validate list filters.
+    pagination_class = KeysetPagination  # Keyset pagination on the fund id.
+    bulk_max_items = 50000  # Largest JSON array accepted by a single POST.
+    fast_read_fields = [  # Columns read by the FAST_READ_PATH, matching serializer_class.
+        "id", "name", "nav", "fund_type",
+    ]
 
     def get_queryset(self):
         """
-        Retrieve all mutual funds from the database.
+        Retrieve the mutual funds matching the request's filters.
 
         Returns:
-            QuerySet: A QuerySet containing all mutual funds.
+            QuerySet: A QuerySet containing the filtered mutual funds.
         """
-        return MutualFunds.objects.all()
+        filters = self.filter_serializer_class(data=self.request.query_params)
+        filters.is_valid(raise_exception=True)
+        return filters.filter_queryset(MutualFunds.objects.all())
 
     def get_permissions(self):
         """
@@ -62,9 +99,23 @@ class MutualFundsApiView(APIView):
             self.permission_classes = []
         return super().get_permissions()
 
+    def get_write_serializer(self, data):
+        """
+        Build the serializer for a POST body holding one mutual fund or a list of them.
+
+        Returns:
+            Serializer: A serializer for a single fund, or a list serializer validating every
+            fund in one pass and inserting them with batched INSERTs.
+        """
+        if isinstance(data, list):
+            return self.serializer_class(
+                data=data, many=True, allow_empty=False, max_length=self.bulk_max_items
+            )
+        return self.serializer_class(data=data)
+
     def post(self, request, *args, **kwargs) -> Response:
         """
-        Handle POST requests to create a new mutual fund.
+        Handle POST requests to create a new mutual fund, or many at once from a JSON array.
 
         Args:
             request: The HTTP request containing mutual fund data.
@@ -72,10 +123,11 @@ class MutualFundsApiView(APIView):
             **kwargs: Additional keyword arguments.
 
         Returns:
-            Response: A Response object containing a success message and the created mutual fund data.
+            Response: A Response object containing a success message and the created mutual fund
+            data (a list when a list was posted).
         """
 
-        serializer = self.serializer_class(data=request.data)
+        serializer = self.get_write_serializer(request.data)
         
 
         serializer.is_valid(raise_exception=True)
@@ -89,9 +141,23 @@ class MutualFundsApiView(APIView):
             "data": serializer.data
         }, status=status.HTTP_201_CREATED)
 
-    def get(self, request, *args, **kwargs) -> Response:
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "after", int, description="Return funds with an id greater than this value."
+            ),
+            OpenApiParameter("page_size", int, description="Number of funds per page (max 1000)."),
+            OpenApiParameter("fund_type", str, enum=MutualFundsChoice.values),
+            OpenApiParameter("nav_min", float, description="Minimum NAV (inclusive)."),
+            OpenApiParameter("nav_max", float, description="Maximum NAV (inclusive)."),
+        ]
+    )
+    def get(self, request, *args, **kwargs) -> HttpResponse:
         """
-        Handle GET requests to fetch all mutual funds.
+        Handle GET requests to fetch a page of mutual funds.
+
+        JSON pages are served from the versioned catalogue cache with a strong ETag and a
+        Last-Modified date, and a request whose If-None-Match names an unchanged page gets a 304.
 
         Args:
             request: The HTTP request to fetch mutual fund data.
@@ -99,16 +165,203 @@ class MutualFundsApiView(APIView):
             **kwargs: Additional keyword arguments.
 
         Returns:
-            Response: A Response object containing a success message and the list of mutual funds.
+            HttpResponse: The rendered page of mutual funds, or a 304 Not Modified response.
+        """
+
+        if not isinstance(request.accepted_renderer, JSONRenderer):
+            return Response(self.get_page(request), status=status.HTTP_200_OK)
+        
+
+        version = get_catalogue_version()
+        cache = get_catalogue_cache()
+        key = catalogue_page_key(version, request.build_absolute_uri())
+        page = cache.get(key)
+        if page is None:
+            page = make_cached_page(request.accepted_renderer.render(self.get_page(request)))
+            cache.set(key, page, settings.MUTUAL_FUNDS_CACHE_TIMEOUT)
+        
+
+        return cached_page_response(request, page, version)
+
+    def get_page(self, request) -> dict:
+        """
+        Build one page of mutual funds.
+
+        Args:
+            request: The HTTP request carrying the filters and the pagination cursor.
+
+        Returns:
+            dict: A success message, the link to the next page and the page of mutual funds.
         """
 
         queries = self.get_queryset()
         
 
-        serializer = self.serializer_class(queries, many=True)
+        if settings.FAST_READ_PATH:
+            queries = queries.values(*self.fast_read_fields)
         
 
-        return Response({
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(queries, request, view=self)
+        
+
+        data = page if settings.FAST_READ_PATH else self.serializer_class(page, many=True).data
+        
+
+        return {
             "message": "Mutual Funds fetched successfully",
-            "data": serializer.data
+            "next": paginator.get_next_link(),
+            "data": data
+        }
+
+
+@extend_schema(
+    operation_id="Mutual Funds Search API",
+    summary="MFAS-MF-02",
+    description="""
+    This API endpoint searches mutual funds by name, for autocomplete.
+    Every word of `q` matches the start of a word of the fund's name (`blue ch` finds "Aurora
+    Bluechip Fund"), and misspelled words are matched to the closest words of the catalogue.
+    The best `limit` matches are returned, best first: the names with the words as whole words,
+    nearest the start, and the shortest.
+    """,
+    parameters=[
+        OpenApiParameter(
+            "q", str, required=True,
+            description="Words, or the starts of words, of the fund's name.",
+        ),
+        OpenApiParameter(
+            "limit", int, description="Number of funds returned (default 10, max 50)."
+        ),
+    ],
+    responses={
+        200: MutualFundsSerializer(many=True),
+        400: {
+            "description": "Bad Request: Missing or invalid query."
+        },
+    }
+)
+class MutualFundsSearchApiView(APIView):
+    """
+    API View to search mutual funds by name.
+    """
+    permission_classes: list = []  # The catalogue is public, like the list of mutual funds.
+    serializer_class = MutualFundsSerializer  # Serializer to handle mutual fund data.
+    query_serializer_class = MutualFundsSearchSerializer  # Serializer to validate the query.
+
+    def get(self, request, *args, **kwargs) -> Response:
+        """
+        Handle GET requests to search mutual funds by name.
+
+        Args:
+            request: The HTTP request carrying the query.
+            *args: Additional positional arguments.
+            **kwargs: Additional keyword arguments.
+
+        Returns:
+            Response: A Response object containing a success message and the funds found, best
+            first.
+        """
+
+        params = self.query_serializer_class(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        
+
+        funds = search_funds(params.validated_data["q"], params.validated_data["limit"])
+        if not settings.FAST_READ_PATH:
+            funds = self.serializer_class(funds, many=True).data
+        
+
+        return Response({
+            "message": "Mutual Funds searched successfully",
+            "data": funds
+        }, status=status.HTTP_200_OK)
+
+
+@extend_schema(
+    operation_id="Mutual Funds By AUM API",
+    summary="MFAS-MF-03",
+    description="""
+    This API endpoint lists the mutual funds with the most assets under management, for the
+    operations dashboards.
+    Every fund comes with the units its investors hold in total, the number of investors holding it,
+    and its AUM: the total units at the fund's current NAV.
+    The totals are kept on the funds as investments are made, so the endpoint reads only the
+    `limit` funds returned.
+    Only staff users can access it.
+    """,
+    parameters=[
+        OpenApiParameter(
+            "limit", int, description="Number of funds returned (default 10, max 100)."
+        ),
+    ],
+    responses={
+        200: MutualFundsTotalsSerializer(many=True),
+        400: {
+            "description": "Bad Request: Invalid limit."
+        },
+        401: {
+            "description": "Unauthorized: User not authenticated."
+        },
+        403: {
+            "description": "Forbidden: User is not staff."
+        },
+    }
+)
+class MutualFundsTopApiView(APIView):
+    """
+    API View to list the mutual funds with the most assets under management.
+    """
+    permission_classes = [IsAdminUser]  # Holdings across all users are for staff only.
+    serializer_class = MutualFundsTotalsSerializer  # Serializer for the funds and their totals.
+    query_serializer_class = MutualFundsTopQuerySerializer  # Serializer to validate the limit.
+    fast_read_fields = [  # Columns read by the FAST_READ_PATH, matching serializer_class.
+        "id", "name", "nav", "fund_type", "total_units", "investor_count", "aum",
+    ]
+
+    def get_queryset(self):
+        """
+        Retrieve the mutual funds by assets under management, largest first.
+
+        Returns:
+            QuerySet: A QuerySet of the mutual funds annotated with their ``aum``, in the order
+            of the mf_aum_idx index, so a slice of it reads only the funds returned.
+        """
+        return MutualFunds.objects.annotate(aum=F("total_units") * F("nav")).order_by(
+            F("aum").desc(), "id"
+        )
+
+    def get(self, request, *args, **kwargs) -> Response:
+        """
+        Handle GET requests to list the mutual funds with the most assets under management.
+
+        Args:
+            request: The HTTP request carrying the limit.
+            *args: Additional positional arguments.
+            **kwargs: Additional keyword arguments.
+
+        Returns:
+            Response: A Response object containing a success message and the funds, largest AUM
+            first.
+        """
+
+        params = self.query_serializer_class(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        
+
+        queries = self.get_queryset()
+        if settings.FAST_READ_PATH:
+            queries = queries.values(*self.fast_read_fields)
+        funds = queries[:params.validated_data["limit"]]
+        
+
+        if settings.FAST_READ_PATH:
+            data = list(funds)
+        else:
+            data = self.serializer_class(funds, many=True).data
+        
+
+        return Response({
+            "message": "Mutual Funds by AUM fetched successfully",
+            "data": data
         }, status=status.HTTP_200_OK)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MutualfundsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'mutualfunds'
+
+    def ready(self):
+        import mutualfunds.signals  # noqa: F401
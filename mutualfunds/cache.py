@@ -0,0 +1,95 @@
+"""
+Versioned cache of the rendered mutual fund catalogue.
+
+Every write to the catalogue moves the version forward. Cached pages are keyed by the
+version, so a write never has to find and delete pages: the old ones are simply not read
+again and expire on their own. The version is the time of the last write in nanoseconds,
+which doubles as the catalogue's Last-Modified date.
+
+Last-Modified has a resolution of one second, so a write made in the second a page was
+fetched would leave an If-Modified-Since for that page matching. Conditional requests are
+therefore answered from the ETag alone; Last-Modified is informational.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+VERSION_KEY = "mutualfunds:catalogue:version"
+
+
+def get_catalogue_cache():
+    """
+    Return the cache backend configured by ``MUTUAL_FUNDS_CACHE_ALIAS``.
+    """
+    return caches[settings.MUTUAL_FUNDS_CACHE_ALIAS]
+
+
+def get_catalogue_version():
+    """
+    Return the current catalogue version, starting one if the cache has none yet.
+    """
+    cache = get_catalogue_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # add() keeps whichever worker got there first, so all of them agree on the version.
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+async def aget_catalogue_version():
+    """
+    Async variant of get_catalogue_version.
+    """
+    cache = get_catalogue_cache()
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, time.time_ns(), timeout=None)
+        version = await cache.aget(VERSION_KEY)
+    return version
+
+
+def bump_catalogue_version():
+    """
+    Move the catalogue to a new version, invalidating every cached page.
+
+    Call it once the write is committed (see ``transaction.on_commit``), otherwise a
+    concurrent read could cache the old rows under the new version.
+    """
+    get_catalogue_cache().set(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def catalogue_page_key(version, url):
+    """
+    Build the cache key of one rendered page, identified by its absolute URL.
+
+    The URL includes the host because the page's ``next`` link is absolute.
+    """
+    digest = hashlib.sha256(url.encode()).hexdigest()
+    return f"mutualfunds:catalogue:{version}:{digest}"
+
+
+def make_cached_page(content):
+    """
+    Wrap a rendered page with its strong ETag, ready to be cached.
+    """
+    return {"content": content, "etag": quote_etag(hashlib.sha256(content).hexdigest())}
+
+
+def cached_page_response(request, page, version):
+    """
+    Answer a request from a cached page: 304 Not Modified when the client's If-None-Match
+    still matches, the page otherwise, with ETag and Last-Modified set. If-Modified-Since
+    isn't honoured (see the module's docstring).
+    """
+    response = get_conditional_response(request, etag=page["etag"])
+    if response is None:
+        response = HttpResponse(page["content"], content_type="application/json")
+    response["ETag"] = page["etag"]
+    response["Last-Modified"] = http_date(version // 1_000_000_000)
+    return response
@@ -0,0 +1,126 @@
+import csv
+import sys
+import time
+from datetime import date
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+
+from mutualfunds.cache import bump_catalogue_version
+from mutualfunds.models import MutualFunds, NavHistory
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream a daily NAV file (CSV with a fund_id,date,nav header) into NavHistory "
+        "and refresh the current MutualFunds.nav in bulk."
+    )
+
+    required_columns = {"fund_id", "date", "nav"}
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path of the NAV file, or - to read from stdin.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of rows written per bulk upsert (default: 5000).",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be greater than zero.")
+
+        path = options["path"]
+        stream = sys.stdin if path == "-" else open(path, newline="")
+        try:
+            reader = csv.DictReader(stream)
+            missing = self.required_columns - set(reader.fieldnames or [])
+            if missing:
+                raise CommandError(f"NAV file is missing column(s): {', '.join(sorted(missing))}")
+
+            started = time.perf_counter()
+            written = skipped = 0
+            # One transaction for the whole file: a bad line rolls the day back instead of
+            # leaving half of the catalogue on yesterday's NAV.
+            with transaction.atomic():
+                for batch in self.read_batches(reader, batch_size):
+                    batch_written, batch_skipped = self.ingest_batch(batch)
+                    written += batch_written
+                    skipped += batch_skipped
+                # bulk_update sends no signals, so invalidate the cached catalogue here.
+                transaction.on_commit(bump_catalogue_version)
+            elapsed = time.perf_counter() - started
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        rate = written / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Ingested {written} NAV rows ({skipped} skipped for unknown funds) "
+            f"in {elapsed:.2f}s: {rate:.0f} rows/sec"
+        ))
+
+    def read_batches(self, reader, batch_size):
+        """
+        Parse the file lazily and yield lists of (fund_id, date, nav) of at most batch_size.
+        """
+        rows = (self.parse_row(reader, row) for row in reader)
+        while batch := list(islice(rows, batch_size)):
+            yield batch
+
+    def parse_row(self, reader, row):
+        """
+        Convert one CSV row, reporting the offending line on bad input.
+        """
+        try:
+            return int(row["fund_id"]), date.fromisoformat(row["date"]), float(row["nav"])
+        except (TypeError, ValueError) as exc:
+            raise CommandError(f"Line {reader.line_num}: invalid NAV row {row!r} ({exc})")
+
+    def ingest_batch(self, batch):
+        """
+        Upsert one batch into NavHistory and move MutualFunds.nav forward where the batch
+        holds the fund's most recent NAV.
+
+        Returns:
+            tuple: (rows written, rows skipped because the fund doesn't exist)
+        """
+        fund_ids = {fund_id for fund_id, _, _ in batch}
+        known = set(MutualFunds.objects.filter(id__in=fund_ids).values_list("id", flat=True))
+
+        # The last row wins for a repeated (fund, date) so one statement never touches a
+        # row twice, which PostgreSQL rejects for ON CONFLICT DO UPDATE.
+        navs = {(fund_id, day): nav for fund_id, day, nav in batch if fund_id in known}
+        NavHistory.objects.bulk_create(
+            [
+                NavHistory(fund_id=fund_id, date=day, nav=nav)
+                for (fund_id, day), nav in navs.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["fund", "date"],
+            update_fields=["nav"],
+        )
+
+        newest = {}
+        for (fund_id, day), nav in navs.items():
+            if fund_id not in newest or day >= newest[fund_id][0]:
+                newest[fund_id] = (day, nav)
+        latest = dict(
+            NavHistory.objects.filter(fund_id__in=newest)
+            .values("fund_id")
+            .annotate(latest=Max("date"))
+            .values_list("fund_id", "latest")
+        )
+        MutualFunds.objects.bulk_update(
+            [
+                MutualFunds(id=fund_id, nav=nav)
+                for fund_id, (day, nav) in newest.items()
+                if day >= latest[fund_id]
+            ],
+            ["nav"],
+        )
+        return len(navs), len(batch) - sum(1 for fund_id, _, _ in batch if fund_id in known)
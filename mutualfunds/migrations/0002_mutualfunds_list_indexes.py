@@ -0,0 +1,21 @@
+# Generated by Django 5.1.5 on 2026-10-18 03:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mutualfunds', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mutualfunds',
+            index=models.Index(fields=['fund_type', 'id'], name='mf_fund_type_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mutualfunds',
+            index=models.Index(fields=['nav'], name='mf_nav_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.5 on 2026-10-18 03:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mutualfunds', '0002_mutualfunds_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NavHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('nav', models.FloatField()),
+                ('fund', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nav_history', to='mutualfunds.mutualfunds')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('fund', 'date'), name='unique_fund_nav_date')],
+            },
+        ),
+    ]
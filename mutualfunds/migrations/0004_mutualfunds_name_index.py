@@ -0,0 +1,17 @@
+# Generated by Django 5.1.5 on 2026-10-18 03:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mutualfunds', '0003_navhistory'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mutualfunds',
+            index=models.Index(fields=['name'], name='mf_name_idx'),
+        ),
+    ]
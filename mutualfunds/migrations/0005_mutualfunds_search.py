@@ -0,0 +1,68 @@
+from django.db import migrations
+
+# The full-text index of fund names (mutualfunds.search). On SQLite, an FTS5 table over the
+# names, kept in step with the table by triggers so that bulk_create, QuerySet.update and
+# raw SQL writes are indexed too, with a vocabulary table over its terms for typo
+# correction. On PostgreSQL, a trigram index on the names, which needs no upkeep.
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE mutualfunds_search USING fts5(
+        name,
+        content='mutualfunds_mutualfunds',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    "CREATE VIRTUAL TABLE mutualfunds_search_vocab USING fts5vocab(mutualfunds_search, 'row')",
+    """
+    CREATE TRIGGER mutualfunds_search_insert AFTER INSERT ON mutualfunds_mutualfunds BEGIN
+        INSERT INTO mutualfunds_search (rowid, name) VALUES (new.id, new.name);
+    END
+    """,
+    """
+    CREATE TRIGGER mutualfunds_search_delete AFTER DELETE ON mutualfunds_mutualfunds BEGIN
+        INSERT INTO mutualfunds_search (mutualfunds_search, rowid, name) VALUES ('delete', old.id, old.name);
+    END
+    """,
+    """
+    CREATE TRIGGER mutualfunds_search_update AFTER UPDATE OF name ON mutualfunds_mutualfunds BEGIN
+        INSERT INTO mutualfunds_search (mutualfunds_search, rowid, name) VALUES ('delete', old.id, old.name);
+        INSERT INTO mutualfunds_search (rowid, name) VALUES (new.id, new.name);
+    END
+    """,
+    "INSERT INTO mutualfunds_search (mutualfunds_search) VALUES ('rebuild')",
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER mutualfunds_search_update",
+    "DROP TRIGGER mutualfunds_search_delete",
+    "DROP TRIGGER mutualfunds_search_insert",
+    "DROP TABLE mutualfunds_search_vocab",
+    "DROP TABLE mutualfunds_search",
+]
+POSTGRESQL_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX mf_name_trgm_idx ON mutualfunds_mutualfunds USING gin (name gin_trgm_ops)",
+]
+POSTGRESQL_BACKWARD = ["DROP INDEX mf_name_trgm_idx"]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mutualfunds', '0004_mutualfunds_name_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRESQL_FORWARD}),
+            run({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRESQL_BACKWARD}),
+        ),
+    ]
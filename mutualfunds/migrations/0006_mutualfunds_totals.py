@@ -0,0 +1,58 @@
+# Generated by Django 5.1.5 on 2026-10-18 04:11
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+# Adding (or removing) a column with a default makes Django rebuild the table on SQLite,
+# which drops its triggers: recreate the ones keeping the name search index (0005) in step.
+SQLITE_SEARCH_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS mutualfunds_search_insert AFTER INSERT ON mutualfunds_mutualfunds BEGIN
+        INSERT INTO mutualfunds_search (rowid, name) VALUES (new.id, new.name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS mutualfunds_search_delete AFTER DELETE ON mutualfunds_mutualfunds BEGIN
+        INSERT INTO mutualfunds_search (mutualfunds_search, rowid, name) VALUES ('delete', old.id, old.name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS mutualfunds_search_update AFTER UPDATE OF name ON mutualfunds_mutualfunds BEGIN
+        INSERT INTO mutualfunds_search (mutualfunds_search, rowid, name) VALUES ('delete', old.id, old.name);
+        INSERT INTO mutualfunds_search (rowid, name) VALUES (new.id, new.name);
+    END
+    """,
+]
+
+
+def restore_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in SQLITE_SEARCH_TRIGGERS:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mutualfunds', '0005_mutualfunds_search'),
+    ]
+
+    operations = [
+        # Runs last when migrating backwards, after the columns are removed.
+        migrations.RunPython(migrations.RunPython.noop, restore_search_triggers),
+        migrations.AddField(
+            model_name='mutualfunds',
+            name='investor_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='mutualfunds',
+            name='total_units',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='mutualfunds',
+            index=models.Index(models.OrderBy(django.db.models.expressions.CombinedExpression(models.F('total_units'), '*', models.F('nav')), descending=True), name='mf_aum_idx'),
+        ),
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+    ]
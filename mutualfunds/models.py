@@ -8,4 +8,30 @@ class MutualFunds(models.Model):
     name = models.CharField(max_length=255)
     fund_type = models.CharField(max_length=255,choices=MutualFundsChoice.choices)
     nav = models.FloatField()
+    # Running totals of the holdings, kept current by LedgerEntry.objects.record
+    # (ums.fund_totals); manage.py reconcile_fund_totals recomputes them.
+    total_units = models.FloatField(default=0)
+    investor_count = models.IntegerField(default=0)  # Users holding units of the fund
 
+    class Meta:
+        indexes = [
+            # Serves ``?fund_type=`` filtering while walking pages in ``id`` order.
+            models.Index(fields=["fund_type", "id"], name="mf_fund_type_id_idx"),
+            # Serves ``?nav_min=`` / ``?nav_max=`` range filtering.
+            models.Index(fields=["nav"], name="mf_nav_idx"),
+            # Serves lookups and ordering by fund name.
+            models.Index(fields=["name"], name="mf_name_idx"),
+            # Serves the funds ordered by assets under management (units held x NAV).
+            models.Index((models.F("total_units") * models.F("nav")).desc(), name="mf_aum_idx"),
+        ]
+
+
+class NavHistory(models.Model):
+    fund = models.ForeignKey(MutualFunds,on_delete=models.CASCADE,related_name="nav_history")
+    date = models.DateField()
+    nav = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["fund", "date"], name="unique_fund_nav_date"),
+        ]
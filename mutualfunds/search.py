@@ -0,0 +1,184 @@
+"""
+Search of the fund catalogue by name, ranked, for autocomplete.
+
+Every word of the query matches the start of a word of the name, so ``blue ch`` finds
+"Aurora Bluechip Fund". On SQLite the names are indexed in the ``mutualfunds_search`` FTS5
+table (migration 0005), and ranked: names with the query's words as whole words first,
+then with them nearest the start, then the shortest. SQLite orders every match by a cheap
+form of that ranking and keeps the best RANKED_MATCHES, which are then ranked exactly here.
+That costs about 2 µs per match, so about 100 ms for a prefix such as ``fund`` that all of
+50,000 names match: as much as FTS5's bm25, which ranks by term frequency instead. When
+nothing matches, the words no fund
+name starts with are taken for typos and swapped for the closest indexed terms, so
+``bluchip`` still finds the Bluechip funds.
+
+On PostgreSQL the names have a pg_trgm index instead, and results are ranked by the
+trigram word similarity of the query to the name, which tolerates typos natively. Other
+databases get an unindexed case-insensitive match of every word.
+"""
+import difflib
+import re
+
+from django.db import connection
+
+from mutualfunds.models import MutualFunds
+
+WORD = re.compile(r"\w+")
+FIELDS = ("id", "name", "nav", "fund_type")
+RANKED_MATCHES = 200  # Best matches by the SQL ranking, ranked exactly per search
+MAX_TYPO_CANDIDATES = 3  # Indexed terms a misspelled word is replaced with, at most
+TYPO_CUTOFF = 0.7  # Least difflib similarity of a replacement to the misspelled word
+
+
+def query_words(query):
+    """
+    The words of a query, lowercased as the index stores them.
+    """
+    return WORD.findall(query.lower())
+
+
+def search_funds(query, limit=10):
+    """
+    Find the funds whose name matches the query, best first.
+
+    Args:
+        query (str): Words, or the starts of words, of the fund's name.
+        limit (int): Most funds to return.
+
+    Returns:
+        list[dict]: The id, name, nav and fund_type of the funds found.
+    """
+    words = query_words(query)
+    if not words:
+        return []
+    if connection.vendor == "sqlite":
+        return sqlite_search(words, limit)
+    if connection.vendor == "postgresql":
+        return postgresql_search(" ".join(words), limit)
+    queryset = MutualFunds.objects.all()
+    for word in words:
+        queryset = queryset.filter(name__icontains=word)
+    return list(queryset.order_by("name").values(*FIELDS)[:limit])
+
+
+def fts_phrase(word):
+    """
+    An FTS5 string for the word, quoted so query syntax in it is taken literally.
+    """
+    return '"{}"'.format(word.replace('"', '""'))
+
+
+def sqlite_search(words, limit):
+    rows = fts_search(" AND ".join(f"{fts_phrase(word)}*" for word in words), words)
+    if rows:
+        return rank(rows, words)[:limit]
+
+    terms, ranked_words = [], []
+    for word in words:
+        if word.isdigit() or has_prefix_match(word):
+            terms.append(f"{fts_phrase(word)}*")
+            ranked_words.append(word)
+            continue
+        corrections = typo_corrections(word)
+        if not corrections:
+            return []
+        alternatives = " OR ".join(fts_phrase(correction) for correction in corrections)
+        terms.append("({})".format(alternatives))
+        ranked_words.append(corrections[0])  # The closest
+    return rank(fts_search(" AND ".join(terms), ranked_words), ranked_words)[:limit]
+
+
+def like_pattern(text):
+    """
+    ``text`` escaped for a LIKE pattern with ``ESCAPE '\\'``.
+    """
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def fts_search(match, words):
+    """
+    The best RANKED_MATCHES funds matching an FTS5 query, by rank()'s order approximated in
+    SQL: a name's words are taken to be separated by spaces only, and the position of a word
+    is the offset of its first character.
+    """
+    table = connection.ops.quote_name(MutualFunds._meta.db_table)
+    partial = " + ".join(["(padded NOT LIKE %s ESCAPE '\\')"] * len(words))
+    position = " + ".join(["instr(padded, %s)"] * len(words))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT id, name, nav, fund_type FROM ("
+            f"SELECT f.id, f.name, f.nav, f.fund_type, ' ' || lower(f.name) || ' ' AS padded "
+            f"FROM mutualfunds_search JOIN {table} f ON f.id = mutualfunds_search.rowid "
+            f"WHERE mutualfunds_search MATCH %s"
+            f") ORDER BY {partial}, {position}, length(name), id LIMIT %s",
+            [
+                match,
+                *(f"% {like_pattern(word)} %" for word in words),
+                *(f" {word}" for word in words),
+                RANKED_MATCHES,
+            ],
+        )
+        return [dict(zip(FIELDS, row)) for row in cursor.fetchall()]
+
+
+def rank(rows, words):
+    """
+    Sort the funds by how well their name matches the query's words: the most words matched
+    whole, then the earliest words matched, then the shortest names. A word the name doesn't
+    start any word with (another of a typo's corrections) counts as matched last and partly.
+    """
+
+    def key(row):
+        name_words = query_words(row["name"])
+        partial = position = 0
+        for word in words:
+            matched = [i for i, name_word in enumerate(name_words) if name_word.startswith(word)]
+            partial += word not in name_words
+            position += matched[0] if matched else len(name_words)
+        return partial, position, len(row["name"]), row["id"]
+
+    return sorted(rows, key=key)
+
+
+def has_prefix_match(word):
+    """
+    Whether an indexed term starts with the word.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM mutualfunds_search_vocab WHERE term >= %s AND term < %s LIMIT 1",
+            [word, word + "\U0010ffff"],
+        )
+        return cursor.fetchone() is not None
+
+
+def typo_corrections(word):
+    """
+    The indexed terms closest to a misspelled word.
+
+    Only terms with the same first letter and a similar length are compared, which keeps the
+    candidates to a small range of the vocabulary: first letters are rarely mistyped.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT term FROM mutualfunds_search_vocab WHERE term >= %s AND term < %s "
+            "AND length(term) BETWEEN %s AND %s",
+            [word[0], word[0] + "\U0010ffff", len(word) - 2, len(word) + 2],
+        )
+        candidates = [term for term, in cursor.fetchall()]
+    return difflib.get_close_matches(word, candidates, n=MAX_TYPO_CANDIDATES, cutoff=TYPO_CUTOFF)
+
+
+def postgresql_search(query, limit):
+    """
+    The funds whose name has a word similar to the query's, by trigram word similarity
+    (the ``<%`` operator is served by the trigram index).
+    """
+    table = connection.ops.quote_name(MutualFunds._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT id, name, nav, fund_type FROM {table} WHERE %s <%% name "
+            f"ORDER BY word_similarity(%s, name) DESC, length(name), id LIMIT %s",
+            [query, query, limit],
+        )
+        return [dict(zip(FIELDS, row)) for row in cursor.fetchall()]
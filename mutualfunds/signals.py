@@ -0,0 +1,17 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from mutualfunds.cache import bump_catalogue_version
+from mutualfunds.models import MutualFunds
+
+
+@receiver([post_save, post_delete], sender=MutualFunds)
+def invalidate_catalogue(sender, **kwargs):
+    """
+    Invalidate the cached catalogue once the fund write is committed.
+
+    Bulk writes (bulk_create, bulk_update, QuerySet.update) don't send these signals and
+    must call ``bump_catalogue_version`` themselves.
+    """
+    transaction.on_commit(bump_catalogue_version)
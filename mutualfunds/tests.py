@@ -1,3 +1,535 @@
-from django.test import TestCase
+import os
+import subprocess
+import sys
+import tempfile
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from mfas.testing import QueryPlanTestMixin
+from mutualfunds.api.v1.pagination import KeysetPagination
+from mutualfunds.api.v1.serializers import MutualFundsListSerializer
+from mutualfunds.api.v1.views import MutualFundsApiView
+from mutualfunds.cache import get_catalogue_cache, get_catalogue_version
+from mutualfunds.models import MutualFunds, NavHistory
+from mutualfunds.search import RANKED_MATCHES, search_funds
+from ums.models import User
+
+
+@skipUnless(connection.vendor == "sqlite", "Reads SQLite's EXPLAIN QUERY PLAN.")
+class MutualFundsQueryPlanTests(QueryPlanTestMixin, TestCase):
+    """
+    Every query of the mutual fund endpoints is served by an index.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        MutualFunds.objects.bulk_create(
+            MutualFunds(
+                name=f"Scheme {i}", fund_type=("EQUITY", "DEBT", "HYBRID")[i % 3], nav=10 + i
+            )
+            for i in range(30)
+        )
+        cls.user = User(username="investor")
+        cls.user.set_password("investor-password")
+        cls.user.save()
+
+    def setUp(self):
+        cache.clear()
+        get_catalogue_cache().clear()
+        self.client = APIClient()
+        self.url = reverse("mutual_funds:mutual-funds")
+
+    def test_list(self):
+        # The first page walks the table in id order and stops after page_size rows.
+        response = self.assertIndexedQueries(
+            lambda: self.client.get(self.url, {"page_size": 10}),
+            allowed_scans={"mutualfunds_mutualfunds"},
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_list_next_page(self):
+        response = self.assertIndexedQueries(
+            lambda: self.client.get(self.url, {"after": 10, "page_size": 10})
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_list_by_fund_type(self):
+        response = self.assertIndexedQueries(
+            lambda: self.client.get(self.url, {"fund_type": "DEBT"})
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_list_by_nav(self):
+        response = self.assertIndexedQueries(
+            lambda: self.client.get(self.url, {"nav_min": 15, "nav_max": 20})
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_create(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+        response = self.assertIndexedQueries(
+            lambda: self.client.post(
+                self.url, {"name": "New", "fund_type": "EQUITY", "nav": 12.5}, format="json"
+            )
+        )
+        self.assertEqual(response.status_code, 201)
+
+    def test_top_by_aum(self):
+        # Reads the mf_aum_idx index in order and stops after limit rows.
+        staff = User.objects.create(username="operations", is_staff=True)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(staff)}")
+        response = self.assertIndexedQueries(
+            lambda: self.client.get(reverse("mutual_funds:mutual-funds-top"), {"limit": 5})
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+class KeysetPaginationTests(TestCase):
+    """
+    The keyset pagination and the filters of the mutual funds list.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.funds = MutualFunds.objects.bulk_create(
+            MutualFunds(name=f"Scheme {i}", fund_type=("EQUITY", "DEBT")[i % 2], nav=10 + i)
+            for i in range(11)
+        )
+
+    def setUp(self):
+        get_catalogue_cache().clear()
+        self.client = APIClient()
+        self.url = reverse("mutual_funds:mutual-funds")
+
+    def walk(self, params):
+        """
+        Follow the next links from the first page, returning the ids of every page.
+        """
+        pages = []
+        response = self.client.get(self.url, params)
+        while True:
+            self.assertEqual(response.status_code, 200, response.content)
+            body = response.json()
+            pages.append([fund["id"] for fund in body["data"]])
+            if body["next"] is None:
+                return pages
+            self.assertIn(f"after={pages[-1][-1]}", body["next"])
+            response = self.client.get(body["next"])
+
+    def test_follows_next_links(self):
+        for fast_read_path in (True, False):
+            with self.subTest(fast_read_path=fast_read_path), override_settings(
+                FAST_READ_PATH=fast_read_path
+            ):
+                get_catalogue_cache().clear()
+                pages = self.walk({"page_size": 4})
+                self.assertEqual([len(page) for page in pages], [4, 4, 3])
+                self.assertEqual(sum(pages, []), [fund.id for fund in self.funds])
+
+    def test_after_cursor(self):
+        response = self.client.get(self.url, {"after": self.funds[8].id})
+        self.assertEqual(
+            [fund["id"] for fund in response.json()["data"]], [self.funds[9].id, self.funds[10].id]
+        )
+        self.assertIsNone(response.json()["next"])
+        response = self.client.get(self.url, {"after": self.funds[-1].id})
+        self.assertEqual(response.json()["data"], [])
+
+    def test_page_size(self):
+        self.assertEqual(len(self.client.get(self.url).json()["data"]), 11)
+        with mock.patch.object(KeysetPagination, "max_page_size", 3):
+            response = self.client.get(self.url, {"page_size": 50})
+        self.assertEqual(len(response.json()["data"]), 3)
+        self.assertIn("page_size=50", response.json()["next"])
+
+        invalid = ({"page_size": 0}, {"page_size": -1}, {"page_size": "ten"}, {"after": "last"})
+        for params in invalid:
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(next(iter(params)), response.json())
+
+    def test_filters_with_cursor(self):
+        pages = self.walk({"fund_type": "DEBT", "nav_min": 12, "nav_max": 19, "page_size": 2})
+        expected = [
+            fund.id for fund in self.funds if fund.fund_type == "DEBT" and 12 <= fund.nav <= 19
+        ]
+        self.assertEqual(len(expected), 4)
+        self.assertEqual(pages, [expected[:2], expected[2:]])
+
+        self.assertEqual(self.client.get(self.url, {"nav_min": 20, "nav_max": 10}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"fund_type": "GOLD"}).status_code, 400)
+
+
+class CatalogueCacheTests(TestCase):
+    """
+    The versioned cache of the catalogue pages and their conditional responses.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.funds = MutualFunds.objects.bulk_create(
+            MutualFunds(name=f"Scheme {i}", fund_type="EQUITY", nav=10 + i) for i in range(3)
+        )
+        cls.user = User(username="investor")
+        cls.user.set_password("investor-password")
+        cls.user.save()
+
+    def setUp(self):
+        cache.clear()
+        get_catalogue_cache().clear()
+        self.client = APIClient()
+        self.url = reverse("mutual_funds:mutual-funds")
+
+    def assertBumpsVersion(self, write):
+        version = get_catalogue_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            write()
+        self.assertGreater(get_catalogue_version(), version)
+
+    def test_serves_cached_page(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_conditional_requests(self):
+        response = self.client.get(self.url)
+        not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified["ETag"], response["ETag"])
+        # Last-Modified has a one-second resolution, too coarse to answer a conditional request.
+        modified = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(modified.status_code, 200)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+    def test_version_is_shared_by_processes(self):
+        version = get_catalogue_version()
+        subprocess.run(
+            [sys.executable, "-c", (
+                "import django\n"
+                "django.setup()\n"
+                "from mutualfunds.cache import bump_catalogue_version\n"
+                "bump_catalogue_version()"
+            )],
+            cwd=settings.BASE_DIR, env={**os.environ, "DJANGO_SETTINGS_MODULE": "mfas.settings"},
+            capture_output=True, check=True,
+        )
+        self.assertGreater(get_catalogue_version(), version)
+
+    def test_writes_bump_version(self):
+        response = self.client.get(self.url)
+        self.assertBumpsVersion(
+            lambda: MutualFunds.objects.create(name="New", fund_type="DEBT", nav=12)
+        )
+        self.assertBumpsVersion(lambda: MutualFunds.objects.get(pk=self.funds[0].pk).save())
+        self.assertBumpsVersion(lambda: MutualFunds.objects.get(pk=self.funds[1].pk).delete())
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+        payload = [{"name": f"Bulk {i}", "fund_type": "HYBRID", "nav": 11} for i in range(2)]
+        self.assertBumpsVersion(lambda: self.client.post(self.url, payload, format="json"))
+
+        with tempfile.NamedTemporaryFile("w", suffix=".csv") as navs:
+            navs.write(f"fund_id,date,nav\n{self.funds[2].pk},2026-01-02,15.5\n")
+            navs.flush()
+            self.assertBumpsVersion(
+                lambda: call_command("ingest_navs", navs.name, stdout=StringIO())
+            )
+
+        # The page cached before the writes is not served any more.
+        self.client.credentials()
+        page = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(page.status_code, 200)
+        self.assertEqual(len(page.json()["data"]), 5)
+
+
+class BulkCreateTests(TestCase):
+    """
+    Creating many mutual funds from one JSON array.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="operations")
+
+    def setUp(self):
+        get_catalogue_cache().clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+        self.url = reverse("mutual_funds:mutual-funds")
+
+    def test_creates_every_fund(self):
+        payload = [{"name": f"Bulk {i}", "fund_type": "DEBT", "nav": 10 + i} for i in range(3)]
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(
+            [fund["name"] for fund in response.json()["data"]], ["Bulk 0", "Bulk 1", "Bulk 2"]
+        )
+        self.assertEqual(MutualFunds.objects.count(), 3)
+
+    def test_reports_errors_per_item(self):
+        payload = [
+            {"name": "Valid", "fund_type": "EQUITY", "nav": 10},
+            {"name": "Invalid", "fund_type": "GOLD", "nav": "ten"},
+            {"name": "Valid too", "fund_type": "DEBT", "nav": 11},
+        ]
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        # One entry per item, in order: the invalid item's errors at its index.
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(errors[0], {})
+        self.assertEqual(set(errors[1]), {"fund_type", "nav"})
+        self.assertEqual(errors[2], {})
+        self.assertFalse(MutualFunds.objects.exists())
+
+    def test_rolls_back_on_failure(self):
+        payload = [{"name": f"Bulk {i}", "fund_type": "DEBT", "nav": 10} for i in range(3)]
+        original = MutualFunds.objects.bulk_create
+
+        def fail_second_batch(objs, batch_size=None, **kwargs):
+            original(objs[:batch_size], batch_size=batch_size, **kwargs)
+            raise IntegrityError("second batch failed")
+
+        with (
+            mock.patch.object(MutualFundsListSerializer, "batch_size", 2),
+            mock.patch.object(MutualFunds.objects, "bulk_create", side_effect=fail_second_batch),
+            self.captureOnCommitCallbacks(execute=True) as callbacks,
+        ):
+            with self.assertRaises(IntegrityError):
+                self.client.post(self.url, payload, format="json")
+        self.assertFalse(MutualFunds.objects.exists())
+        self.assertEqual(callbacks, [])
+
+    def test_limits_the_array(self):
+        payload = [{"name": f"Bulk {i}", "fund_type": "DEBT", "nav": 10} for i in range(3)]
+        with mock.patch.object(MutualFundsApiView, "bulk_max_items", 2):
+            response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("non_field_errors", response.json())
+        self.assertEqual(self.client.post(self.url, [], format="json").status_code, 400)
+        self.assertFalse(MutualFunds.objects.exists())
+
+
+class AsyncMutualFundsTests(TestCase):
+    """
+    The async variant of the mutual funds endpoint.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        MutualFunds.objects.bulk_create(
+            MutualFunds(name=f"Scheme {i}", fund_type=("EQUITY", "DEBT")[i % 2], nav=10 + i)
+            for i in range(5)
+        )
+        cls.user = User(username="investor")
+        cls.user.set_password("investor-password")
+        cls.user.save()
+
+    def setUp(self):
+        cache.clear()
+        get_catalogue_cache().clear()
+        self.url = reverse("mutual_funds:mutual-funds-async")
+
+    async def test_list(self):
+        response = await self.async_client.get(self.url, {"page_size": 2})
+        self.assertEqual(response.status_code, 200)
+        names = [fund["name"] for fund in response.json()["data"]]
+        self.assertEqual(names, ["Scheme 0", "Scheme 1"])
+        self.assertIn("after=", response.json()["next"])
+
+        response = await self.async_client.get(self.url, {"fund_type": "DEBT"})
+        names = [fund["name"] for fund in response.json()["data"]]
+        self.assertEqual(names, ["Scheme 1", "Scheme 3"])
+        not_modified = await self.async_client.get(
+            self.url, {"fund_type": "DEBT"}, headers={"if-none-match": response["ETag"]}
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+    async def test_create(self):
+        fund = {"name": "New", "fund_type": "EQUITY", "nav": 12.5}
+        response = await self.async_client.post(self.url, fund, content_type="application/json")
+        self.assertEqual(response.status_code, 401)
+
+        headers = {"authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+        response = await self.async_client.post(
+            self.url, fund, content_type="application/json", headers=headers
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        response = await self.async_client.post(
+            self.url, [fund, {**fund, "nav": "not a number"}],
+            content_type="application/json", headers=headers,
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(await MutualFunds.objects.filter(name="New").acount(), 1)
+
+    async def test_bulk_create_shares_the_sync_path(self):
+        headers = {"authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+        payload = [{"name": f"Bulk {i}", "fund_type": "DEBT", "nav": 11} for i in range(2)]
+        create = MutualFundsListSerializer.create
+        with mock.patch.object(
+            MutualFundsListSerializer, "create", autospec=True, side_effect=create
+        ) as patched:
+            response = await self.async_client.post(
+                self.url, payload, content_type="application/json", headers=headers
+            )
+        self.assertEqual(response.status_code, 201, response.content)
+        patched.assert_called_once()
+        self.assertEqual([fund["name"] for fund in response.json()["data"]], ["Bulk 0", "Bulk 1"])
+        self.assertEqual(await MutualFunds.objects.filter(name__startswith="Bulk").acount(), 2)
+
+
+class IngestNavsTests(TestCase):
+    """
+    Streaming a daily NAV file into NavHistory with the ingest_navs command.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.funds = MutualFunds.objects.bulk_create(
+            MutualFunds(name=f"Scheme {i}", fund_type="EQUITY", nav=10) for i in range(3)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def ingest(self, rows, **options):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv") as navs:
+            navs.write("fund_id,date,nav\n" + "".join(f"{row}\n" for row in rows))
+            navs.flush()
+            out = StringIO()
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command("ingest_navs", navs.name, stdout=out, **options)
+        return out.getvalue()
+
+    def history(self):
+        return {
+            (fund_id, day.isoformat()): nav
+            for fund_id, day, nav in NavHistory.objects.values_list("fund_id", "date", "nav")
+        }
+
+    def test_batches(self):
+        first, second, _ = (fund.pk for fund in self.funds)
+        rows = [
+            f"{fund_id},2026-01-{day:02},{day}"
+            for day in range(1, 6) for fund_id in (first, second)
+        ]
+        with CaptureQueriesContext(connection) as context:
+            out = self.ingest(rows, batch_size=3)
+        self.assertIn("Ingested 10 NAV rows (0 skipped", out)
+        self.assertEqual(len(self.history()), 10)
+        # One upsert per batch of 3 rows.
+        upserts = [query for query in context.captured_queries if "ON CONFLICT" in query["sql"]]
+        self.assertEqual(len(upserts), 4)
+
+    def test_updates_existing_rows(self):
+        fund = self.funds[0].pk
+        self.ingest([f"{fund},2026-01-01,11", f"{fund},2026-01-02,12"])
+        self.ingest([f"{fund},2026-01-02,13", f"{fund},2026-01-02,14"])  # The last row wins
+        self.assertEqual(self.history(), {(fund, "2026-01-01"): 11, (fund, "2026-01-02"): 14})
+
+    def test_refreshes_current_nav(self):
+        first, second, third = (fund.pk for fund in self.funds)
+        self.ingest([f"{first},2026-01-03,13", f"{first},2026-01-02,12", f"{second},2026-01-01,21"])
+        # A later file backfilling an older day doesn't move the current NAV back.
+        self.ingest([f"{first},2026-01-01,11", f"{second},2026-01-02,22"])
+        navs = dict(MutualFunds.objects.values_list("pk", "nav"))
+        self.assertEqual(navs, {first: 13, second: 22, third: 10})
+
+    def test_bad_rows(self):
+        fund = self.funds[0].pk
+        out = self.ingest([f"{fund},2026-01-01,11", "999999,2026-01-01,5"])
+        self.assertIn("(1 skipped for unknown funds)", out)
+        self.assertEqual(self.history(), {(fund, "2026-01-01"): 11})
+
+        # A malformed line rolls the whole file back.
+        with self.assertRaisesMessage(CommandError, "Line 3"):
+            self.ingest([f"{fund},2026-01-02,12", f"{fund},not-a-date,12"])
+        self.assertEqual(self.history(), {(fund, "2026-01-01"): 11})
+        with self.assertRaisesMessage(CommandError, "missing column"):
+            with tempfile.NamedTemporaryFile("w", suffix=".csv") as navs:
+                navs.write("fund_id,nav\n1,10\n")
+                navs.flush()
+                call_command("ingest_navs", navs.name, stdout=StringIO())
+
+    def test_bumps_catalogue_version(self):
+        version = get_catalogue_version()
+        self.ingest([f"{self.funds[0].pk},2026-01-01,11"])
+        self.assertGreater(get_catalogue_version(), version)
+
+
+class FundSearchTests(TestCase):
+    """
+    Search of the catalogue by fund name.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        MutualFunds.objects.bulk_create(
+            MutualFunds(name=name, fund_type="EQUITY", nav=10)
+            for name in (
+                "Banyan Bluechip Equity Fund", "Aurora Bluechip Fund",
+                "Cedar Liquid Fund", "Delta Flexi Cap Fund",
+            )
+        )
+
+    def names(self, query, limit=10):
+        return [fund["name"] for fund in search_funds(query, limit)]
+
+    def test_prefixes(self):
+        self.assertEqual(
+            self.names("blue"), ["Aurora Bluechip Fund", "Banyan Bluechip Equity Fund"]
+        )
+        self.assertEqual(self.names("BLUE eq"), ["Banyan Bluechip Equity Fund"])
+        self.assertEqual(self.names("fund", limit=1), ["Cedar Liquid Fund"])  # The shortest
+        self.assertEqual(self.names("cap fund"), ["Delta Flexi Cap Fund"])
+        self.assertEqual(self.names("gilt"), [])
+
+    def test_ranks_every_match(self):
+        # More matches than are ranked, all worse than a fund added after them.
+        MutualFunds.objects.bulk_create(
+            MutualFunds(name=f"Bluebell Growth Fund {i}", fund_type="EQUITY", nav=10)
+            for i in range(RANKED_MATCHES + 50)
+        )
+        MutualFunds.objects.create(name="Blue Fund", fund_type="EQUITY", nav=10)
+        self.assertEqual(self.names("blue", limit=1), ["Blue Fund"])
+        self.assertEqual(self.names("fund", limit=1), ["Blue Fund"])
+        self.assertEqual(self.names("bleu", limit=1), ["Blue Fund"])
+
+    def test_typos(self):
+        self.assertEqual(
+            self.names("bluchip"), ["Aurora Bluechip Fund", "Banyan Bluechip Equity Fund"]
+        )
+        self.assertEqual(self.names("cedar liqiud"), ["Cedar Liquid Fund"])
+        self.assertEqual(self.names("xyzzy"), [])
+
+    def test_follows_writes(self):
+        MutualFunds.objects.filter(name="Cedar Liquid Fund").update(name="Cedar Overnight Fund")
+        MutualFunds.objects.filter(name="Delta Flexi Cap Fund").delete()
+        MutualFunds.objects.create(name="Evergreen Liquid Fund", fund_type="DEBT", nav=10)
+
+        self.assertEqual(self.names("liquid"), ["Evergreen Liquid Fund"])
+        self.assertEqual(self.names("overnight"), ["Cedar Overnight Fund"])
+        self.assertEqual(self.names("flexi"), [])
+
+    def test_endpoint(self):
+        url = reverse("mutual_funds:mutual-funds-search")
+        response = APIClient().get(url, {"q": "blue", "limit": 1})
+        self.assertEqual(response.status_code, 200)
+        names = [fund["name"] for fund in response.json()["data"]]
+        self.assertEqual(names, ["Aurora Bluechip Fund"])
+
+        self.assertEqual(APIClient().get(url).status_code, 400)
+        self.assertEqual(APIClient().get(url, {"q": "--"}).status_code, 400)
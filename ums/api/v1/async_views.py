@@ -0,0 +1,193 @@
+from asgiref.sync import sync_to_async
+from rest_framework import status
+
+from mfas.async_views import AsyncAPIView
+from ums.api.v1.serializers import (
+    AsyncUserLoginSerializer,
+    AsyncUserRegisterSerializer,
+    ReportQuerySerializer,
+)
+from ums.api.v1.views import InvestmentApiView, ReportGenerationListApiView
+from ums.models import UserInvestment
+
+
+class AsyncUserRegisterApiView(AsyncAPIView):
+    """
+    Async variant of UserRegisterApiView for ASGI deployments.
+
+    The password is hashed in the password hashing pool, so registrations don't hold up
+    the event loop.
+    """
+    serializer_class = AsyncUserRegisterSerializer
+    authentication_required = False
+
+    async def post(self, request, *args, **kwargs):
+        """
+        Handle POST requests to register a new user.
+
+        Args:
+            request: The HTTP request containing user registration data.
+            *args: Additional positional arguments.
+            **kwargs: Additional keyword arguments.
+
+        Returns:
+            HttpResponse: A JSON response containing a success message and the registered user data.
+        """
+
+        serializer = self.serializer_class(data=self.parse_body(request))
+        # The username uniqueness checks query the database.
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+        await serializer.asave()
+        return self.respond({
+            "message": "User Registered Successfully",
+            "data": serializer.data
+        }, status=status.HTTP_201_CREATED)
+
+
+class AsyncUserLoginApiView(AsyncAPIView):
+    """
+    Async variant of UserLoginApiView for ASGI deployments.
+
+    The password is checked in the password hashing pool, so a burst of logins doesn't
+    hold up the event loop.
+    """
+    serializer_class = AsyncUserLoginSerializer
+    authentication_required = False
+
+    async def post(self, request, *args, **kwargs):
+        """
+        Handle POST requests to log in a user.
+
+        Args:
+            request: The HTTP request containing user login data.
+            *args: Additional positional arguments.
+            **kwargs: Additional keyword arguments.
+
+        Returns:
+            HttpResponse: A JSON response containing a success message and the user's tokens.
+        """
+
+        serializer = self.serializer_class(data=self.parse_body(request))
+        serializer.is_valid(raise_exception=True)
+        return self.respond({
+            "message": "User Login Successfully",
+            "data": await serializer.alogin()
+        }, status=status.HTTP_200_OK)
+
+
+class AsyncInvestmentApiView(AsyncAPIView):
+    """
+    Async variant of InvestmentApiView for ASGI deployments.
+
+    Investments are listed with Django's async ORM. Creating them stays a sync, transactional
+    write (the investment and the holding change together), run through sync_to_async.
+    """
+    serializer_class = InvestmentApiView.serializer_class  # Serializer to handle investment data.
+    read_fields = InvestmentApiView.fast_read_fields  # Columns of an investment.
+    bulk_max_items = InvestmentApiView.bulk_max_items  # Largest JSON array a POST accepts.
+
+    def get_write_serializer(self, data):
+        """
+        Build the serializer for a parsed POST body holding one investment or a list of them.
+
+        Returns:
+            Serializer: A serializer for a single investment, or a list serializer validating every
+            investment in one pass and inserting them with batched INSERTs.
+        """
+        # The serializers only read the authenticated user off the request.
+        context = {"request": self.request}
+        if isinstance(data, list):
+            return self.serializer_class(
+                data=data, many=True, allow_empty=False, max_length=self.bulk_max_items,
+                context=context,
+            )
+        return self.serializer_class(data=data, context=context)
+
+    async def get(self, request, *args, **kwargs):
+        """
+        Handle GET requests to fetch user investments.
+
+        Args:
+            request: The HTTP request to fetch investment data.
+            *args: Additional positional arguments.
+            **kwargs: Additional keyword arguments.
+
+        Returns:
+            HttpResponse: A JSON response containing a success message and the user's investment
+            data.
+        """
+
+        queries = UserInvestment.objects.filter(user=request.user).values(*self.read_fields)
+        return self.respond({
+            "message": "User's Investment Fetched Successfully",
+            "data": [row async for row in queries]
+        }, status=status.HTTP_200_OK)
+
+    async def post(self, request, *args, **kwargs):
+        """
+        Handle POST requests to upload a new investment, or many at once from a JSON array.
+
+        Args:
+            request: The HTTP request containing investment data.
+            *args: Additional positional arguments.
+            **kwargs: Additional keyword arguments.
+
+        Returns:
+            HttpResponse: A JSON response containing a success message and the uploaded
+            investment data.
+        """
+
+        serializer = self.get_write_serializer(self.parse_body(request))
+        # Validation looks the mutual funds up; saving runs in a transaction.
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+        await sync_to_async(serializer.save)()
+        return self.respond({
+            "message": "Investment Uploaded Successfully",
+            "data": serializer.data
+        }, status=status.HTTP_200_OK)
+
+
+class AsyncReportGenerationListApiView(AsyncAPIView):
+    """
+    Async variant of ReportGenerationListApiView (JSON only) for ASGI deployments.
+
+    The report rows are read with Django's async ORM from the same querysets as the sync view.
+    """
+    query_serializer_class = ReportQuerySerializer  # Serializer to validate the query params.
+    read_fields = ReportGenerationListApiView.fast_read_fields  # Columns of a report row.
+
+    get_queryset = ReportGenerationListApiView.get_queryset
+    get_aggregated_queryset = ReportGenerationListApiView.get_aggregated_queryset
+
+    async def get(self, request, *args, **kwargs):
+        """
+        Handle GET requests to generate a report of user investments.
+
+        Args:
+            request: The HTTP request to fetch the report data.
+            *args: Additional positional arguments.
+            **kwargs: Additional keyword arguments.
+
+        Returns:
+            HttpResponse: A JSON response containing a success message and the report rows
+            (plus the portfolio total with ``?aggregate=true``).
+        """
+
+        params = self.query_serializer_class(data=request.GET)
+        params.is_valid(raise_exception=True)
+        if not params.validated_data["aggregate"]:
+            queries = self.get_queryset().values(*self.read_fields)
+            return self.respond({
+                "message": "Report Generated Successfully",
+                "data": [row async for row in queries]
+            }, status=status.HTTP_200_OK)
+
+        rows = [row async for row in self.get_aggregated_queryset()]
+        return self.respond({
+            "message": "Report Generated Successfully",
+            "data": rows,
+            "portfolio": {
+                "total_units": sum((row["total_units"] for row in rows), 0.0),
+                "total_value": sum((row["total_value"] for row in rows), 0.0),
+            }
+        }, status=status.HTTP_200_OK)
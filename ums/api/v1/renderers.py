@@ -0,0 +1,83 @@
+import abc
+import csv
+import json
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class StreamingRenderer(BaseRenderer, metaclass=abc.ABCMeta):
+    """
+    Base class for renderers that can also write rows one by one.
+
+    Views hand ``stream()`` a lazy iterable of row dicts and wrap the generator in a
+    ``StreamingHttpResponse``, so the rows never have to be held in memory together.
+    ``render()`` covers the ordinary DRF path, e.g. an error response in the same format.
+    """
+    charset = "utf-8"
+
+    @abc.abstractmethod
+    def stream(self, rows, fields):
+        """
+        Yield the encoded chunks for the given rows, restricted to ``fields``.
+        """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        rows = data if isinstance(data, list) else [data]
+        # Errors that aren't tied to a field, e.g. ValidationError(["..."]), are bare messages.
+        rows = [row if isinstance(row, dict) else {"detail": row} for row in rows]
+        # Validation errors map each field to a list of messages; keep them one cell each.
+        rows = [
+            {
+                key: "; ".join(map(str, value)) if isinstance(value, list) else value
+                for key, value in row.items()
+            }
+            for row in rows
+        ]
+        fields = list(rows[0]) if rows else []
+        return "".join(self.stream(rows, fields)).encode(self.charset)
+
+
+class Echo:
+    """
+    A file-like object whose ``write`` hands back what it was given, so ``csv.writer``
+    produces one encoded line per call instead of writing to a buffer.
+    """
+
+    def write(self, value):
+        return value
+
+
+# Leading characters that make a spreadsheet read a cell as a formula.
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def escape_cell(value):
+    """
+    Prefix text a spreadsheet would run as a formula with a quote, so it shows as text.
+    """
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+class CSVRenderer(StreamingRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+    def stream(self, rows, fields):
+        writer = csv.writer(Echo())
+        yield writer.writerow([escape_cell(field) for field in fields])
+        for row in rows:
+            yield writer.writerow([escape_cell(row.get(field)) for field in fields])
+
+
+class NDJSONRenderer(StreamingRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def stream(self, rows, fields):
+        for row in rows:
+            yield json.dumps({field: row.get(field) for field in fields}, cls=JSONEncoder) + "\n"
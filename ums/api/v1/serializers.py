@@ -1,7 +1,17 @@
+import datetime
+
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer,TokenRefreshSerializer,RefreshToken
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenBackendError, TokenError
-from ums.models import User, UserInvestment
+from mutualfunds.models import MutualFunds
+from ums.cache import get_cached_user
+from ums.enums import INTERVALS, TransactionType
+from ums.hashing import acheck_password, amake_password
+from ums.last_login import aupdate_last_login, update_last_login
+from ums.ledger import nav_on, units_held_since
+from ums.models import Holding, LedgerEntry, User, UserInvestment
+from django.db import transaction
 from django.utils import timezone
 
 
@@ -71,7 +81,7 @@ class CustomTokenRefreshSerializer(TokenRefreshSerializer):
 
         if user_id:
             
-            user = User.objects.filter(id=user_id).first()
+            user = get_cached_user(user_id)
             if not user:
                 raise serializers.ValidationError("User Not Found") 
         refresh = self.get_token(user=user) 
@@ -134,30 +144,270 @@ class UserLoginSerializer(serializers.Serializer):
         if not(user and user.check_password(password)):
             raise serializers.ValidationError("User with such credentials doesn't exist")  
 
-        user.last_login = timezone.now() 
-        user.save()  
+        update_last_login(user)
 
         
         response = UserLoginSuccessResponse(user)  
         return response.data
 
 
+class AsyncUserRegisterSerializer(UserRegisterSerializer):
+
+    async def asave(self):
+        """
+        Create the user, hashing the password in the password hashing pool
+        """
+        validated_data = dict(self.validated_data)
+        validated_data["password"] = await amake_password(validated_data["password"])
+        self.instance = await User.objects.acreate(**validated_data)
+        return self.instance
+
+
+class AsyncUserLoginSerializer(UserLoginSerializer):
+
+    def validate(self, attrs: dict):
+        """
+        Only the fields are checked here; alogin checks the credentials off the request thread
+        """
+        return attrs
+
+    async def alogin(self):
+        """
+        Check the credentials in the password hashing pool and return the user's tokens
+        """
+        username = self.validated_data.get("username")
+        password = self.validated_data.get("password")
+
+        user = await User.objects.filter(username=username).afirst()
+        if not(user and await acheck_password(password, user.password)):
+            raise serializers.ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: ["User with such credentials doesn't exist"]}
+            )
+
+        await aupdate_last_login(user)
+
+        response = UserLoginSuccessResponse(user)
+        return response.data
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+
+    def to_internal_value(self, data):
+        """
+        Resolve the id from the objects a list serializer loaded up front in one query,
+        falling back to a lookup per value when nothing was prefetched
+        """
+        prefetched = self.context.get("prefetched", {}).get(self.field_name)
+        if prefetched is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            return prefetched[int(data)]
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+
+
+def buy_entry(investment):
+    """
+    Build the BUY ledger entry of an investment, traded today at the fund's current NAV
+    """
+    return LedgerEntry(
+        user=investment.user,
+        mutual_fund=investment.mutual_fund,
+        transaction_type=TransactionType.BUY,
+        trade_date=timezone.localdate(),
+        units=investment.units,
+        nav=investment.mutual_fund.nav
+    )
+
+
+class InvestmentListSerializer(serializers.ListSerializer):
+
+    batch_size = 1000  # Rows per INSERT statement
+
+    def to_internal_value(self, data):
+        """
+        Load every referenced mutual fund in a single query before validating the items
+        """
+        if isinstance(data, list):
+            fund_ids = set()
+            for item in data:
+                try:
+                    fund_ids.add(int(item["mutual_fund"]))
+                except (KeyError, TypeError, ValueError):
+                    pass
+            self.context["prefetched"] = {"mutual_fund": MutualFunds.objects.in_bulk(fund_ids)}
+        return super().to_internal_value(data)
+
+    def create(self, validated_data):
+        """
+        Insert all the investments and their BUY ledger entries in batched INSERTs and update
+        the holdings once per fund, inside one transaction
+        """
+        user = self.context.get("request").user
+        with transaction.atomic():
+            investments = UserInvestment.objects.bulk_create(
+                [UserInvestment(user=user, **item) for item in validated_data],
+                batch_size=self.batch_size,
+            )
+            LedgerEntry.objects.record(
+                [buy_entry(investment) for investment in investments], batch_size=self.batch_size
+            )
+        return investments
+
+
 class InvestmentSerializer(serializers.ModelSerializer):
 
+    mutual_fund = PrefetchedPrimaryKeyRelatedField(queryset=MutualFunds.objects.all())
+
     class Meta:
         model = UserInvestment  
         fields = ["id", "user", "mutual_fund", "units"] 
+        list_serializer_class = InvestmentListSerializer
 
         extra_kwargs = {
             "user": {"read_only": True}  
         }
 
+    def validate_units(self, value):
+        """
+        Ensure a positive number of units is bought: the ledger only records positive units
+        """
+        if value <= 0:
+            raise serializers.ValidationError("Ensure this value is greater than 0.")
+        return value
+
     def create(self, validated_data):
         """
-        Create a new investment for the logged-in user
+        Create a new investment for the logged-in user, record it in the ledger as a BUY and
+        add its units to the user's holding
         """
         validated_data["user"] = self.context.get("request").user 
-        return super().create(validated_data)  
+        with transaction.atomic():
+            investment = super().create(validated_data)  
+            LedgerEntry.objects.record([buy_entry(investment)])
+        return investment
+
+
+class LedgerEntrySerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = LedgerEntry
+        fields = ["id", "mutual_fund", "transaction_type", "trade_date", "units", "nav"]
+
+
+class LedgerTransactionSerializer(serializers.Serializer):
+
+    transaction_type = serializers.ChoiceField(
+        choices=["SELL", "SWITCH"]
+    )  # Buys go through the investments API
+    mutual_fund = serializers.PrimaryKeyRelatedField(
+        queryset=MutualFunds.objects.all()
+    )  # Fund the units leave
+    to_mutual_fund = serializers.PrimaryKeyRelatedField(
+        queryset=MutualFunds.objects.all(), required=False
+    )  # Fund a switch moves the units into
+    units = serializers.FloatField()
+    trade_date = serializers.DateField(required=False)  # Defaults to today; may be in the past
+
+    def validate_units(self, value):
+        """
+        Ensure a positive number of units is traded
+        """
+        if value <= 0:
+            raise serializers.ValidationError("Ensure this value is greater than 0.")
+        return value
+
+    def validate_trade_date(self, value):
+        """
+        Ensure the trade isn't dated in the future
+        """
+        if value > timezone.localdate():
+            raise serializers.ValidationError("Trade date can't be in the future.")
+        return value
+
+    def validate(self, attrs):
+        """
+        Ensure a switch names a different fund to move the units into
+        """
+        if attrs["transaction_type"] == "SWITCH":
+            to_mutual_fund = attrs.get("to_mutual_fund")
+            if to_mutual_fund is None:
+                raise serializers.ValidationError(
+                    {"to_mutual_fund": "This field is required for a switch."}
+                )
+            if to_mutual_fund == attrs["mutual_fund"]:
+                raise serializers.ValidationError(
+                    {"to_mutual_fund": "Can't switch a fund into itself."}
+                )
+        return attrs
+
+    def create(self, validated_data):
+        """
+        Record a sale (one SELL entry) or a switch (a SWITCH_OUT entry and a SWITCH_IN entry of
+        the same value) at the funds' NAVs on the trade date, after checking that the user holds
+        the units on the trade date and on every day since
+        """
+        user = self.context.get("request").user
+        mutual_fund = validated_data["mutual_fund"]
+        units = validated_data["units"]
+        trade_date = validated_data.get("trade_date") or timezone.localdate()
+
+        with transaction.atomic():
+            holding = (
+                Holding.objects.select_for_update()
+                .filter(user=user, mutual_fund=mutual_fund).first()
+            )
+            held = min(
+                holding.units if holding else 0.0, units_held_since(user, mutual_fund, trade_date)
+            )
+            if units > held + 1e-9:
+                raise serializers.ValidationError(
+                    {"units": [f"Only {held} units of this fund are held."]}
+                )
+
+            nav = nav_on(mutual_fund, trade_date)
+            if validated_data["transaction_type"] == "SELL":
+                entries = [LedgerEntry(
+                    user=user, mutual_fund=mutual_fund, transaction_type=TransactionType.SELL,
+                    trade_date=trade_date, units=units, nav=nav
+                )]
+            else:
+                to_mutual_fund = validated_data["to_mutual_fund"]
+                to_nav = nav_on(to_mutual_fund, trade_date)
+                if to_nav <= 0:
+                    raise serializers.ValidationError({
+                        "to_mutual_fund": ["This fund has no NAV to switch into on the trade date."]
+                    })
+                entries = [
+                    LedgerEntry(
+                        user=user, mutual_fund=mutual_fund,
+                        transaction_type=TransactionType.SWITCH_OUT,
+                        trade_date=trade_date, units=units, nav=nav
+                    ),
+                    LedgerEntry(
+                        user=user, mutual_fund=to_mutual_fund,
+                        transaction_type=TransactionType.SWITCH_IN,
+                        trade_date=trade_date, units=units * nav / to_nav, nav=to_nav
+                    ),
+                ]
+            return LedgerEntry.objects.record(entries)
+
+
+class LedgerHoldingsQuerySerializer(serializers.Serializer):
+
+    as_of = serializers.DateField(required=False)  # Defaults to today
+
+
+class LedgerHoldingSerializer(serializers.Serializer):
+
+    mutual_fund = serializers.IntegerField()
+    units = serializers.FloatField()
+    cost = serializers.FloatField()  # Cost basis, at average cost
+    average_cost = serializers.FloatField()
 
 
 class ReportGenerationListSerializer(serializers.Serializer):
@@ -165,3 +415,88 @@ class ReportGenerationListSerializer(serializers.Serializer):
     mutual_fund_name = serializers.CharField()  
     total_units = serializers.FloatField()  
     total_value = serializers.FloatField() 
+
+
+class AggregatedReportSerializer(serializers.Serializer):
+
+    mutual_fund = serializers.IntegerField()
+    mutual_fund_name = serializers.CharField()
+    nav = serializers.FloatField()
+    total_units = serializers.FloatField()
+    total_value = serializers.FloatField()
+
+
+class PortfolioTotalSerializer(serializers.Serializer):
+
+    total_units = serializers.FloatField()
+    total_value = serializers.FloatField()
+
+
+class ReportQuerySerializer(serializers.Serializer):
+
+    aggregate = serializers.BooleanField(default=False)  # Group the report by mutual fund
+
+
+class FundReturnSerializer(serializers.Serializer):
+
+    mutual_fund = serializers.IntegerField()
+    mutual_fund_name = serializers.CharField()
+    units = serializers.FloatField()  # Units held now
+    nav = serializers.FloatField()  # Current NAV
+    invested = serializers.FloatField()  # Paid in by buys and switches in
+    proceeds = serializers.FloatField()  # Paid out by sells and switches out
+    current_value = serializers.FloatField()
+    absolute_return = serializers.FloatField(allow_null=True)
+    cagr = serializers.FloatField(allow_null=True)
+    xirr = serializers.FloatField(allow_null=True)
+
+
+class PortfolioReturnSerializer(serializers.Serializer):
+
+    invested = serializers.FloatField()  # Paid in by buys
+    proceeds = serializers.FloatField()  # Paid out by sells
+    current_value = serializers.FloatField()
+    absolute_return = serializers.FloatField(allow_null=True)
+    cagr = serializers.FloatField(allow_null=True)
+    xirr = serializers.FloatField(allow_null=True)
+
+
+class PortfolioHistoryQuerySerializer(serializers.Serializer):
+
+    start = serializers.DateField(required=False)  # Defaults to a year before the end
+    end = serializers.DateField(required=False)  # Defaults to today
+    interval = serializers.ChoiceField(choices=INTERVALS, default="daily")  # Spacing of the points
+    # Longest range per interval, in days: the history is computed day by day whatever the
+    # interval, so this bounds its arrays as well as the points returned.
+    max_days = {"daily": 3653, "weekly": 9132, "monthly": 18263}  # 10, 25 and 50 years
+
+    def validate_end(self, value):
+        """
+        Ensure the range doesn't run into the future
+        """
+        if value > timezone.localdate():
+            raise serializers.ValidationError("End date can't be in the future.")
+        return value
+
+    def validate(self, attrs):
+        """
+        Fill in the default range and ensure it doesn't end before it starts
+        """
+        attrs.setdefault("end", timezone.localdate())
+        attrs.setdefault("start", attrs["end"] - datetime.timedelta(days=365))
+        if attrs["start"] > attrs["end"]:
+            raise serializers.ValidationError({"start": "Start date can't be after the end date."})
+        max_days = self.max_days[attrs["interval"]]
+        if (attrs["end"] - attrs["start"]).days > max_days:
+            raise serializers.ValidationError({
+                "start": f"The range can't span more than {max_days} days with a "
+                f"{attrs['interval']} interval."
+            })
+        return attrs
+
+
+class PortfolioValueSerializer(serializers.Serializer):
+
+    date = serializers.DateField()
+    value = serializers.FloatField()  # Units held at the close of the day × NAV
+    net_invested = serializers.FloatField()  # Paid in by buys less paid out by sells, to date
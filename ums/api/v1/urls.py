@@ -1,5 +1,10 @@
 from django.urls import path
-from ums.api.v1.views import GetNewAccessTokenSerializer, InvestmentApiView, ReportGenerationListApiView, UserRegisterApiView,UserLoginApiView
+from ums.api.v1.async_views import (AsyncInvestmentApiView, AsyncReportGenerationListApiView,
+                                    AsyncUserLoginApiView, AsyncUserRegisterApiView)
+from ums.api.v1.views import (GetNewAccessTokenSerializer, InvestmentApiView, LedgerApiView,
+                              LedgerHoldingsApiView, PortfolioHistoryApiView,
+                              ReportGenerationListApiView, ReturnsReportApiView,
+                              UserRegisterApiView,UserLoginApiView)
 
 app_name = "ums"
 
@@ -7,9 +12,17 @@ app_name = "ums"
 urlpatterns = [
     path("register/",UserRegisterApiView.as_view(),name="register"),
     path("login/",UserLoginApiView.as_view(),name="login"),
+    path("register/async/",AsyncUserRegisterApiView.as_view(),name="register-async"),
+    path("login/async/",AsyncUserLoginApiView.as_view(),name="login-async"),
     path("token/refresh/",GetNewAccessTokenSerializer.as_view(),name="refresh"),
     path("investments/",InvestmentApiView.as_view(),name="investments"),
-    path("report/",ReportGenerationListApiView.as_view(),name="report")
+    path("report/",ReportGenerationListApiView.as_view(),name="report"),
+    path("report/returns/",ReturnsReportApiView.as_view(),name="report-returns"),
+    path("report/history/",PortfolioHistoryApiView.as_view(),name="report-history"),
+    path("investments/async/",AsyncInvestmentApiView.as_view(),name="investments-async"),
+    path("report/async/",AsyncReportGenerationListApiView.as_view(),name="report-async"),
+    path("ledger/",LedgerApiView.as_view(),name="ledger"),
+    path("ledger/holdings/",LedgerHoldingsApiView.as_view(),name="ledger-holdings"),
 ]
 
 
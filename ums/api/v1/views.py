@@ -1,14 +1,32 @@
 from rest_framework import status
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from django.conf import settings
 from django.db.models import F
-from ums.api.v1.serializers import (CustomTokenRefreshSerializer, 
+from django.http import StreamingHttpResponse
+from ums.api.v1.renderers import CSVRenderer, NDJSONRenderer, StreamingRenderer
+from mutualfunds.api.v1.pagination import KeysetPagination
+from ums.api.v1.serializers import (AggregatedReportSerializer,
+                                    CustomTokenRefreshSerializer, 
+                                    FundReturnSerializer,
                                     InvestmentSerializer,
+                                    LedgerEntrySerializer,
+                                    LedgerHoldingSerializer,
+                                    LedgerHoldingsQuerySerializer,
+                                    LedgerTransactionSerializer,
+                                    PortfolioHistoryQuerySerializer,
+                                    PortfolioReturnSerializer,
+                                    PortfolioTotalSerializer,
+                                    PortfolioValueSerializer,
                                       ReportGenerationListSerializer,
+                                    ReportQuerySerializer,
                                         UserLoginSerializer, 
                                         UserRegisterSerializer)
-from ums.models import UserInvestment
-from drf_spectacular.utils import extend_schema
+from ums.ledger import holdings_as_of
+from ums.models import Holding, LedgerEntry, UserInvestment
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
 
 
 from rest_framework.views import APIView
@@ -178,6 +196,8 @@ class GetNewAccessTokenSerializer(APIView):
     description="""
     This API endpoint allows users to manage their investments, including performing READ AND POST operations 
     The investments are associated with mutual funds and users.
+    POST also accepts a JSON array of investments, created all-or-nothing in one transaction;
+    errors are reported per item.
     """,
     request=InvestmentSerializer,  # Serializer used for handling investment data in the request body.
     responses={
@@ -213,6 +233,10 @@ class InvestmentApiView(APIView):
     This view allows users to perform CRUD operations on their investments.
     """
     serializer_class = InvestmentSerializer  # Serializer to handle investment data.
+    bulk_max_items = 50000  # Largest JSON array accepted by a single POST.
+    fast_read_fields = [  # Columns read by the FAST_READ_PATH, matching serializer_class.
+        "id", "user", "mutual_fund", "units",
+    ]
 
     def get_queryset(self):
         """
@@ -221,12 +245,30 @@ class InvestmentApiView(APIView):
         Returns:
             QuerySet: A QuerySet containing the user's investments, including related user and mutual fund data.
         """
-        return UserInvestment.objects.select_related("user", "mutual_fund").filter(user=self.request.user).values()
+        return UserInvestment.objects.select_related("user", "mutual_fund").filter(
+            user=self.request.user
+        )
     
 
+    def get_write_serializer(self, request):
+        """
+        Build the serializer for a POST body holding one investment or a list of them.
+
+        Returns:
+            Serializer: A serializer for a single investment, or a list serializer validating every
+            investment in one pass (with one mutual fund lookup) and inserting them with batched
+            INSERTs.
+        """
+        if isinstance(request.data, list):
+            return self.serializer_class(
+                data=request.data, many=True, allow_empty=False, max_length=self.bulk_max_items,
+                context={"request": request}
+            )
+        return self.serializer_class(data=request.data, context={"request": request})
+
     def post(self, request, *args, **kwargs) -> Response:
         """
-        Handle POST requests to upload a new investment.
+        Handle POST requests to upload a new investment, or many at once from a JSON array.
 
         Args:
             request: The HTTP request containing investment data.
@@ -234,10 +276,11 @@ class InvestmentApiView(APIView):
             **kwargs: Additional keyword arguments.
 
         Returns:
-            Response: A Response object containing a success message and the uploaded investment data.
+            Response: A Response object containing a success message and the uploaded investment
+            data (a list when a list was posted).
         """
 
-        serializer = self.serializer_class(data=request.data, context={"request": request})
+        serializer = self.get_write_serializer(request)
         
 
         serializer.is_valid(raise_exception=True)
@@ -267,12 +310,15 @@ class InvestmentApiView(APIView):
         user_investment = self.get_queryset()
         
 
-        serializer = self.serializer_class(user_investment, many=True)
+        if settings.FAST_READ_PATH:
+            data = list(user_investment.values(*self.fast_read_fields))
+        else:
+            data = self.serializer_class(user_investment, many=True).data
         
 
         return Response({
             "message": "User's Investment Fetched Successfully",
-            "data": serializer.data
+            "data": data
         }, status=status.HTTP_200_OK)
 
 
@@ -283,8 +329,26 @@ class ReportGenerationListApiView(APIView):
 
     This view fetches the user's investments and includes computed fields like 
     mutual fund name, total units, NAV, and total value.
+    With ``?aggregate=true`` the report is read from the user's holdings, one row per mutual
+    fund, with a portfolio total.
+    With ``?format=csv`` or ``?format=ndjson`` the rows are streamed straight from the database
+    cursor.
     """
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, CSVRenderer, NDJSONRenderer]
+    export_fields = [  # Columns of a streamed report.
+        "id", "mutual_fund_id", "mutual_fund_name", "total_units", "nav", "total_value",
+    ]
+    aggregated_export_fields = [  # Columns of a streamed aggregated report.
+        "mutual_fund", "mutual_fund_name", "nav", "total_units", "total_value",
+    ]
+    export_chunk_size = 2000  # Rows fetched from the database cursor at a time while streaming.
+    fast_read_fields = [  # Columns read by the FAST_READ_PATH, matching serializer_class.
+        "mutual_fund_name", "total_units", "total_value",
+    ]
     serializer_class = ReportGenerationListSerializer  # Serializer to handle the report generation data.
+    aggregated_serializer_class = AggregatedReportSerializer  # Serializer for the per-fund rows.
+    total_serializer_class = PortfolioTotalSerializer  # Serializer for the portfolio-total row.
+    query_serializer_class = ReportQuerySerializer  # Serializer to validate the query params.
 
     def get_queryset(self):
         """
@@ -308,6 +372,32 @@ class ReportGenerationListApiView(APIView):
             total_value=F('mutual_fund__nav') * F('units')
         ).values()
 
+    def get_aggregated_queryset(self):
+        """
+        Retrieve the user's holdings, one row per mutual fund.
+
+        Holdings are kept current on every investment, so this is an indexed lookup of the
+        user's few holding rows instead of a scan over their investment history:
+        - mutual_fund: The id of the mutual fund.
+        - mutual_fund_name: The name of the mutual fund.
+        - nav: The net asset value (NAV) of the mutual fund.
+        - total_units: The units held in the fund.
+        - total_value: The value of the holding (NAV * units).
+
+        Returns:
+            QuerySet: Annotated QuerySet of the user's holdings, ordered by mutual fund.
+        """
+        return Holding.objects.filter(
+            user=self.request.user
+        ).annotate(
+            mutual_fund_name=F('mutual_fund__name'),
+            nav=F('mutual_fund__nav'),
+            total_units=F('units'),
+            total_value=F('mutual_fund__nav') * F('units')
+        ).values(
+            'mutual_fund', 'mutual_fund_name', 'nav', 'total_units', 'total_value'
+        ).order_by('mutual_fund')
+
 
     @extend_schema(
         operation_id="User Investment Report Generation API",
@@ -318,7 +408,18 @@ class ReportGenerationListApiView(APIView):
         total units invested, NAV (Net Asset Value) of the mutual fund, 
         and the total value of the user's investments (NAV * total units).
         This endpoint helps users to get a quick overview of their investment portfolio.
+        Pass `aggregate=true` to get one row per mutual fund plus a `portfolio` total instead of one
+        row per investment.
+        Pass `format=csv` or `format=ndjson` to download the report as a stream of rows (without
+        the portfolio total).
         """,
+        parameters=[
+            OpenApiParameter("aggregate", bool, description="Group the report by mutual fund."),
+            OpenApiParameter(
+                "format", str, enum=["json", "csv", "ndjson"],
+                description="Stream the report as CSV or NDJSON.",
+            ),
+        ],
         request=None,  # No request body is needed for GET request, as it’s a report fetching operation.
         responses={
             200: {
@@ -365,14 +466,367 @@ class ReportGenerationListApiView(APIView):
         Returns:
             Response: A Response object containing a success message and the annotated investment data.
         """
+
+        params = self.query_serializer_class(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        if isinstance(request.accepted_renderer, StreamingRenderer):
+            return self.stream(
+                request.accepted_renderer, aggregate=params.validated_data["aggregate"]
+            )
+        if params.validated_data["aggregate"]:
+            return self.get_aggregated(request)
         
         query = self.get_queryset()
         
        
-        serializer = self.serializer_class(query, many=True)
+        if settings.FAST_READ_PATH:
+            data = list(query.values(*self.fast_read_fields))
+        else:
+            data = self.serializer_class(query, many=True).data
         
         
         return Response({
             "message": "Report Generated Successfully",
-            "data": serializer.data
+            "data": data
+        }, status=status.HTTP_200_OK)
+
+    def get_aggregated(self, request) -> Response:
+        """
+        Build the per-fund report and the portfolio total.
+
+        The total is summed from the holding rows, which are already one per fund.
+
+        Args:
+            request: The HTTP request to fetch the report data.
+
+        Returns:
+            Response: A Response object containing a success message, the per-fund rows and the
+            portfolio total.
+        """
+
+        rows = list(self.get_aggregated_queryset())
+        
+
+        portfolio = {
+            "total_units": sum((row["total_units"] for row in rows), 0.0),
+            "total_value": sum((row["total_value"] for row in rows), 0.0),
+        }
+        
+
+        if not settings.FAST_READ_PATH:
+            rows = self.aggregated_serializer_class(rows, many=True).data
+            portfolio = self.total_serializer_class(portfolio).data
+        
+
+        return Response({
+            "message": "Report Generated Successfully",
+            "data": rows,
+            "portfolio": portfolio
+        }, status=status.HTTP_200_OK)
+
+    def stream(self, renderer, aggregate=False) -> StreamingHttpResponse:
+        """
+        Stream the report rows in the renderer's format.
+
+        Rows are pulled from the database cursor ``export_chunk_size`` at a time and encoded as
+        they arrive, so memory stays flat and the first bytes go out before the query is exhausted.
+
+        Args:
+            renderer: The negotiated StreamingRenderer (CSV or NDJSON).
+            aggregate: Stream the per-fund holdings instead of the individual investments.
+
+        Returns:
+            StreamingHttpResponse: The report as a downloadable stream.
+        """
+
+        if aggregate:
+            rows, fields = self.get_aggregated_queryset(), self.aggregated_export_fields
+        else:
+            rows, fields = self.get_queryset().order_by('id'), self.export_fields
+        
+
+        response = StreamingHttpResponse(
+            renderer.stream(rows.iterator(chunk_size=self.export_chunk_size), fields),
+            content_type=f"{renderer.media_type}; charset={renderer.charset}"
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="investment-report.{renderer.format}"'
+        )
+        return response
+
+
+
+class LedgerApiView(APIView):
+    """
+    API View to handle the user's transaction ledger.
+
+    This view lists the user's ledger entries page by page (GET) and records sales and
+    switches (POST). Buys are recorded by the investments API.
+    """
+    serializer_class = LedgerEntrySerializer  # Serializer to represent ledger entries.
+    transaction_serializer_class = LedgerTransactionSerializer  # Serializer to record a trade.
+    pagination_class = KeysetPagination  # Keyset pagination on the entry id.
+
+    def get_queryset(self):
+        """
+        Get the queryset of the user's ledger entries.
+
+        Returns:
+            QuerySet: A QuerySet containing the user's ledger entries.
+        """
+        return LedgerEntry.objects.filter(user=self.request.user)
+
+    @extend_schema(
+        operation_id="User Ledger API",
+        summary="MFAS-UMS-06",
+        description="""
+        This API endpoint lists the user's ledger: every buy, sell and switch, with its trade date
+        and the NAV it traded at.
+        The list is paginated on the entry id: follow the `next` link (which carries `after`) to
+        fetch the following page.
+        """,
+        parameters=[
+            OpenApiParameter(
+                "after", int, description="Return entries with an id greater than this value."
+            ),
+            OpenApiParameter(
+                "page_size", int, description="Number of entries per page (max 1000)."
+            ),
+        ],
+        request=None,
+        responses=LedgerEntrySerializer(many=True)
+    )
+    def get(self, request, *args, **kwargs) -> Response:
+        """
+        Handle GET requests to fetch a page of the user's ledger entries.
+
+        Args:
+            request: The HTTP request to fetch the ledger.
+            *args: Additional positional arguments.
+            **kwargs: Additional keyword arguments.
+
+        Returns:
+            Response: A Response object containing a success message, the link to the next page
+            and the entries.
+        """
+
+        paginator = self.pagination_class()
+        entries = paginator.paginate_queryset(self.get_queryset(), request, view=self)
+        
+
+        return Response({
+            "message": "Ledger Fetched Successfully",
+            "next": paginator.get_next_link(),
+            "data": self.serializer_class(entries, many=True).data
+        }, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        operation_id="User Ledger Transaction API",
+        summary="MFAS-UMS-07",
+        description="""
+        This API endpoint records a sale (`SELL`) or a switch (`SWITCH`, moving the units' value
+        from `mutual_fund` into `to_mutual_fund`).
+        Trades are priced at the funds' NAV on `trade_date` (today by default) and can't sell more
+        units than are held.
+        """,
+        request=LedgerTransactionSerializer,
+        responses={
+            201: LedgerEntrySerializer(many=True),
+            400: {
+                "description": (
+                    "Bad Request: Invalid transaction, more units than are held, or a switch into "
+                    "a fund without a NAV."
+                )
+            }
+        }
+    )
+    def post(self, request, *args, **kwargs) -> Response:
+        """
+        Handle POST requests to record a sale or a switch.
+
+        Args:
+            request: The HTTP request containing the transaction.
+            *args: Additional positional arguments.
+            **kwargs: Additional keyword arguments.
+
+        Returns:
+            Response: A Response object containing a success message and the recorded ledger
+            entries.
+        """
+
+        serializer = self.transaction_serializer_class(
+            data=request.data, context={"request": request}
+        )
+        serializer.is_valid(raise_exception=True)
+        entries = serializer.save()
+        
+
+        return Response({
+            "message": "Transaction Recorded Successfully",
+            "data": self.serializer_class(entries, many=True).data
+        }, status=status.HTTP_201_CREATED)
+
+
+class LedgerHoldingsApiView(APIView):
+    """
+    API View to compute the user's holdings and cost basis as of a date from the ledger.
+    """
+    serializer_class = LedgerHoldingSerializer  # Serializer for one position.
+    query_serializer_class = LedgerHoldingsQuerySerializer  # Serializer for the query params.
+
+    @extend_schema(
+        operation_id="User Holdings As Of API",
+        summary="MFAS-UMS-08",
+        description="""
+        This API endpoint returns the user's open positions after every trade up to `as_of` (today
+        by default), with the cost basis of each position at average cost.
+        """,
+        parameters=[
+            OpenApiParameter("as_of", OpenApiTypes.DATE, description="Last trade date to include."),
+        ],
+        request=None,
+        responses=LedgerHoldingSerializer(many=True)
+    )
+    def get(self, request, *args, **kwargs) -> Response:
+        """
+        Handle GET requests to fetch the user's holdings as of a date.
+
+        Args:
+            request: The HTTP request to fetch the holdings.
+            *args: Additional positional arguments.
+            **kwargs: Additional keyword arguments.
+
+        Returns:
+            Response: A Response object containing a success message and the positions.
+        """
+
+        params = self.query_serializer_class(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        
+
+        holdings = holdings_as_of(request.user, params.validated_data.get("as_of"))
+        return Response({
+            "message": "Holdings Fetched Successfully",
+            "data": self.serializer_class(holdings, many=True).data
+        }, status=status.HTTP_200_OK)
+
+
+
+class ReturnsReportApiView(APIView):
+    """
+    API View to report the performance of the user's investments.
+
+    Absolute return, CAGR and XIRR are computed from the ledger for every fund and for the
+    whole portfolio at once.
+    """
+    serializer_class = FundReturnSerializer  # Serializer for the per-fund rows.
+    portfolio_serializer_class = PortfolioReturnSerializer  # Serializer for the portfolio row.
+
+    @extend_schema(
+        operation_id="User Returns Report API",
+        summary="MFAS-UMS-09",
+        description="""
+        This API endpoint reports the performance of each fund the user traded and of the whole
+        portfolio: the amount invested, the proceeds of sales, the current value at today's NAV,
+        the absolute return, the CAGR (for holdings of a year or more) and the XIRR of the cash
+        flows.
+        Rates are fractions (0.12 is 12%) and null where they are undefined.
+        """,
+        request=None,
+        responses=FundReturnSerializer(many=True)
+    )
+    def get(self, request, *args, **kwargs) -> Response:
+        """
+        Handle GET requests to report the user's returns.
+
+        Args:
+            request: The HTTP request to fetch the returns.
+            *args: Additional positional arguments.
+            **kwargs: Additional keyword arguments.
+
+        Returns:
+            Response: A Response object containing a success message, the per-fund returns and the
+            portfolio returns.
+        """
+
+        # Imported here so workers only load numpy once a report needs it, not at startup.
+        from ums.returns import compute_returns
+
+        returns = compute_returns(request.user)
+        rows, portfolio = returns["funds"], returns["portfolio"]
+        
+
+        if not settings.FAST_READ_PATH:
+            rows = self.serializer_class(rows, many=True).data
+            portfolio = self.portfolio_serializer_class(portfolio).data
+        
+
+        return Response({
+            "message": "Returns Generated Successfully",
+            "data": rows,
+            "portfolio": portfolio
+        }, status=status.HTTP_200_OK)
+
+
+
+class PortfolioHistoryApiView(APIView):
+    """
+    API View to chart the value of the user's portfolio over a date range.
+
+    Units held come from the ledger and NAVs from the NAV history, forward-filled over the days
+    without one; weekly and monthly points keep long ranges light.
+    """
+    serializer_class = PortfolioValueSerializer  # Serializer for one point of the series.
+    query_serializer_class = PortfolioHistoryQuerySerializer  # Serializer for the query params.
+
+    @extend_schema(
+        operation_id="User Portfolio History API",
+        summary="MFAS-UMS-10",
+        description="""
+        This API endpoint returns the value of the user's portfolio at the close of each day from
+        `start` (a year before `end` by default) to `end` (today by default), along with the net
+        amount invested to date.
+        With `interval` set to `weekly` or `monthly` it returns one point per week or month instead,
+        valued at the close of the period.
+        """,
+        parameters=[
+            OpenApiParameter(
+                "start", OpenApiTypes.DATE,
+                description="First day of the range (default a year before `end`); the range "
+                "spans at most 10 years daily, 25 weekly, 50 monthly.",
+            ),
+            OpenApiParameter("end", OpenApiTypes.DATE, description="Last day of the range."),
+            OpenApiParameter("interval", OpenApiTypes.STR, enum=["daily", "weekly", "monthly"],
+                             description="Spacing of the points (daily by default)."),
+        ],
+        request=None,
+        responses=PortfolioValueSerializer(many=True)
+    )
+    def get(self, request, *args, **kwargs) -> Response:
+        """
+        Handle GET requests to fetch the portfolio's value over a date range.
+
+        Args:
+            request: The HTTP request to fetch the series.
+            *args: Additional positional arguments.
+            **kwargs: Additional keyword arguments.
+
+        Returns:
+            Response: A Response object containing a success message and the points of the series.
+        """
+
+        params = self.query_serializer_class(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        
+
+        from ums.history import portfolio_history  # Loads numpy on first use, like compute_returns.
+
+        points = portfolio_history(request.user, **params.validated_data)
+        if not settings.FAST_READ_PATH:
+            points = self.serializer_class(points, many=True).data
+        
+
+        return Response({
+            "message": "Portfolio History Fetched Successfully",
+            "data": points
         }, status=status.HTTP_200_OK)
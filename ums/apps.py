@@ -1,6 +1,11 @@
-from django.apps import AppConfig
+from django.apps import AppConfig, apps
 
 
 class UmsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ums'
+
+    def ready(self):
+        import ums.signals  # noqa: F401
+        if apps.is_installed('drf_spectacular'):
+            import ums.schema  # noqa: F401
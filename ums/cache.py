@@ -0,0 +1,46 @@
+"""
+Short-lived cache of users, keyed by id, for resolving JWTs without a SELECT per request.
+
+Saving or deleting a user drops its entry once the write is committed. Writes that skip
+the model signals (QuerySet.update, bulk_update) are only picked up when the entry
+expires, so ``USER_CACHE_TIMEOUT`` bounds how long e.g. a deactivation can go unseen.
+"""
+from django.conf import settings
+from django.core.cache import caches
+
+from ums.models import User
+
+
+def get_user_cache():
+    """
+    Return the cache backend configured by ``USER_CACHE_ALIAS``.
+    """
+    return caches[settings.USER_CACHE_ALIAS]
+
+
+def user_cache_key(user_id):
+    return f"ums:user:{user_id}"
+
+
+def get_cached_user(user_id):
+    """
+    Return the user with this id, loading and caching it on a miss.
+
+    Returns:
+        User | None: The user, or None if there is no user with this id.
+    """
+    cache = get_user_cache()
+    key = user_cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = User.objects.filter(pk=user_id).first()
+        if user is not None:
+            cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+    return user
+
+
+def invalidate_cached_user(user_id):
+    """
+    Drop the cached copy of the user with this id.
+    """
+    get_user_cache().delete(user_cache_key(user_id))
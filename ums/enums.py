@@ -0,0 +1,15 @@
+from django.db import models
+
+
+class TransactionType(models.TextChoices):
+    BUY = "BUY"
+    SELL = "SELL"
+    SWITCH_IN = "SWITCH_IN"
+    SWITCH_OUT = "SWITCH_OUT"
+
+
+# Ledger entries store positive units; these types take units out of the holding.
+OUTFLOW_TYPES = frozenset({TransactionType.SELL, TransactionType.SWITCH_OUT})
+
+# Spacing of the points of a portfolio value series (ums.history).
+INTERVALS = ("daily", "weekly", "monthly")
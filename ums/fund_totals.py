@@ -0,0 +1,79 @@
+"""
+Per-fund totals of the holdings, for the operations dashboards: the units of a fund held by
+all users and the number of users holding it. They are stored on MutualFunds (total_units
+and investor_count), so a fund's assets under management are its total_units times its NAV
+without aggregating the holdings.
+
+LedgerEntry.objects.record adds what it changes in the holdings to the totals with F()
+updates, in the same transaction. reconcile_fund_totals recomputes them from the holdings,
+after holdings are written in bulk (seed_data, rebuild_holdings) or to repair drift.
+"""
+import math
+
+from django.db.models import Count, F, FloatField, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from mutualfunds.models import MutualFunds
+from ums.ledger import CLOSED_UNITS
+from ums.models import Holding
+
+
+def holding_totals():
+    """
+    Expressions for a fund's units held and investors, aggregated from its holdings.
+
+    Returns:
+        tuple: The total units and investor count expressions, to annotate or update funds with.
+    """
+    holdings = Holding.objects.filter(mutual_fund=OuterRef("pk")).order_by().values("mutual_fund")
+    units = holdings.annotate(total=Sum("units")).values("total")
+    investors = holdings.annotate(
+        count=Count("pk", filter=Q(units__gt=CLOSED_UNITS))
+    ).values("count")
+    return (
+        Coalesce(Subquery(units, output_field=FloatField()), Value(0.0)),
+        Coalesce(Subquery(investors, output_field=IntegerField()), Value(0)),
+    )
+
+
+def add_to_fund_totals(changes):
+    """
+    Add {fund id: (units, investors)} changes to the funds' totals, with one F() update per fund.
+
+    The funds are updated in id order, so concurrent transactions lock them in the same order.
+    """
+    for fund_id, (units, investors) in sorted(changes.items()):
+        MutualFunds.objects.filter(pk=fund_id).update(
+            total_units=F("total_units") + units, investor_count=F("investor_count") + investors
+        )
+
+
+def drifted_fund_totals(funds=None):
+    """
+    Compare the stored totals of the funds (every fund when None) with their holdings.
+
+    Returns:
+        list[tuple]: (fund id, stored units, stored investors, expected units, expected investors)
+        of every fund whose totals differ from its holdings'.
+    """
+    units, investors = holding_totals()
+    funds = MutualFunds.objects.all() if funds is None else funds
+    rows = funds.annotate(expected_units=units, expected_investors=investors).values_list(
+        "pk", "total_units", "investor_count", "expected_units", "expected_investors"
+    )
+    return [
+        row for row in rows.order_by("pk").iterator()
+        if row[2] != row[4] or not math.isclose(row[1], row[3], rel_tol=1e-9, abs_tol=1e-9)
+    ]
+
+
+def reconcile_fund_totals(funds=None):
+    """
+    Recompute the totals of the funds (every fund when None) from their holdings, in one UPDATE.
+
+    Returns:
+        int: The number of funds updated.
+    """
+    units, investors = holding_totals()
+    funds = MutualFunds.objects.all() if funds is None else funds
+    return funds.update(total_units=units, investor_count=investors)
@@ -0,0 +1,60 @@
+"""
+Password hashing off the request thread.
+
+A PBKDF2 check keeps a core busy for a good fraction of a second. Run on the event loop,
+or in asgiref's single thread for sync code, it stalls every other request on the worker.
+hashlib releases the GIL while hashing, so a small thread pool hashes on several cores at
+once while the event loop keeps serving.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_hashing_executor():
+    """
+    Return the shared hashing pool, sized by ``PASSWORD_HASHING_WORKERS`` (the CPU count when
+    unset).
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASHING_WORKERS or os.cpu_count(),
+                thread_name_prefix="password-hashing",
+            )
+        return _executor
+
+
+def shutdown_hashing_executor(wait=True):
+    """
+    Stop the hashing pool. The next hash starts a new one with the current settings.
+    """
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+
+
+async def acheck_password(password, encoded):
+    """
+    Check a raw password against an encoded one in the hashing pool.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_hashing_executor(), check_password, password, encoded)
+
+
+async def amake_password(password):
+    """
+    Hash a raw password in the hashing pool.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_hashing_executor(), make_password, password)
@@ -0,0 +1,149 @@
+"""
+A user's portfolio value over a date range, from the ledger and the NAV history.
+
+Everything is read in three queries, however long the range: the user's ledger, the funds
+it trades with their current NAV and their last NAV before the range, and the funds' NAV
+history over the range. The rest is array math on a funds × days grid: units held are
+the cumulative sum of the ledger's unit changes, NAVs are forward-filled over the days
+without one (weekends, holidays, gaps in the feed), and the value of each day is their
+product summed over the funds.
+"""
+import numpy as np
+from django.db.models import OuterRef, Q, Subquery
+from django.utils import timezone
+
+from mutualfunds.models import MutualFunds, NavHistory
+from ums.enums import TransactionType
+from ums.returns import (
+    OUTFLOW_KINDS,
+    TRANSACTION_KINDS,
+    EpochDay,
+    epoch_day,
+    ledger_columns,
+    queryset_columns,
+)
+
+BUY = TRANSACTION_KINDS.index(TransactionType.BUY)
+SELL = TRANSACTION_KINDS.index(TransactionType.SELL)
+
+
+def fund_columns(fund_ids, start):
+    """
+    Read the funds' current NAV and their last recorded NAV before ``start`` as NumPy columns.
+
+    Returns:
+        dict: ``id``, ``nav`` and ``nav_before`` (NaN for funds without history before the
+        range) arrays.
+    """
+    return queryset_columns(
+        MutualFunds.objects.filter(id__in=fund_ids).annotate(
+            nav_before=Subquery(
+                NavHistory.objects.filter(fund=OuterRef("pk"), date__lt=start)
+                .order_by("-date").values("nav")[:1]
+            )
+        ).order_by("id").values_list("id", "nav", "nav_before")
+    )
+
+
+def nav_columns(fund_ids, start, end):
+    """
+    Read the funds' NAV history over the range as NumPy columns.
+
+    Returns:
+        dict | None: ``fund_id``, ``day`` (days since 1970-01-01) and ``nav`` arrays, or None
+        without any history in the range.
+    """
+    return queryset_columns(
+        NavHistory.objects.filter(fund_id__in=fund_ids, date__range=(start, end))
+        .annotate(day=EpochDay("date"))
+        .values_list("fund_id", "day", "nav")
+    )
+
+
+def period_ends(days, interval):
+    """
+    Positions of the last day of each week (Monday to Sunday) or month in ``days``, the
+    range's last day included; every position for "daily".
+    """
+    if interval == "daily":
+        return np.arange(len(days))
+    if interval == "weekly":
+        # 1970-01-01 was a Thursday: shifting by three days starts the weeks on Mondays.
+        periods = (days + 3) // 7
+    else:
+        periods = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    return np.flatnonzero(np.append(periods[1:] != periods[:-1], True))
+
+
+def portfolio_history(user, start, end, interval="daily"):
+    """
+    Compute the value of the user's portfolio at the close of each day, week or month.
+
+    NAVs are the fund's latest recorded NAV on or before the day, like the trade NAVs of
+    ``ums.ledger.nav_on``: the fund's current NAV serves today and the days before its
+    recorded history.
+
+    Args:
+        user: The user, or their id.
+        start: First day of the range.
+        end: Last day of the range, today at the latest.
+        interval: "daily", "weekly" or "monthly"; the weekly and monthly points are the
+            values at the close of each period, or at ``end`` for the last one.
+
+    Returns:
+        list: One dict per point, in date order, with ``date``, ``value`` (units held × NAV)
+        and ``net_invested`` (paid in by buys, less paid out by sells, to date).
+    """
+    first, last = epoch_day(start), epoch_day(end)
+    days = np.arange(first, last + 1)
+    points = period_ends(days, interval)
+    dates = days[points].astype("datetime64[D]").tolist()
+
+    columns = ledger_columns(user)
+    if columns is None:
+        return [{"date": date, "value": 0.0, "net_invested": 0.0} for date in dates]
+
+    traded = columns["day"] <= last
+    if not traded.any():
+        return [{"date": date, "value": 0.0, "net_invested": 0.0} for date in dates]
+    kind = columns["kind"][traded]
+    units = np.where(np.isin(kind, OUTFLOW_KINDS), -1.0, 1.0) * columns["units"][traded]
+    funds, fund_index = np.unique(
+        columns["mutual_fund_id"][traded].astype(np.int64), return_inverse=True
+    )
+    fund_count, day_count = len(funds), len(days)
+
+    # Entries traded before the range land on its first day, so the cumulative sums start
+    # from the units held when the range opens.
+    position = np.clip(columns["day"][traded].astype(np.int64) - first, 0, None)
+    units_held = np.zeros((fund_count, day_count))
+    np.add.at(units_held, (fund_index, position), units)
+    units_held = np.cumsum(units_held, axis=1)
+    # Switches net out of the portfolio: only buys and sells move money across its boundary.
+    value = columns["units"][traded] * columns["nav"][traded]
+    flows = np.where(kind == BUY, value, 0.0) - np.where(kind == SELL, value, 0.0)
+    net_invested = np.cumsum(np.bincount(position, weights=flows, minlength=day_count))
+
+    # Column 0 holds the NAV before the range: the fund's last recorded one, or its current NAV
+    # for funds without history before the range. Columns 1.. are the days of the range.
+    fund_ids = funds.tolist()
+    fund_rows = fund_columns(fund_ids, start)
+    navs = np.full((fund_count, day_count + 1), np.nan)
+    navs[:, 0] = np.where(
+        np.isnan(fund_rows["nav_before"]), fund_rows["nav"], fund_rows["nav_before"]
+    )
+    history = nav_columns(fund_ids, start, end)
+    if history is not None:
+        rows = np.searchsorted(funds, history["fund_id"])
+        navs[rows, history["day"].astype(np.int64) - first + 1] = history["nav"]
+    if last == epoch_day(timezone.localdate()):
+        navs[:, -1] = fund_rows["nav"]
+    # Forward fill: each day takes the NAV of the latest column up to it that has one.
+    known = np.where(np.isnan(navs), 0, np.arange(day_count + 1))
+    navs = np.take_along_axis(navs, np.maximum.accumulate(known, axis=1), axis=1)[:, 1:]
+
+    values = (units_held * navs).sum(axis=0)
+    return [
+        {"date": date, "value": float(value), "net_invested": float(invested)}
+        for date, value, invested in zip(dates, values[points], net_invested[points])
+    ]
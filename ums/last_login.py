@@ -0,0 +1,120 @@
+"""
+Write-behind buffering of ``User.last_login``.
+
+Saving the user on every login makes login a write on the hot path; on SQLite it also
+takes the database write lock, so logins queue behind investment writes. With
+``LAST_LOGIN_WRITE_BEHIND`` on, logins only record the time in memory. A background
+thread coalesces the times per user and writes them every ``LAST_LOGIN_FLUSH_INTERVAL``
+seconds in one batched UPDATE. Pending times are also flushed at interpreter exit, but
+a killed worker loses at most one interval of ``last_login`` updates.
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from ums.models import User
+
+logger = logging.getLogger(__name__)
+
+
+class LastLoginBuffer:
+    """
+    Coalesces last_login times per user until the next flush.
+    """
+    batch_size = 500  # Users per UPDATE statement
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def record(self, user_id, when):
+        """
+        Remember the login time, keeping the latest one per user, and make sure the
+        flusher thread is running.
+        """
+        with self._lock:
+            if user_id not in self._pending or when > self._pending[user_id]:
+                self._pending[user_id] = when
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="last-login-flusher", daemon=True
+                )
+                self._thread.start()
+                atexit.register(self.stop)
+
+    def flush(self):
+        """
+        Write the pending times in one batched UPDATE.
+
+        Returns:
+            int: The number of users updated.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        try:
+            User.objects.bulk_update(
+                [User(pk=user_id, last_login=when) for user_id, when in pending.items()],
+                ["last_login"],
+                batch_size=self.batch_size,
+            )
+        except Exception:
+            # Put the times back unless a newer login was recorded meanwhile.
+            with self._lock:
+                for user_id, when in pending.items():
+                    if user_id not in self._pending or when > self._pending[user_id]:
+                        self._pending[user_id] = when
+            raise
+        return len(pending)
+
+    def stop(self):
+        """
+        Stop the flusher thread and write whatever is still pending.
+        """
+        self._stopped.set()
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Flushing last_login updates failed at shutdown")
+
+    def _run(self):
+        while not self._stopped.wait(settings.LAST_LOGIN_FLUSH_INTERVAL):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Flushing last_login updates failed; retrying next interval")
+            finally:
+                close_old_connections()
+
+
+last_login_buffer = LastLoginBuffer()
+
+
+def update_last_login(user):
+    """
+    Set the user's last_login to now and persist it, buffered or right away depending
+    on ``LAST_LOGIN_WRITE_BEHIND``.
+    """
+    user.last_login = timezone.now()
+    if settings.LAST_LOGIN_WRITE_BEHIND:
+        last_login_buffer.record(user.pk, user.last_login)
+    else:
+        user.save(update_fields=["last_login"])
+
+
+async def aupdate_last_login(user):
+    """
+    Async variant of update_last_login.
+    """
+    user.last_login = timezone.now()
+    if settings.LAST_LOGIN_WRITE_BEHIND:
+        last_login_buffer.record(user.pk, user.last_login)
+    else:
+        await user.asave(update_fields=["last_login"])
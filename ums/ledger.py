@@ -0,0 +1,160 @@
+"""
+Holdings and cost basis derived from the transaction ledger.
+
+Positions follow the average cost method: units bought (or switched in) add their value at
+the trade NAV to the position's cost, units sold (or switched out) take their share of the
+cost away at the position's average cost. Holdings as of a date start from the user's
+latest snapshot on or before that date and replay only the ledger entries traded since.
+"""
+from django.db import transaction
+from django.db.models import Case, F, When
+from django.utils import timezone
+
+from mutualfunds.models import NavHistory
+from ums.enums import OUTFLOW_TYPES
+from ums.models import HoldingSnapshot, LedgerEntry, User
+
+# Positions with fewer units than this are closed.
+CLOSED_UNITS = 1e-9
+
+
+def signed_units():
+    """
+    Expression for an entry's units, negative for the types that take units out.
+    """
+    return Case(When(transaction_type__in=OUTFLOW_TYPES, then=-F("units")), default=F("units"))
+
+
+def apply_entry(positions, fund_id, transaction_type, units, nav):
+    """
+    Apply one ledger entry to ``positions`` ({fund id: {"units", "cost"}}) in place.
+    """
+    position = positions.setdefault(fund_id, {"units": 0.0, "cost": 0.0})
+    if transaction_type in OUTFLOW_TYPES:
+        if position["units"] > CLOSED_UNITS:
+            position["cost"] -= position["cost"] * min(units / position["units"], 1.0)
+        position["units"] -= units
+    else:
+        position["units"] += units
+        position["cost"] += units * nav
+
+
+def positions_as_of(user, as_of=None):
+    """
+    Compute the user's positions after every entry traded up to and including ``as_of``.
+
+    Args:
+        user: The user, or their id.
+        as_of: The last trade date to include (today when None).
+
+    Returns:
+        dict: {fund id: {"units": float, "cost": float}}, including closed positions.
+    """
+    as_of = as_of or timezone.localdate()
+    entries = LedgerEntry.objects.filter(user=user, trade_date__lte=as_of)
+    positions = {}
+
+    snapshot = (
+        HoldingSnapshot.objects.filter(user=user, as_of__lte=as_of).order_by("-as_of").first()
+    )
+    if snapshot is not None:
+        positions = {
+            int(fund_id): dict(position) for fund_id, position in snapshot.positions.items()
+        }
+        entries = entries.filter(trade_date__gt=snapshot.as_of)
+
+    rows = entries.order_by("trade_date", "id").values_list(
+        "mutual_fund_id", "transaction_type", "units", "nav"
+    )
+    for row in rows.iterator():
+        apply_entry(positions, *row)
+    return positions
+
+
+def open_positions(positions):
+    """
+    Drop the closed positions.
+    """
+    return {
+        fund_id: position for fund_id, position in positions.items()
+        if abs(position["units"]) > CLOSED_UNITS
+    }
+
+
+def checkpoint(user_id, as_of):
+    """
+    Save the user's snapshot as of a date, replacing any snapshot of that date.
+
+    The user row is locked while the snapshot is built, like when a backdated entry is
+    recorded, so the snapshot can't miss an entry committed meanwhile.
+
+    Args:
+        user_id: The id of the user.
+        as_of: The last trade date the snapshot covers; must be before today.
+
+    Returns:
+        HoldingSnapshot: The saved snapshot.
+    """
+    if as_of >= timezone.localdate():
+        raise ValueError("Snapshots can only cover days before today.")
+    with transaction.atomic():
+        list(User.objects.select_for_update().filter(pk=user_id).values_list("pk"))
+        positions = open_positions(positions_as_of(user_id, as_of))
+        snapshot, _ = HoldingSnapshot.objects.update_or_create(
+            user_id=user_id, as_of=as_of,
+            defaults={
+                "positions": {str(fund_id): position for fund_id, position in positions.items()}
+            },
+        )
+    return snapshot
+
+
+def holdings_as_of(user, as_of=None):
+    """
+    List the user's open positions as of a date, with their cost basis.
+
+    Returns:
+        list: One dict per fund, ordered by fund id, with ``mutual_fund``, ``units``, ``cost``
+        and ``average_cost``.
+    """
+    positions = open_positions(positions_as_of(user, as_of))
+    return [
+        {
+            "mutual_fund": fund_id,
+            "units": position["units"],
+            "cost": position["cost"],
+            "average_cost": position["cost"] / position["units"],
+        }
+        for fund_id, position in sorted(positions.items())
+    ]
+
+
+def units_held_since(user, mutual_fund, since):
+    """
+    The fewest units of a fund the user held on any day from ``since`` through today: what
+    an outflow dated ``since`` can take without any later day's position going negative.
+    """
+    held = positions_as_of(user, since).get(mutual_fund.id, {"units": 0.0})["units"]
+    fewest = held
+    later = (
+        LedgerEntry.objects.filter(user=user, mutual_fund=mutual_fund, trade_date__gt=since)
+        .order_by("trade_date", "id").values_list("transaction_type", "units")
+    )
+    for transaction_type, units in later.iterator():
+        held += -units if transaction_type in OUTFLOW_TYPES else units
+        fewest = min(fewest, held)
+    return fewest
+
+
+def nav_on(mutual_fund, trade_date):
+    """
+    The NAV a fund traded at on a date: the latest recorded NAV on or before it, or the
+    fund's current NAV for today's trades and for dates before its recorded history.
+    """
+    if trade_date >= timezone.localdate():
+        return mutual_fund.nav
+    nav = (
+        NavHistory.objects.filter(fund=mutual_fund, date__lte=trade_date)
+        .order_by("-date").values_list("nav", flat=True).first()
+    )
+    return mutual_fund.nav if nav is None else nav
@@ -0,0 +1,57 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from ums.ledger import checkpoint
+from ums.models import HoldingSnapshot, LedgerEntry
+
+
+class Command(BaseCommand):
+    help = (
+        "Save a holdings snapshot of every user with ledger entries, so holdings and cost basis "
+        "as of later dates replay only the entries traded after it. Run it periodically."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--as-of",
+            type=datetime.date.fromisoformat,
+            help="Last trade date the snapshots cover, YYYY-MM-DD (default: yesterday).",
+        )
+        parser.add_argument("--user", type=int, help="Restrict to the user with this id.")
+        parser.add_argument(
+            "--min-entries",
+            type=int,
+            default=1,
+            help="Skip users with fewer entries since their latest snapshot (default: 1).",
+        )
+
+    def handle(self, *args, **options):
+        as_of = options["as_of"] or timezone.localdate() - datetime.timedelta(days=1)
+        if as_of >= timezone.localdate():
+            raise CommandError("Snapshots can only cover days before today.")
+
+        entries = LedgerEntry.objects.filter(trade_date__lte=as_of)
+        if options["user"] is not None:
+            entries = entries.filter(user_id=options["user"])
+        user_ids = entries.values_list("user_id", flat=True).distinct().order_by("user_id")
+
+        saved = skipped = 0
+        for user_id in user_ids.iterator():
+            latest = (
+                HoldingSnapshot.objects.filter(user_id=user_id, as_of__lte=as_of)
+                .order_by("-as_of").values_list("as_of", flat=True).first()
+            )
+            new_entries = entries.filter(user_id=user_id)
+            if latest is not None:
+                new_entries = new_entries.filter(trade_date__gt=latest)
+            if latest == as_of or new_entries.count() < options["min_entries"]:
+                skipped += 1
+                continue
+            checkpoint(user_id, as_of)
+            saved += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Saved {saved} snapshot(s) as of {as_of.isoformat()}, skipped {skipped} user(s)."
+        ))
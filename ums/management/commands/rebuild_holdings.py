@@ -0,0 +1,104 @@
+import math
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Sum
+
+from mutualfunds.models import MutualFunds
+from ums.fund_totals import reconcile_fund_totals
+from ums.ledger import signed_units
+from ums.models import Holding, LedgerEntry
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the Holding table from the transaction ledger, or with --verify report holdings "
+        "that drifted from the ledger without changing anything."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only compare holdings against the ledger and fail on drift.",
+        )
+        parser.add_argument("--user", type=int, help="Restrict to the user with this id.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of holdings inserted per query when rebuilding (default: 1000).",
+        )
+
+    def handle(self, *args, **options):
+        entries = LedgerEntry.objects.all()
+        holdings = Holding.objects.all()
+        if options["user"] is not None:
+            entries = entries.filter(user_id=options["user"])
+            holdings = holdings.filter(user_id=options["user"])
+
+        expected = (
+            entries.values("user", "mutual_fund")
+            .annotate(total_units=Sum(signed_units()))
+            .order_by()
+        )
+
+        if options["verify"]:
+            self.verify(expected, holdings)
+            return
+
+        with transaction.atomic():
+            funds = None  # Every fund's totals can change
+            if options["user"] is not None:
+                # Only those of the user's funds can: the funds of the old holdings and of the new.
+                fund_ids = set(holdings.values_list("mutual_fund_id", flat=True))
+                fund_ids.update(
+                    entries.order_by().values_list("mutual_fund_id", flat=True).distinct()
+                )
+                funds = MutualFunds.objects.filter(pk__in=fund_ids)
+            deleted, _ = holdings.delete()
+            created = Holding.objects.bulk_create(
+                (
+                    Holding(
+                        user_id=row["user"], mutual_fund_id=row["mutual_fund"],
+                        units=row["total_units"],
+                    )
+                    for row in expected.iterator()
+                ),
+                batch_size=options["batch_size"],
+            )
+            # bulk_create bypasses LedgerEntry.objects.record, so total the new holdings here.
+            reconcile_fund_totals(funds)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt holdings: removed {deleted}, created {len(created)}."
+        ))
+
+    def verify(self, expected, holdings):
+        """
+        Compare the stored holdings with the net units of the ledger.
+        """
+        stored = {
+            (user_id, fund_id): units
+            for user_id, fund_id, units in holdings.values_list(
+                "user_id", "mutual_fund_id", "units"
+            ).iterator()
+        }
+        drift = []
+        for row in expected.iterator():
+            key = (row["user"], row["mutual_fund"])
+            units = stored.pop(key, None)
+            if units is None or not math.isclose(
+                units, row["total_units"], rel_tol=1e-9, abs_tol=1e-9
+            ):
+                drift.append((key, units, row["total_units"]))
+        drift.extend((key, units, None) for key, units in stored.items())
+
+        for (user_id, fund_id), units, expected_units in drift:
+            self.stdout.write(
+                f"user={user_id} mutual_fund={fund_id}: holding={units} expected={expected_units}"
+            )
+        if drift:
+            raise CommandError(
+                f"{len(drift)} holding(s) out of sync; run rebuild_holdings to repair."
+            )
+        self.stdout.write(self.style.SUCCESS("Holdings are in sync with the ledger."))
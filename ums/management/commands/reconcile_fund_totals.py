@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from mutualfunds.models import MutualFunds
+from ums.fund_totals import drifted_fund_totals, reconcile_fund_totals
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every fund's total units and investor count from the holdings, or with --verify "
+        "report the funds whose totals drifted from the holdings without changing anything."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only compare the funds' totals against the holdings and fail on drift.",
+        )
+        parser.add_argument("--fund", type=int, help="Restrict to the mutual fund with this id.")
+
+    def handle(self, *args, **options):
+        funds = MutualFunds.objects.all()
+        if options["fund"] is not None:
+            funds = funds.filter(pk=options["fund"])
+
+        with transaction.atomic():
+            drift = drifted_fund_totals(funds)
+            for fund_id, units, investors, expected_units, expected_investors in drift:
+                self.stdout.write(
+                    f"mutual_fund={fund_id}: total_units={units} expected={expected_units} "
+                    f"investor_count={investors} expected={expected_investors}"
+                )
+            if options["verify"]:
+                if drift:
+                    raise CommandError(
+                        f"{len(drift)} fund(s) out of sync; run reconcile_fund_totals to repair."
+                    )
+                self.stdout.write(self.style.SUCCESS("Fund totals are in sync with the holdings."))
+                return
+
+            updated = reconcile_fund_totals(funds)
+        self.stdout.write(self.style.SUCCESS(
+            f"Reconciled the totals of {updated} funds: {len(drift)} had drifted."
+        ))
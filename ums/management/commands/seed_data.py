@@ -0,0 +1,374 @@
+import datetime
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from mutualfunds.cache import bump_catalogue_version
+from mutualfunds.enums import MutualFundsChoice
+from mutualfunds.models import MutualFunds, NavHistory
+from ums.enums import TransactionType
+from ums.fund_totals import reconcile_fund_totals
+from ums.ledger import signed_units
+from ums.models import Holding, LedgerEntry, User, UserInvestment
+
+# Rows are generated in shards of a fixed size, each from its own random generator, so the
+# data only depends on --seed, never on how many workers shared the shards out.
+SHARD_SIZE = 100_000
+FUND_SHARD_SIZE = 1_000
+HOUSES = (
+    "Aurora", "Banyan", "Cedar", "Delta", "Evergreen",
+    "Falcon", "Granite", "Harbor", "Indigo", "Juniper",
+)
+CATEGORIES = {
+    MutualFundsChoice.EQUITY: (
+        "Bluechip", "Flexi Cap", "Mid Cap", "Small Cap", "Value", "ELSS Tax Saver",
+    ),
+    MutualFundsChoice.DEBT: ("Liquid", "Gilt", "Corporate Bond", "Short Duration", "Overnight"),
+    MutualFundsChoice.HYBRID: (
+        "Balanced Advantage", "Aggressive Hybrid", "Equity Savings", "Multi Asset",
+    ),
+}
+
+# What the workers read, set up once per process by init_worker.
+shared = {}
+
+
+def init_worker(user_ids, fund_navs, today, history_days, batch_size):
+    shared.update(
+        user_ids=user_ids, fund_navs=fund_navs, today=today, history_days=history_days,
+        batch_size=batch_size,
+    )
+
+
+def batched(rows, size):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def insert_rows(model, fields, rows, values=None):
+    """
+    Insert rows of database-ready values into the fields of a model with one executemany().
+
+    bulk_create() builds a model instance and prepares every field of every row, which costs
+    several times the insert itself at these volumes; the rows here are plain values already.
+    ``values`` is the SQL of one row's values, a placeholder per field by default.
+    """
+    connection = connections["default"]
+    columns = ", ".join(
+        connection.ops.quote_name(model._meta.get_field(field).column) for field in fields
+    )
+    values = values or ", ".join(["%s"] * len(fields))
+    sql = (
+        f"INSERT INTO {connection.ops.quote_name(model._meta.db_table)} ({columns}) "
+        f"VALUES ({values})"
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def nav_on_trade_date():
+    """
+    SQL of a ledger row's values that prices it like ums.ledger.nav_on: at the fund's latest
+    NAV history on or before the trade date, or its current NAV when there is none. Takes the
+    user, fund, type, trade date and units, then the fund, trade date and current NAV again.
+    """
+    connection = connections["default"]
+    quote = connection.ops.quote_name
+    table = quote(NavHistory._meta.db_table)
+    fund, date, nav = (
+        quote(NavHistory._meta.get_field(field).column) for field in ("fund", "date", "nav")
+    )
+    return (
+        f"%s, %s, %s, %s, %s, COALESCE((SELECT {nav} FROM {table} WHERE {fund} = %s "
+        f"AND {date} <= %s ORDER BY {date} DESC LIMIT 1), %s)"
+    )
+
+
+def seed_investments(seed, shard, count):
+    """
+    Create the investments of one shard, each with its BUY ledger entry on a day within the
+    last history_days, at the fund's NAV of that day in the seeded NAV history (its current
+    NAV before the history starts).
+    """
+    rng = random.Random(f"{seed}:investments:{shard}")
+    user_ids, fund_navs, today = shared["user_ids"], shared["fund_navs"], shared["today"]
+    rows = (
+        (
+            rng.choice(user_ids),
+            rng.choice(fund_navs),
+            round(rng.uniform(0.5, 500), 3),
+            (today - datetime.timedelta(days=rng.randrange(shared["history_days"]))).isoformat(),
+        )
+        for _ in range(count)
+    )
+    for batch in batched(rows, shared["batch_size"]):
+        with transaction.atomic():
+            insert_rows(
+                UserInvestment, ("user", "mutual_fund", "units"),
+                [(user_id, fund_id, units) for user_id, (fund_id, _), units, _ in batch],
+            )
+            insert_rows(
+                LedgerEntry,
+                ("user", "mutual_fund", "transaction_type", "trade_date", "units", "nav"),
+                [
+                    (
+                        user_id, fund_id, TransactionType.BUY.value, trade_date, units,
+                        fund_id, trade_date, nav,
+                    )
+                    for user_id, (fund_id, nav), units, trade_date in batch
+                ],
+                values=nav_on_trade_date(),
+            )
+    return count
+
+
+def seed_navs(seed, shard, nav_days):
+    """
+    Create the weekday NAV history of one shard of funds: a random walk back from each fund's
+    current NAV, which is the NAV of its latest day.
+    """
+    rng = random.Random(f"{seed}:navs:{shard}")
+    today = shared["today"]
+
+    def walk(fund_id, nav):
+        for offset in range(nav_days):
+            day = today - datetime.timedelta(days=offset)
+            if day.weekday() < 5:
+                yield fund_id, day.isoformat(), round(nav, 4)
+                nav /= 1 + rng.gauss(0.0004, 0.01)
+
+    funds = shared["fund_navs"][shard * FUND_SHARD_SIZE:(shard + 1) * FUND_SHARD_SIZE]
+    written = 0
+    rows = (row for fund_id, nav in funds for row in walk(fund_id, nav))
+    for batch in batched(rows, shared["batch_size"]):
+        with transaction.atomic():
+            insert_rows(NavHistory, ("fund", "date", "nav"), batch)
+        written += len(batch)
+    return written
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with synthetic funds, users and investments (each with its ledger "
+        "entry), and the holdings they add up to. The data is deterministic for a given --seed "
+        "and is generated in parallel across --workers processes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--funds",
+            type=int,
+            default=1000,
+            help="Funds to create (default: 1000).",
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=1000,
+            help="Users to create (default: 1000).",
+        )
+        parser.add_argument(
+            "--investments",
+            type=int,
+            default=10000,
+            help="Investments to create over random users and funds (default: 10000).",
+        )
+        parser.add_argument(
+            "--nav-days",
+            type=int,
+            default=0,
+            help="Days of weekday NAV history to create for every fund (default: 0).",
+        )
+        parser.add_argument(
+            "--history-days",
+            type=int,
+            default=365,
+            help="Investments are dated within this many days before today (default: 365).",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Seed of the random data (default: 0).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Processes generating the investments and NAV history (default: 1).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="Number of rows written per transaction (default: 10000).",
+        )
+        parser.add_argument(
+            "--prefix",
+            default="user",
+            help="Prefix of the usernames (default: user).",
+        )
+        parser.add_argument(
+            "--password",
+            default="password",
+            help="Password of every user, hashed once for all of them (default: password).",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1 or options["workers"] < 1 or options["history_days"] < 1:
+            raise CommandError(
+                "--batch-size, --workers and --history-days must be greater than zero."
+            )
+        if options["investments"] and not (options["funds"] and options["users"]):
+            raise CommandError("Investments need at least one fund and one user.")
+        if options["workers"] > 1 and connections["default"].vendor == "sqlite" and (
+            connections["default"].is_in_memory_db()
+        ):
+            raise CommandError(
+                "--workers needs a database the processes can share, not an in-memory SQLite one."
+            )
+        if User.objects.filter(username__startswith=options["prefix"]).exists():
+            raise CommandError(
+                f"Users named {options['prefix']}* already exist; pick another --prefix."
+            )
+
+        started = time.perf_counter()
+        rng = random.Random(f"{options['seed']}:catalogue")
+        fund_ids = self.create_funds(rng, options["funds"], options["batch_size"])
+        user_ids = self.create_users(
+            options["users"], options["prefix"], options["password"], options["batch_size"]
+        )
+        self.stdout.write(f"Created {len(fund_ids)} funds and {len(user_ids)} users.")
+
+        fund_navs = list(
+            MutualFunds.objects.filter(id__in=fund_ids).order_by("id").values_list("id", "nav")
+        )
+        pool_arguments = (
+            user_ids, fund_navs, timezone.localdate(),
+            options["history_days"], options["batch_size"],
+        )
+        investment_shards = [
+            (options["seed"], shard, min(SHARD_SIZE, options["investments"] - shard * SHARD_SIZE))
+            for shard in range(-(-options["investments"] // SHARD_SIZE))
+        ]
+        nav_shards = [
+            (options["seed"], shard, options["nav_days"])
+            for shard in range(-(-len(fund_navs) // FUND_SHARD_SIZE))
+        ] if options["nav_days"] else []
+
+        # The NAV history goes in first: the ledger entries are priced from it.
+        with self.executor(options["workers"], pool_arguments) as pool:
+            navs = sum(pool.map(seed_navs, *zip(*nav_shards))) if nav_shards else 0
+            investments = sum(
+                pool.map(seed_investments, *zip(*investment_shards))
+            ) if investment_shards else 0
+        self.stdout.write(
+            f"Created {investments} investments with their ledger entries and {navs} NAV rows."
+        )
+
+        holdings = self.create_holdings(options["prefix"])
+        self.stdout.write(f"Created {holdings} holdings.")
+        elapsed = time.perf_counter() - started
+        rate = investments / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded in {elapsed:.2f}s: {rate:.0f} investments/sec"
+        ))
+
+    def create_funds(self, rng, count, batch_size):
+        """
+        Create the funds, named after made-up fund houses and the categories of their type.
+        """
+        fund_ids = []
+        for batch in batched(range(count), batch_size):
+            funds = []
+            for i in batch:
+                fund_type = rng.choice(list(CATEGORIES))
+                name = f"{rng.choice(HOUSES)} {rng.choice(CATEGORIES[fund_type])} Fund {i}"
+                nav = round(rng.uniform(10, 500), 4)
+                funds.append(MutualFunds(name=name, fund_type=fund_type, nav=nav))
+            fund_ids.extend(fund.id for fund in MutualFunds.objects.bulk_create(funds))
+        # bulk_create sends no signals, so invalidate the cached catalogue here.
+        bump_catalogue_version()
+        return fund_ids
+
+    def create_users(self, count, prefix, password, batch_size):
+        """
+        Create the users, all with one hash of the same password: hashing is deliberately slow,
+        so hashing it per user would take most of the run.
+        """
+        password = make_password(password)
+        for batch in batched(range(count), batch_size):
+            User.objects.bulk_create(
+                User(username=f"{prefix}{i}", password=password) for i in batch
+            )
+        return list(
+            User.objects.filter(username__startswith=prefix)
+            .order_by("id").values_list("id", flat=True)
+        )
+
+    def create_holdings(self, prefix):
+        """
+        Insert the holdings the seeded users' ledger entries add up to, with the aggregate of
+        rebuild_holdings run as one INSERT ... SELECT instead of read back row by row.
+        """
+        expected = (
+            LedgerEntry.objects.filter(user__in=User.objects.filter(username__startswith=prefix))
+            .values("user", "mutual_fund")
+            .annotate(total_units=Sum(signed_units()))
+            .order_by()
+        )
+        sql, params = expected.query.sql_with_params()
+        connection = connections["default"]
+        columns = ", ".join(
+            connection.ops.quote_name(Holding._meta.get_field(field).column)
+            for field in ("user", "mutual_fund", "units")
+        )
+        table = connection.ops.quote_name(Holding._meta.db_table)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {table} ({columns}) {sql}", params)
+            # The rows bypass LedgerEntry.objects.record, so total them on their funds here.
+            seeded = Holding.objects.filter(user__username__startswith=prefix).values("mutual_fund")
+            reconcile_fund_totals(MutualFunds.objects.filter(pk__in=seeded))
+            return cursor.rowcount
+
+    def executor(self, workers, pool_arguments):
+        """
+        A pool of worker processes, or an in-process stand-in with a single worker.
+
+        The workers are forked, so they share the parent's settings (a test database included)
+        and open their own connections; the parent's are closed first so none are shared.
+        """
+        if workers == 1 or "fork" not in multiprocessing.get_all_start_methods():
+            init_worker(*pool_arguments)
+            return SerialExecutor()
+        connections.close_all()
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=init_worker,
+            initargs=pool_arguments,
+        )
+
+
+class SerialExecutor:
+    """
+    The part of the Executor interface handle() uses, running the calls in this process.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def map(self, fn, *iterables):
+        return map(fn, *iterables)
@@ -1,4 +1,12 @@
+from collections import defaultdict
+
 from django.contrib.auth.models import BaseUserManager
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ums.enums import OUTFLOW_TYPES
+
 
 class CustomUserModel(BaseUserManager):
 
@@ -31,4 +39,117 @@ class CustomUserModel(BaseUserManager):
             Super must have all properties of normal user
         '''
         return self.create_user(email,password,**extra_fields)
-    
\ No newline at end of file
+
+
+class HoldingManager(models.Manager):
+
+    '''
+        KEEPING HOLDINGS CURRENT
+    '''
+
+    def increment(self,user,mutual_fund,units):
+        '''
+            Add units to the user's holding of a fund with an atomic F() update,
+            creating the holding on the first purchase. Returns True if it was created.
+        '''
+        if self.filter(user=user,mutual_fund=mutual_fund).update(units=F('units')+units):
+            return False
+        try:
+            with transaction.atomic():
+                self.create(user=user,mutual_fund=mutual_fund,units=units)
+            return True
+        except IntegrityError:
+            '''
+                A concurrent first purchase created the row between our UPDATE and INSERT
+            '''
+            self.filter(user=user,mutual_fund=mutual_fund).update(units=F('units')+units)
+            return False
+
+
+class LedgerEntryQuerySet(models.QuerySet):
+
+    '''
+        KEEPING THE LEDGER APPEND-ONLY
+    '''
+
+    def update(self,**kwargs):
+        raise ValueError("Ledger entries are append-only; record a new entry instead.")
+
+    def delete(self):
+        '''
+            Entries still go when their user or fund is deleted: cascades don't delete
+            through this queryset
+        '''
+        raise ValueError("Ledger entries are append-only; record a new entry instead.")
+
+
+class LedgerEntryManager(models.Manager.from_queryset(LedgerEntryQuerySet)):
+
+    '''
+        APPENDING TO THE LEDGER
+    '''
+
+    def record(self,entries,batch_size=None):
+        '''
+            Append entries to the ledger and apply them to the holdings and to the funds' totals,
+            one F() update per user and fund and one per fund, all in one transaction. Returns
+            the created entries.
+        '''
+        from ums.fund_totals import add_to_fund_totals
+        from ums.ledger import CLOSED_UNITS
+        from ums.models import Holding, HoldingSnapshot, User
+
+        backdated = {}
+        for entry in entries:
+            if entry.trade_date < timezone.localdate():
+                since = backdated.get(entry.user_id,entry.trade_date)
+                backdated[entry.user_id] = min(entry.trade_date,since)
+
+        with transaction.atomic():
+            if backdated:
+                '''
+                    Snapshots only cover days before today, so only a backdated entry can fall
+                    into one. Lock the users like checkpoint_holdings does, so a snapshot can't
+                    be built from a ledger that is missing this entry, then drop the stale ones.
+                '''
+                locked = User.objects.select_for_update().filter(pk__in=backdated).order_by("pk")
+                list(locked.values_list("pk"))
+                for user_id, since in backdated.items():
+                    HoldingSnapshot.objects.filter(user_id=user_id,as_of__gte=since).delete()
+
+            created = self.bulk_create(entries,batch_size=batch_size)
+
+            units = defaultdict(float)
+            for entry in created:
+                outflow = entry.transaction_type in OUTFLOW_TYPES
+                units[(entry.user,entry.mutual_fund)] += -entry.units if outflow else entry.units
+            '''
+                Update the holdings, then the funds, in key order, so two transactions touching
+                the same rows take their locks in the same order instead of deadlocking
+            '''
+            in_key_order = sorted(units.items(),key=lambda item: (item[0][0].pk,item[0][1].pk))
+            for (user,mutual_fund),delta in in_key_order:
+                Holding.objects.increment(user,mutual_fund,delta)
+
+            '''
+                Our updates lock the holdings until we commit, so the units read back are the
+                ones they left, and a holding opened or closed by them counts a fund's investor
+                in or out exactly once
+            '''
+            holdings = Holding.objects.filter(
+                user__in={user for user,_ in units},
+                mutual_fund__in={mutual_fund for _,mutual_fund in units},
+            )
+            held = dict(
+                ((user_id,fund_id),held_units)
+                for user_id,fund_id,held_units in holdings.values_list(
+                    "user_id","mutual_fund_id","units"
+                )
+            )
+            totals = defaultdict(lambda: [0.0,0])
+            for (user,mutual_fund),delta in units.items():
+                after = held[(user.pk,mutual_fund.pk)]
+                totals[mutual_fund.pk][0] += delta
+                totals[mutual_fund.pk][1] += (after > CLOSED_UNITS) - (after - delta > CLOSED_UNITS)
+            add_to_fund_totals(totals)
+        return created
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.5 on 2026-10-18 03:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_holdings(apps, schema_editor):
+    Holding = apps.get_model('ums', 'Holding')
+    UserInvestment = apps.get_model('ums', 'UserInvestment')
+    totals = UserInvestment.objects.values('user', 'mutual_fund').annotate(total=Sum('units')).order_by()
+    Holding.objects.bulk_create(
+        (Holding(user_id=row['user'], mutual_fund_id=row['mutual_fund'], units=row['total']) for row in totals.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mutualfunds', '0003_navhistory'),
+        ('ums', '0002_remove_user_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Holding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('units', models.FloatField(default=0)),
+                ('mutual_fund', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holdings', to='mutualfunds.mutualfunds')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holdings', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'mutual_fund'), name='unique_user_holding')],
+            },
+        ),
+        migrations.RunPython(backfill_holdings, migrations.RunPython.noop),
+    ]
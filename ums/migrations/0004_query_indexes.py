@@ -0,0 +1,31 @@
+# Generated by Django 5.1.5 on 2026-10-18 03:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mutualfunds', '0004_mutualfunds_name_index'),
+        ('ums', '0003_holding'),
+    ]
+
+    operations = [
+        # Create the composite index before dropping the single-column FK index it replaces.
+        migrations.AddIndex(
+            model_name='userinvestment',
+            index=models.Index(fields=['user', 'id', 'mutual_fund', 'units'], name='ums_inv_user_cover_idx'),
+        ),
+        migrations.AlterField(
+            model_name='holding',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='holdings', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='userinvestment',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='users_investment', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.1.5 on 2026-10-18 03:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_ledger(apps, schema_editor):
+    """
+    Record every existing investment in the ledger. Investments carry no date or price, so
+    they are entered as traded on the day of the migration at the fund's current NAV.
+    """
+    LedgerEntry = apps.get_model('ums', 'LedgerEntry')
+    UserInvestment = apps.get_model('ums', 'UserInvestment')
+    trade_date = timezone.localdate()
+    investments = UserInvestment.objects.exclude(units=0).values_list('user_id', 'mutual_fund_id', 'mutual_fund__nav', 'units')
+    LedgerEntry.objects.bulk_create(
+        (
+            LedgerEntry(
+                user_id=user_id, mutual_fund_id=mutual_fund_id, trade_date=trade_date, nav=nav,
+                # Negative investments (accepted before the ledger existed) took units out.
+                transaction_type='BUY' if units > 0 else 'SELL', units=abs(units),
+            )
+            for user_id, mutual_fund_id, nav, units in investments.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mutualfunds', '0004_mutualfunds_name_index'),
+        ('ums', '0004_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HoldingSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('as_of', models.DateField()),
+                ('positions', models.JSONField(default=dict)),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='holding_snapshots', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'as_of'), name='unique_user_snapshot_date')],
+            },
+        ),
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_type', models.CharField(choices=[('BUY', 'Buy'), ('SELL', 'Sell'), ('SWITCH_IN', 'Switch In'), ('SWITCH_OUT', 'Switch Out')], max_length=16)),
+                ('trade_date', models.DateField()),
+                ('units', models.FloatField()),
+                ('nav', models.FloatField()),
+                ('mutual_fund', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='mutualfunds.mutualfunds')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'trade_date', 'id'], name='ums_ledger_user_date_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(('units__gt', 0)), name='ledger_units_positive')],
+            },
+        ),
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
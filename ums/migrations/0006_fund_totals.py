@@ -0,0 +1,38 @@
+# Generated by Django 5.1.5 on 2026-10-18 04:11
+
+from django.db import migrations
+from django.db.models import Count, FloatField, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_fund_totals(apps, schema_editor):
+    """
+    Total the existing holdings on their funds, as ums.fund_totals.reconcile_fund_totals does.
+    """
+    Holding = apps.get_model('ums', 'Holding')
+    MutualFunds = apps.get_model('mutualfunds', 'MutualFunds')
+    holdings = Holding.objects.filter(mutual_fund=OuterRef('pk')).order_by().values('mutual_fund')
+    MutualFunds.objects.update(
+        total_units=Coalesce(
+            Subquery(holdings.annotate(total=Sum('units')).values('total'), output_field=FloatField()), Value(0.0)
+        ),
+        investor_count=Coalesce(
+            Subquery(
+                holdings.annotate(count=Count('pk', filter=Q(units__gt=1e-9))).values('count'),
+                output_field=IntegerField(),
+            ),
+            Value(0),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mutualfunds', '0006_mutualfunds_totals'),
+        ('ums', '0005_ledger'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_fund_totals, migrations.RunPython.noop),
+    ]
@@ -2,6 +2,8 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 
 from mutualfunds.models import MutualFunds
+from ums.enums import TransactionType
+from ums.manager import HoldingManager, LedgerEntryManager
 
 
 
@@ -30,9 +32,89 @@ class User(AbstractUser):
 
 
 class UserInvestment(models.Model):
-    user = models.ForeignKey(User,on_delete=models.CASCADE,related_name="users_investment")
+    # Indexed by ums_inv_user_cover_idx, which leads with the user.
+    user = models.ForeignKey(
+        User,on_delete=models.CASCADE,related_name="users_investment",db_index=False
+    )
     mutual_fund = models.ForeignKey(MutualFunds,on_delete=models.CASCADE,related_name="users_mutual_fund")
     units = models.FloatField()
 
-
-    
\ No newline at end of file
+    class Meta:
+        indexes = [
+            # Serves a user's investments in ``id`` order (the list, report and export) without
+            # touching the table: every column the list reads is in the index.
+            models.Index(
+                fields=["user", "id", "mutual_fund", "units"], name="ums_inv_user_cover_idx"
+            ),
+        ]
+
+
+class Holding(models.Model):
+    # Indexed by unique_user_holding, which leads with the user.
+    user = models.ForeignKey(User,on_delete=models.CASCADE,related_name="holdings",db_index=False)
+    mutual_fund = models.ForeignKey(MutualFunds,on_delete=models.CASCADE,related_name="holdings")
+    units = models.FloatField(default=0)
+
+    objects = HoldingManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "mutual_fund"], name="unique_user_holding"),
+        ]
+
+
+class LedgerEntry(models.Model):
+    """
+    One transaction of a user in a fund. The ledger is append-only: holdings and cost basis
+    are derived from it, so a correction is a new entry, never an edit.
+    """
+    # Indexed by ums_ledger_user_date_idx, which leads with the user.
+    user = models.ForeignKey(
+        User,on_delete=models.CASCADE,related_name="ledger_entries",db_index=False
+    )
+    mutual_fund = models.ForeignKey(
+        MutualFunds,on_delete=models.CASCADE,related_name="ledger_entries"
+    )
+    transaction_type = models.CharField(max_length=16,choices=TransactionType.choices)
+    trade_date = models.DateField()
+    units = models.FloatField()  # Always positive; the transaction type gives the direction.
+    nav = models.FloatField()  # NAV the units were traded at.
+
+    objects = LedgerEntryManager()
+
+    class Meta:
+        indexes = [
+            # Serves replaying a user's entries in trade order, from a date onwards.
+            models.Index(fields=["user", "trade_date", "id"], name="ums_ledger_user_date_idx"),
+        ]
+        constraints = [
+            models.CheckConstraint(condition=models.Q(units__gt=0), name="ledger_units_positive"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Ledger entries are append-only; record a new entry instead.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Ledger entries are append-only; record a new entry instead.")
+
+
+class HoldingSnapshot(models.Model):
+    """
+    A user's positions (units and cost basis per fund) after every ledger entry traded up to
+    and including ``as_of``, so holdings as of a later date replay only the entries since.
+
+    Snapshots are derived data: recording an entry dated on or before a snapshot deletes it.
+    """
+    # Indexed by unique_user_snapshot_date, which leads with the user.
+    user = models.ForeignKey(
+        User,on_delete=models.CASCADE,related_name="holding_snapshots",db_index=False
+    )
+    as_of = models.DateField()
+    positions = models.JSONField(default=dict)  # {"<fund id>": {"units": float, "cost": float}}
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "as_of"], name="unique_user_snapshot_date"),
+        ]
@@ -0,0 +1,314 @@
+"""
+Portfolio returns computed from the transaction ledger.
+
+Cash flows are taken from the investor's side: buying (or switching into) a fund pays money
+in (negative), selling (or switching out of) it pays money out (positive), and what is still
+held is valued at the fund's current NAV as a final positive flow today. A switch pays out of
+one fund and into another on the same day, so it nets out of the portfolio's flows.
+
+The XIRR of every fund and of the portfolio is solved at once: all the cash flows sit in one
+set of arrays tagged with their series, and each Newton step evaluates every series' NPV and
+its derivative with a single ``np.bincount``.
+"""
+import datetime
+from itertools import chain
+
+import numpy as np
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import Case, Func, IntegerField, Value, When
+from django.utils import timezone
+
+from mutualfunds.models import MutualFunds
+from ums.enums import OUTFLOW_TYPES, TransactionType
+from ums.ledger import CLOSED_UNITS
+from ums.models import LedgerEntry
+
+DAYS_PER_YEAR = 365.0
+# Starting rates retried, in turn, on the series left unsolved.
+XIRR_FALLBACK_GUESSES = (0.1, -0.5, 1.0)
+XIRR_TOLERANCE = 1e-9
+XIRR_MAX_ITERATIONS = 50
+# Transaction types, numbered by their index for array math, and the ones taking units out.
+TRANSACTION_KINDS = list(TransactionType)
+OUTFLOW_KINDS = [TRANSACTION_KINDS.index(kind) for kind in OUTFLOW_TYPES]
+EPOCH = datetime.date(1970, 1, 1)
+
+
+class EpochDay(Func):
+    """
+    A date as its number of days since 1970-01-01, an integer NumPy can do date math on.
+    """
+    output_field = IntegerField()
+    template = "(%(expressions)s - DATE '1970-01-01')"
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template="CAST(julianday(%(expressions)s) - 2440587.5 AS INTEGER)",
+            **extra_context
+        )
+
+
+def epoch_day(date):
+    """
+    The Python side of EpochDay.
+    """
+    return (date - EPOCH).days
+
+
+def initial_rates(amounts, years, series, series_count):
+    """
+    Starting rates for xirr: each series' money multiple annualised over the time between its
+    average payment in and its average payment out. Close to the root for ordinary portfolios,
+    so Newton's method only has a few steps left to take.
+    """
+    paid_in = np.where(amounts < 0, -amounts, 0.0)
+    paid_out = np.where(amounts > 0, amounts, 0.0)
+    total_in = np.bincount(series, weights=paid_in, minlength=series_count)
+    total_out = np.bincount(series, weights=paid_out, minlength=series_count)
+    duration = (
+        np.bincount(series, weights=paid_out * years, minlength=series_count) / total_out
+        - np.bincount(series, weights=paid_in * years, minlength=series_count) / total_in
+    )
+    rates = (total_out / total_in) ** (1.0 / duration) - 1.0
+    usable = (
+        np.isfinite(rates) & (duration > 1.0 / DAYS_PER_YEAR) & (rates > -0.99) & (rates < 100.0)
+    )
+    return np.where(usable, rates, XIRR_FALLBACK_GUESSES[0])
+
+
+def xirr(amounts, years, series, series_count):
+    """
+    Solve the XIRR of many cash-flow series at once with batched Newton iteration.
+
+    Args:
+        amounts: Cash flows of all the series (negative paid in, positive paid out).
+        years: Time of each flow in years since the first flow of its series.
+        series: Index of the series each flow belongs to.
+        series_count: Number of series.
+
+    Returns:
+        np.ndarray: The annual rate of each series; NaN where there is none (flows all of one
+        sign) or Newton's method didn't converge.
+    """
+    rates = np.full(series_count, np.nan)
+    paid_in = np.bincount(series, weights=amounts < 0, minlength=series_count) > 0
+    paid_out = np.bincount(series, weights=amounts > 0, minlength=series_count) > 0
+    unsolved = paid_in & paid_out
+
+    with np.errstate(all="ignore"):
+        starts = [initial_rates(amounts, years, series, series_count)]
+        starts += [np.full(series_count, guess) for guess in XIRR_FALLBACK_GUESSES]
+        for start in starts:
+            if not unsolved.any():
+                break
+            trial = start.copy()
+            active = unsolved.copy()
+            converged = np.zeros(series_count, dtype=bool)
+            flow_amounts, flow_years, flow_series = amounts, years, series
+            for _ in range(XIRR_MAX_ITERATIONS):
+                # Only the flows of the series still iterating take part in the next step.
+                keep = active[flow_series]
+                if not keep.all():
+                    flow_amounts = flow_amounts[keep]
+                    flow_years = flow_years[keep]
+                    flow_series = flow_series[keep]
+                base = 1.0 + trial[flow_series]
+                discounted = flow_amounts * base ** -flow_years
+                npv = np.bincount(flow_series, weights=discounted, minlength=series_count)
+                slope = np.bincount(
+                    flow_series, weights=-flow_years * discounted / base, minlength=series_count
+                )
+                step = npv / slope
+                following = trial - step
+                # Stay above -100%, where the discount factors are defined.
+                following = np.where(following <= -1.0, (trial - 1.0) / 2.0, following)
+                trial = np.where(active, following, trial)
+                converged |= active & (np.abs(step) < XIRR_TOLERANCE)
+                active &= ~converged & np.isfinite(trial)
+                if not active.any():
+                    break
+            rates = np.where(converged, trial, rates)
+            unsolved &= ~converged
+    return rates
+
+
+def optional(value):
+    """
+    Convert a NumPy float to a Python float, or None when it is NaN.
+    """
+    return None if np.isnan(value) else float(value)
+
+
+def absolute_return(final_value, invested):
+    """
+    Gain over the amount invested, or None with nothing invested.
+    """
+    if invested <= 0:
+        return None
+    return float((final_value - invested) / invested)
+
+
+def cagr(final_value, invested, years):
+    """
+    Compound annual growth rate, or None for holdings younger than a year (where annualising
+    a short-term move misleads) or with nothing invested.
+    """
+    if invested <= 0 or years < 1:
+        return None
+    return float((final_value / invested) ** (1.0 / years) - 1.0)
+
+
+def portfolio_returns(invested, proceeds, current_value, first_day, today, rate):
+    """
+    Assemble the portfolio row of compute_returns.
+    """
+    years = 0.0 if first_day is None else (today - first_day) / DAYS_PER_YEAR
+    return {
+        "invested": invested,
+        "proceeds": proceeds,
+        "current_value": current_value,
+        "absolute_return": absolute_return(current_value + proceeds, invested),
+        "cagr": cagr(current_value + proceeds, invested, years),
+        "xirr": None if rate is None else optional(rate),
+    }
+
+
+def queryset_columns(queryset):
+    """
+    Fetch a values_list() queryset as NumPy float columns.
+
+    The query is built by the ORM but fetched from the cursor straight into an array: the
+    per-row converters of the queryset itself would cost more than the math done on the rows.
+
+    Returns:
+        dict | None: One array per selected name (NULLs as NaN), or None when the queryset has
+        no rows.
+    """
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        # A filter that can't match, such as an empty __in, compiles to no query at all.
+        return None
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        names = [column[0] for column in cursor.description]
+        rows = cursor.fetchall()
+    if not rows:
+        return None
+    try:
+        table = np.fromiter(chain.from_iterable(rows), dtype=float, count=len(rows) * len(names))
+    except TypeError:
+        # NULLs: the slower np.array() turns them into NaN.
+        table = np.array(rows, dtype=float)
+    table = table.reshape(len(rows), len(names))
+    return {name: table[:, i] for i, name in enumerate(names)}
+
+
+def ledger_columns(user):
+    """
+    Read the user's ledger as NumPy columns.
+
+    Args:
+        user: The user, or their id.
+
+    Returns:
+        dict | None: ``mutual_fund_id``, ``day`` (days since 1970-01-01), ``kind`` (index into
+        TRANSACTION_KINDS), ``units`` and ``nav`` arrays, or None for an empty ledger.
+    """
+    return queryset_columns(LedgerEntry.objects.filter(user=user).annotate(
+        day=EpochDay("trade_date"),
+        kind=Case(
+            *[
+                When(transaction_type=kind, then=Value(i))
+                for i, kind in enumerate(TRANSACTION_KINDS)
+            ],
+            output_field=IntegerField()
+        )
+    ).values_list("mutual_fund_id", "day", "kind", "units", "nav"))
+
+
+def compute_returns(user):
+    """
+    Compute absolute return, CAGR and XIRR of each of the user's funds and of their portfolio.
+
+    Args:
+        user: The user, or their id.
+
+    Returns:
+        dict: ``funds`` (one dict per fund ever traded, ordered by fund id) and ``portfolio``, each
+        with ``invested``, ``proceeds``, ``current_value``, ``absolute_return``, ``cagr`` and
+        ``xirr``. Rates are fractions (0.12 is 12%); None where they are undefined.
+    """
+    today = epoch_day(timezone.localdate())
+    columns = ledger_columns(user)
+    if columns is None:
+        return {"funds": [], "portfolio": portfolio_returns(0.0, 0.0, 0.0, None, today, None)}
+
+    kind, units, days = columns["kind"], columns["units"], columns["day"].astype(np.int64)
+    value = units * columns["nav"]
+    outflow = np.isin(kind, OUTFLOW_KINDS)
+
+    funds, fund_index = np.unique(columns["mutual_fund_id"].astype(np.int64), return_inverse=True)
+    fund_count = len(funds)
+    fund_rows = MutualFunds.objects.in_bulk(funds.tolist())
+    current_nav = np.array([fund_rows[fund_id].nav for fund_id in funds.tolist()], dtype=float)
+
+    held = np.bincount(fund_index, weights=np.where(outflow, -units, units), minlength=fund_count)
+    held = np.where(np.abs(held) > CLOSED_UNITS, held, 0.0)
+    current_value = held * current_nav
+    invested = np.bincount(fund_index, weights=np.where(outflow, 0.0, value), minlength=fund_count)
+    proceeds = np.bincount(fund_index, weights=np.where(outflow, value, 0.0), minlength=fund_count)
+    first_day = np.full(fund_count, today, dtype=np.int64)
+    np.minimum.at(first_day, fund_index, days)
+
+    # Series 0..fund_count-1 are the funds, series fund_count is the portfolio.
+    portfolio = fund_count
+    entry_count = len(units)
+    open_funds = np.flatnonzero(current_value > 0)
+    total_value = float(current_value.sum())
+    flows = np.where(outflow, value, -value)
+    amounts = np.concatenate([
+        flows,
+        flows,
+        current_value[open_funds],
+        [total_value] if total_value > 0 else [],
+    ])
+    series = np.concatenate([
+        fund_index,
+        np.full(entry_count, portfolio),
+        open_funds,
+        [portfolio] if total_value > 0 else [],
+    ]).astype(np.int64)
+    flow_days = np.concatenate([days, days, np.full(len(open_funds) + (total_value > 0), today)])
+    series_start = np.append(first_day, first_day.min())
+    years = (flow_days - series_start[series]) / DAYS_PER_YEAR
+    rates = xirr(amounts, years, series, fund_count + 1)
+
+    held_years = (today - first_day) / DAYS_PER_YEAR
+    results = []
+    for i, fund_id in enumerate(funds.tolist()):
+        results.append({
+            "mutual_fund": fund_id,
+            "mutual_fund_name": fund_rows[fund_id].name,
+            "units": float(held[i]),
+            "nav": float(current_nav[i]),
+            "invested": float(invested[i]),
+            "proceeds": float(proceeds[i]),
+            "current_value": float(current_value[i]),
+            "absolute_return": absolute_return(current_value[i] + proceeds[i], invested[i]),
+            "cagr": cagr(current_value[i] + proceeds[i], invested[i], held_years[i]),
+            "xirr": optional(rates[i]),
+        })
+
+    # Switches move money between funds; only buys and sells cross the portfolio's boundary.
+    portfolio_invested = float(value[kind == TRANSACTION_KINDS.index(TransactionType.BUY)].sum())
+    portfolio_proceeds = float(value[kind == TRANSACTION_KINDS.index(TransactionType.SELL)].sum())
+    return {
+        "funds": results,
+        "portfolio": portfolio_returns(
+            portfolio_invested, portfolio_proceeds, total_value, int(first_day.min()), today,
+            rates[portfolio],
+        ),
+    }
@@ -0,0 +1,12 @@
+"""
+drf-spectacular extensions of the ums app, loaded by UmsConfig.ready when drf-spectacular
+is installed.
+"""
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    """
+    Document CachedJWTAuthentication as the JWT bearer scheme it extends.
+    """
+    target_class = "ums.authentication.CachedJWTAuthentication"
@@ -0,0 +1,16 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from ums.cache import invalidate_cached_user
+from ums.models import User
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user(sender, instance, **kwargs):
+    """
+    Drop the cached user once the write is committed, so a deactivation or a password
+    change applies to the next request.
+    """
+    user_id = instance.pk
+    transaction.on_commit(lambda: invalidate_cached_user(user_id))
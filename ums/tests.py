@@ -1,3 +1,1285 @@
-from django.test import TestCase
+import csv
+import datetime
+import gzip
+import json
+import os
+import pstats
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stderr
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import numpy as np
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from mfas.metrics import MetricsMiddleware, render_metrics
+from mfas.renderers import FastJSONRenderer
+from mfas.schema import precomputed_schema_view
+from mfas.testing import QueryPlanTestMixin
+from mutualfunds.cache import get_catalogue_cache
+from mutualfunds.models import MutualFunds, NavHistory
+from ums.api.v1.renderers import CSVRenderer, NDJSONRenderer, StreamingRenderer
+from ums.api.v1.views import InvestmentApiView
+from ums.cache import get_user_cache, user_cache_key
+from ums.enums import TransactionType
+from ums.history import portfolio_history
+from ums.last_login import LastLoginBuffer, update_last_login
+from ums.ledger import checkpoint, holdings_as_of, nav_on
+from ums.models import Holding, HoldingSnapshot, LedgerEntry, User, UserInvestment
+from ums.returns import compute_returns, xirr
+
+
+@skipUnless(connection.vendor == "sqlite", "Reads SQLite's EXPLAIN QUERY PLAN.")
+@override_settings(LAST_LOGIN_WRITE_BEHIND=False)
+class UmsQueryPlanTests(QueryPlanTestMixin, TestCase):
+    """
+    Every query of the user, investment and report endpoints is served by an index.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.funds = MutualFunds.objects.bulk_create(
+            MutualFunds(
+                name=f"Scheme {i}", fund_type=("EQUITY", "DEBT", "HYBRID")[i % 3], nav=10 + i
+            )
+            for i in range(10)
+        )
+        cls.users = []
+        for name in ("investor", "other"):
+            user = User(username=name)
+            user.set_password(f"{name}-password")
+            user.save()
+            cls.users.append(user)
+            UserInvestment.objects.bulk_create(
+                UserInvestment(user=user, mutual_fund=fund, units=2) for fund in cls.funds
+            )
+            Holding.objects.bulk_create(
+                Holding(user=user, mutual_fund=fund, units=2) for fund in cls.funds
+            )
+            LedgerEntry.objects.bulk_create(
+                LedgerEntry(
+                    user=user, mutual_fund=fund, transaction_type=TransactionType.BUY,
+                    trade_date=timezone.localdate(), units=2, nav=fund.nav
+                )
+                for fund in cls.funds
+            )
+        cls.user = cls.users[0]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def authenticate(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def test_register(self):
+        response = self.assertIndexedQueries(lambda: self.client.post(
+            reverse("ums:register"),
+            {
+                "username": "newcomer",
+                "password1": "newcomer-password",
+                "password2": "newcomer-password",
+            },
+            format="json"
+        ))
+        self.assertEqual(response.status_code, 201, response.content)
+
+    def test_login(self):
+        response = self.assertIndexedQueries(lambda: self.client.post(
+            reverse("ums:login"),
+            {"username": "investor", "password": "investor-password"},
+            format="json"
+        ))
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def test_refresh(self):
+        response = self.assertIndexedQueries(lambda: self.client.post(
+            reverse("ums:refresh"),
+            {"refresh": str(RefreshToken.for_user(self.user))},
+            format="json"
+        ))
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def test_investments(self):
+        self.authenticate()
+        response = self.assertIndexedQueries(lambda: self.client.get(reverse("ums:investments")))
+        self.assertEqual(len(response.json()["data"]), len(self.funds))
+
+    def test_create_investment(self):
+        self.authenticate()
+        response = self.assertIndexedQueries(lambda: self.client.post(
+            reverse("ums:investments"), {"mutual_fund": self.funds[0].id, "units": 3}, format="json"
+        ))
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def test_create_investments(self):
+        self.authenticate()
+        payload = [{"mutual_fund": fund.id, "units": 1} for fund in self.funds[:3]]
+        response = self.assertIndexedQueries(
+            lambda: self.client.post(reverse("ums:investments"), payload, format="json")
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def test_report(self):
+        self.authenticate()
+        response = self.assertIndexedQueries(lambda: self.client.get(reverse("ums:report")))
+        self.assertEqual(len(response.json()["data"]), len(self.funds))
+
+    def test_aggregated_report(self):
+        self.authenticate()
+        # Unequal units per fund, so rows summed across funds or users would show.
+        extra = {self.funds[0].id: 3, self.funds[1].id: 1.5}
+        payload = [{"mutual_fund": fund_id, "units": units} for fund_id, units in extra.items()]
+        response = self.client.post(reverse("ums:investments"), payload, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        response = self.assertIndexedQueries(
+            lambda: self.client.get(reverse("ums:report"), {"aggregate": "true"})
+        )
+        body = response.json()
+        self.assertEqual(len(body["data"]), len(self.funds))
+        for row, fund in zip(body["data"], self.funds):
+            units = 2 + extra.get(fund.id, 0)
+            self.assertEqual((row["mutual_fund"], row["mutual_fund_name"]), (fund.id, fund.name))
+            self.assertAlmostEqual(row["total_units"], units)
+            self.assertAlmostEqual(row["total_value"], fund.nav * units)
+        self.assertAlmostEqual(body["portfolio"]["total_units"], 2 * len(self.funds) + 4.5)
+        self.assertAlmostEqual(
+            body["portfolio"]["total_value"],
+            sum(fund.nav * (2 + extra.get(fund.id, 0)) for fund in self.funds),
+        )
+
+    def test_csv_export(self):
+        self.authenticate()
+        response = self.assertIndexedQueries(
+            lambda: b"".join(
+                self.client.get(reverse("ums:report"), {"format": "csv"}).streaming_content
+            )
+        )
+        self.assertEqual(len(response.splitlines()), len(self.funds) + 1)
+
+    def test_ledger(self):
+        self.authenticate()
+        response = self.assertIndexedQueries(
+            lambda: self.client.get(reverse("ums:ledger"), {"page_size": 5})
+        )
+        self.assertEqual(len(response.json()["data"]), 5)
+
+    def test_sell(self):
+        self.authenticate()
+        response = self.assertIndexedQueries(lambda: self.client.post(
+            reverse("ums:ledger"),
+            {"transaction_type": "SELL", "mutual_fund": self.funds[0].id, "units": 1},
+            format="json"
+        ))
+        self.assertEqual(response.status_code, 201, response.content)
+
+    def test_ledger_holdings(self):
+        self.authenticate()
+        response = self.assertIndexedQueries(
+            lambda: self.client.get(reverse("ums:ledger-holdings"))
+        )
+        self.assertEqual(len(response.json()["data"]), len(self.funds))
+
+    def test_returns_report(self):
+        self.authenticate()
+        response = self.assertIndexedQueries(lambda: self.client.get(reverse("ums:report-returns")))
+        self.assertEqual(len(response.json()["data"]), len(self.funds))
+
+    def test_portfolio_history(self):
+        self.authenticate()
+        response = self.assertIndexedQueries(
+            lambda: self.client.get(reverse("ums:report-history"), {"interval": "weekly"})
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    """
+    Resolving the token's user through the user cache.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User(username="investor")
+        cls.user.set_password("investor-password")
+        cls.user.save()
+
+    def setUp(self):
+        get_user_cache().clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def test_user_is_cached(self):
+        self.assertEqual(self.client.get(reverse("ums:investments")).status_code, 200)
+        self.assertEqual(get_user_cache().get(user_cache_key(self.user.pk)), self.user)
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.client.get(reverse("ums:investments")).status_code, 200)
+        self.assertFalse(
+            [query for query in context.captured_queries if 'FROM "ums_user"' in query["sql"]]
+        )
+
+    def test_save_invalidates(self):
+        self.assertEqual(self.client.get(reverse("ums:investments")).status_code, 200)
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertIsNone(get_user_cache().get(user_cache_key(self.user.pk)))
+        self.assertEqual(self.client.get(reverse("ums:investments")).status_code, 401)
+
+    def test_delete_invalidates(self):
+        self.assertEqual(self.client.get(reverse("ums:investments")).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.get(pk=self.user.pk).delete()
+        self.assertIsNone(get_user_cache().get(user_cache_key(self.user.pk)))
+        self.assertEqual(self.client.get(reverse("ums:investments")).status_code, 401)
+
+
+@override_settings(LAST_LOGIN_FLUSH_INTERVAL=3600)
+class LastLoginBufferTests(TransactionTestCase):
+    """
+    Write-behind of last_login. Its flusher thread writes through its own connection, so the
+    writes have to be committed for it to see the users.
+    """
+
+    def setUp(self):
+        self.users = [User.objects.create(username=name) for name in ("investor", "other")]
+        self.buffer = LastLoginBuffer()
+        self.addCleanup(self.buffer.stop)
+        self.now = timezone.now().replace(microsecond=0)
+
+    def last_logins(self):
+        return dict(User.objects.order_by("pk").values_list("pk", "last_login"))
+
+    def test_coalesces_and_batches(self):
+        first, second = self.users
+        for minutes in (1, 3, 2):
+            self.buffer.record(first.pk, self.now + datetime.timedelta(minutes=minutes))
+        self.buffer.record(second.pk, self.now)
+        self.assertEqual(self.last_logins(), {first.pk: None, second.pk: None})
+
+        self.buffer.batch_size = 1
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.buffer.flush(), 2)
+        updates = [query for query in context.captured_queries if query["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 2)
+        self.assertEqual(
+            self.last_logins(),
+            {first.pk: self.now + datetime.timedelta(minutes=3), second.pk: self.now},
+        )
+        self.assertEqual(self.buffer.flush(), 0)
+
+    @override_settings(LAST_LOGIN_FLUSH_INTERVAL=0.01)
+    def test_flushes_on_interval(self):
+        user = self.users[0]
+        self.buffer.record(user.pk, self.now)
+        deadline = time.monotonic() + 10
+        while self.last_logins()[user.pk] is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.last_logins()[user.pk], self.now)
+
+    def test_flushes_on_stop(self):
+        user = self.users[0]
+        with mock.patch("ums.last_login.atexit.register") as register:
+            self.buffer.record(user.pk, self.now)
+            self.buffer.record(user.pk, self.now)
+        # The flusher thread starts once and the buffer is flushed at exit.
+        register.assert_called_once_with(self.buffer.stop)
+        self.assertIsNone(self.last_logins()[user.pk])
+
+        self.buffer.stop()
+        self.buffer._thread.join(timeout=10)
+        self.assertFalse(self.buffer._thread.is_alive())
+        self.assertEqual(self.last_logins()[user.pk], self.now)
+
+    @override_settings(LAST_LOGIN_WRITE_BEHIND=False)
+    def test_write_through(self):
+        user = self.users[0]
+        update_last_login(user)
+        self.assertEqual(self.last_logins()[user.pk], user.last_login)
+
+
+@override_settings(LAST_LOGIN_WRITE_BEHIND=False)
+class AsyncViewsTests(TestCase):
+    """
+    The async variants of the user, investment and report endpoints.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.funds = [
+            MutualFunds.objects.create(name=f"Scheme {i}", fund_type="EQUITY", nav=10 * (i + 1))
+            for i in range(2)
+        ]
+        cls.user = User(username="investor")
+        cls.user.set_password("investor-password")
+        cls.user.save()
+
+    def setUp(self):
+        cache.clear()
+        self.headers = {"authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+
+    def post_json(self, url, data):
+        return self.async_client.post(
+            url, data, content_type="application/json", headers=self.headers
+        )
+
+    async def test_register_and_login(self):
+        response = await self.async_client.post(
+            reverse("ums:register-async"),
+            {
+                "username": "newcomer",
+                "password1": "newcomer-password",
+                "password2": "newcomer-password",
+            },
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertTrue(await User.objects.filter(username="newcomer").aexists())
+
+        response = await self.async_client.post(
+            reverse("ums:login-async"),
+            {"username": "newcomer", "password": "newcomer-password"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertIn("access", response.json()["data"])
+        self.assertIsNotNone((await User.objects.aget(username="newcomer")).last_login)
+
+        response = await self.async_client.post(
+            reverse("ums:login-async"),
+            {"username": "newcomer", "password": "wrong-password"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400, response.content)
+
+    async def test_investments(self):
+        url = reverse("ums:investments-async")
+        self.assertEqual((await self.async_client.get(url)).status_code, 401)
+
+        response = await self.post_json(url, {"mutual_fund": self.funds[0].id, "units": 3})
+        self.assertEqual(response.status_code, 200, response.content)
+        payload = [{"mutual_fund": fund.id, "units": 2} for fund in self.funds]
+        response = await self.post_json(url, payload)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(len(response.json()["data"]), 2)
+        response = await self.post_json(url, {"mutual_fund": self.funds[0].id, "units": 0})
+        self.assertEqual(response.status_code, 400, response.content)
+
+        response = await self.async_client.get(url, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(row["units"] for row in response.json()["data"]), [2, 2, 3])
+        holding = await Holding.objects.aget(user=self.user, mutual_fund=self.funds[0])
+        self.assertEqual(holding.units, 5)
+
+    async def test_report(self):
+        payload = [{"mutual_fund": fund.id, "units": 2} for fund in self.funds]
+        response = await self.post_json(reverse("ums:investments-async"), payload)
+        self.assertEqual(response.status_code, 200, response.content)
+        url = reverse("ums:report-async")
+        response = await self.async_client.get(url, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["data"]), 2)
+
+        response = await self.async_client.get(url, {"aggregate": "true"}, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["portfolio"], {"total_units": 4, "total_value": 60})
+
+
+class ReportExportTests(TestCase):
+    """
+    The investment report streamed as CSV and NDJSON.
+    """
+
+    FORMULA = '=HYPERLINK("http://example.com")'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.funds = [
+            MutualFunds.objects.create(name=cls.FORMULA, fund_type="EQUITY", nav=10),
+            MutualFunds.objects.create(name="-Short Duration", fund_type="DEBT", nav=20),
+        ]
+        cls.user = User(username="investor")
+        cls.user.set_password("investor-password")
+        cls.user.save()
+        for fund in cls.funds:
+            UserInvestment.objects.create(user=cls.user, mutual_fund=fund, units=2)
+            Holding.objects.create(user=cls.user, mutual_fund=fund, units=2)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def export(self, **params):
+        response = self.client.get(reverse("ums:report"), params)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv(self):
+        header, *rows = csv.reader(StringIO(self.export(format="csv")))
+        self.assertEqual(header[2], "mutual_fund_name")
+        self.assertEqual([row[2] for row in rows], [f"'{self.FORMULA}", "'-Short Duration"])
+        self.assertEqual([float(row[5]) for row in rows], [20, 40])
+
+        header, *rows = csv.reader(StringIO(self.export(format="csv", aggregate="true")))
+        self.assertEqual(header[1], "mutual_fund_name")
+        self.assertEqual([row[1] for row in rows], [f"'{self.FORMULA}", "'-Short Duration"])
+
+    def test_ndjson(self):
+        rows = [json.loads(line) for line in self.export(format="ndjson").splitlines()]
+        # JSON isn't opened by spreadsheets, so the names are left as they are.
+        self.assertEqual(
+            [(row["mutual_fund_name"], row["total_value"]) for row in rows],
+            [(self.FORMULA, 20), ("-Short Duration", 40)],
+        )
+
+    def test_csv_error(self):
+        response = self.client.get(reverse("ums:report"), {"format": "csv", "aggregate": "maybe"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.content.decode().splitlines()[0], "aggregate")
+
+    def test_renders_bare_errors(self):
+        errors = ValidationError(["Not a valid report.", "=1+1"]).detail
+        self.assertEqual(
+            CSVRenderer().render(errors), b"detail\r\nNot a valid report.\r\n'=1+1\r\n"
+        )
+        self.assertEqual(
+            NDJSONRenderer().render(ValidationError("Not a valid report.").detail),
+            b'{"detail": "Not a valid report."}\n',
+        )
+        self.assertEqual(
+            CSVRenderer().render({"detail": "Not found."}), b"detail\r\nNot found.\r\n"
+        )
+
+    def test_streaming_renderer_is_abstract(self):
+        with self.assertRaises(TypeError):
+            StreamingRenderer()
+
+
+class BulkInvestmentTests(TestCase):
+    """
+    Uploading many investments from one JSON array.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.funds = MutualFunds.objects.bulk_create(
+            MutualFunds(name=f"Scheme {i}", fund_type="EQUITY", nav=10) for i in range(2)
+        )
+        cls.user = User.objects.create(username="investor")
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+        self.url = reverse("ums:investments")
+
+    def assertNothingRecorded(self):
+        self.assertFalse(UserInvestment.objects.exists())
+        self.assertFalse(LedgerEntry.objects.exists())
+        self.assertFalse(Holding.objects.exists())
+
+    def test_uploads_every_investment(self):
+        payload = [{"mutual_fund": fund.id, "units": 2} for fund in self.funds]
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(len(response.json()["data"]), 2)
+        self.assertEqual(LedgerEntry.objects.count(), 2)
+        self.assertEqual(sorted(Holding.objects.values_list("units", flat=True)), [2, 2])
+
+    def test_reports_errors_per_item(self):
+        payload = [
+            {"mutual_fund": self.funds[0].id, "units": 2},
+            {"mutual_fund": 999999, "units": 2},
+            {"mutual_fund": self.funds[1].id},
+        ]
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(errors[0], {})
+        self.assertEqual(set(errors[1]), {"mutual_fund"})
+        self.assertEqual(set(errors[2]), {"units"})
+        self.assertNothingRecorded()
+
+    def test_rolls_back_on_failure(self):
+        payload = [{"mutual_fund": fund.id, "units": 2} for fund in self.funds]
+        failure = IntegrityError("ledger failed")
+        with mock.patch.object(LedgerEntry.objects, "record", side_effect=failure):
+            with self.assertRaises(IntegrityError):
+                self.client.post(self.url, payload, format="json")
+        self.assertNothingRecorded()
+
+    def test_limits_the_array(self):
+        payload = [{"mutual_fund": self.funds[0].id, "units": 1}] * 3
+        with mock.patch.object(InvestmentApiView, "bulk_max_items", 2):
+            response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("non_field_errors", response.json())
+        self.assertEqual(self.client.post(self.url, [], format="json").status_code, 400)
+        self.assertNothingRecorded()
+
+
+class LedgerTests(TestCase):
+    """
+    Holdings and cost basis replayed from the ledger and its snapshots.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.fund = MutualFunds.objects.create(name="Scheme", fund_type="EQUITY", nav=10)
+        cls.user = User(username="investor")
+        cls.user.set_password("investor-password")
+        cls.user.save()
+
+    def days_ago(self, days):
+        return timezone.localdate() - datetime.timedelta(days=days)
+
+    def record(self, transaction_type, days_ago, units, nav):
+        LedgerEntry.objects.record([LedgerEntry(
+            user=self.user, mutual_fund=self.fund, transaction_type=transaction_type,
+            trade_date=self.days_ago(days_ago), units=units, nav=nav
+        )])
+
+    def test_average_cost(self):
+        self.record(TransactionType.BUY, 10, 10, 10)
+        self.record(TransactionType.BUY, 8, 10, 20)
+        self.record(TransactionType.SELL, 5, 5, 30)
+        [holding] = holdings_as_of(self.user)
+        self.assertEqual(holding["units"], 15)
+        self.assertAlmostEqual(holding["cost"], 225)
+        self.assertAlmostEqual(holding["average_cost"], 15)
+        self.assertEqual(Holding.objects.get(user=self.user, mutual_fund=self.fund).units, 15)
+
+    def test_as_of(self):
+        self.record(TransactionType.BUY, 10, 10, 10)
+        self.record(TransactionType.SELL, 5, 10, 12)
+        self.assertEqual(holdings_as_of(self.user, self.days_ago(6))[0]["units"], 10)
+        self.assertEqual(holdings_as_of(self.user), [])
+
+    def test_snapshot(self):
+        self.record(TransactionType.BUY, 10, 10, 10)
+        checkpoint(self.user.id, self.days_ago(7))
+        self.record(TransactionType.BUY, 3, 5, 16)
+        self.assertEqual(holdings_as_of(self.user)[0]["units"], 15)
+        self.assertAlmostEqual(holdings_as_of(self.user)[0]["cost"], 180)
+
+    def test_backdated_entry_drops_snapshot(self):
+        self.record(TransactionType.BUY, 10, 10, 10)
+        checkpoint(self.user.id, self.days_ago(7))
+        self.record(TransactionType.BUY, 8, 2, 10)
+        self.assertFalse(HoldingSnapshot.objects.exists())
+        self.assertEqual(holdings_as_of(self.user, self.days_ago(7))[0]["units"], 12)
+
+    def test_investment_units_must_be_positive(self):
+        cache.clear()
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+        for payload in (
+            {"mutual_fund": self.fund.id, "units": 0},
+            {"mutual_fund": self.fund.id, "units": -5},
+            [{"mutual_fund": self.fund.id, "units": 2}, {"mutual_fund": self.fund.id, "units": 0}],
+        ):
+            with self.subTest(payload=payload):
+                response = client.post(reverse("ums:investments"), payload, format="json")
+                self.assertEqual(response.status_code, 400, response.content)
+        self.assertFalse(UserInvestment.objects.exists())
+        self.assertFalse(LedgerEntry.objects.exists())
+
+    def test_ledger_is_append_only(self):
+        self.record(TransactionType.BUY, 1, 10, 10)
+        entry = LedgerEntry.objects.get()
+        entry.units = 5
+        with self.assertRaises(ValueError):
+            entry.save()
+        with self.assertRaises(ValueError):
+            entry.delete()
+        with self.assertRaises(ValueError):
+            LedgerEntry.objects.filter(user=self.user).update(units=5)
+        with self.assertRaises(ValueError):
+            LedgerEntry.objects.filter(user=self.user).delete()
+        self.assertEqual(LedgerEntry.objects.get().units, 10)
+
+        # Deleting the user still takes their entries with it.
+        User.objects.filter(pk=self.user.pk).delete()
+        self.assertFalse(LedgerEntry.objects.exists())
+
+    def sell(self, units, days_ago):
+        cache.clear()
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+        return client.post(reverse("ums:ledger"), {
+            "transaction_type": "SELL", "mutual_fund": self.fund.id, "units": units,
+            "trade_date": self.days_ago(days_ago).isoformat(),
+        }, format="json")
+
+    def test_backdated_sell_keeps_later_positions(self):
+        self.record(TransactionType.BUY, 10, 10, 10)
+        self.record(TransactionType.SELL, 5, 8, 10)
+        self.record(TransactionType.BUY, 2, 8, 10)
+        # 10 units are held on day 8 and today, but only 2 between days 5 and 2.
+        response = self.sell(5, 8)
+        self.assertEqual(response.status_code, 400, response.content)
+        self.assertIn("units", response.json())
+        self.assertEqual(self.sell(2, 8).status_code, 201)
+        self.assertEqual(holdings_as_of(self.user, self.days_ago(3)), [])
+
+    def test_switch_into_fund_without_nav(self):
+        self.record(TransactionType.BUY, 1, 10, 10)
+        target = MutualFunds.objects.create(name="New scheme", fund_type="DEBT", nav=0)
+        cache.clear()
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+        response = client.post(reverse("ums:ledger"), {
+            "transaction_type": "SWITCH", "mutual_fund": self.fund.id,
+            "to_mutual_fund": target.id, "units": 5,
+        }, format="json")
+        self.assertEqual(response.status_code, 400, response.content)
+        self.assertIn("to_mutual_fund", response.json())
+        self.assertEqual(LedgerEntry.objects.count(), 1)
+
+
+class ReturnsTests(TestCase):
+    """
+    Returns of the ledger's cash flows.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.fund = MutualFunds.objects.create(name="Scheme", fund_type="EQUITY", nav=12.1)
+        cls.user = User(username="investor")
+        cls.user.set_password("investor-password")
+        cls.user.save()
+
+    def test_xirr(self):
+        # 100 paid in, 121 back two years later, and a series with no money out.
+        rates = xirr(
+            np.array([-100.0, 121.0, -50.0]), np.array([0.0, 2.0, 0.0]), np.array([0, 0, 1]), 2
+        )
+        self.assertAlmostEqual(rates[0], 0.1)
+        self.assertTrue(np.isnan(rates[1]))
+
+    def test_compute_returns(self):
+        LedgerEntry.objects.record([LedgerEntry(
+            user=self.user, mutual_fund=self.fund, transaction_type=TransactionType.BUY,
+            trade_date=timezone.localdate() - datetime.timedelta(days=730), units=10, nav=10
+        )])
+        returns = compute_returns(self.user)
+        [fund] = returns["funds"]
+        self.assertAlmostEqual(fund["current_value"], 121)
+        self.assertAlmostEqual(fund["absolute_return"], 0.21)
+        self.assertAlmostEqual(fund["cagr"], 0.1, places=3)
+        self.assertAlmostEqual(returns["portfolio"]["xirr"], 0.1, places=3)
+
+    def test_empty_ledger(self):
+        self.assertEqual(compute_returns(self.user)["funds"], [])
+
+
+class PortfolioHistoryTests(TestCase):
+    """
+    Portfolio value over a date range, from the ledger and the NAV history.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.fund = MutualFunds.objects.create(name="Scheme", fund_type="EQUITY", nav=15)
+        cls.user = User(username="investor")
+        cls.user.set_password("investor-password")
+        cls.user.save()
+        cls.today = timezone.localdate()
+        NavHistory.objects.bulk_create([
+            NavHistory(fund=cls.fund, date=cls.days_ago(20), nav=10),
+            NavHistory(fund=cls.fund, date=cls.days_ago(5), nav=12),
+        ])
+        LedgerEntry.objects.record([
+            LedgerEntry(
+                user=cls.user, mutual_fund=cls.fund, transaction_type=TransactionType.BUY,
+                trade_date=cls.days_ago(30), units=10, nav=8
+            ),
+            LedgerEntry(
+                user=cls.user, mutual_fund=cls.fund, transaction_type=TransactionType.SELL,
+                trade_date=cls.days_ago(3), units=4, nav=12
+            ),
+        ])
+
+    @classmethod
+    def days_ago(cls, days):
+        return cls.today - datetime.timedelta(days=days)
+
+    def test_forward_fills_navs(self):
+        points = {
+            point["date"]: point
+            for point in portfolio_history(self.user, self.days_ago(10), self.today)
+        }
+        self.assertEqual(len(points), 11)
+        # NAV 10 from before the range, then 12, and today's current NAV.
+        self.assertAlmostEqual(points[self.days_ago(10)]["value"], 100)
+        self.assertAlmostEqual(points[self.days_ago(4)]["value"], 120)
+        self.assertAlmostEqual(points[self.days_ago(1)]["value"], 72)
+        self.assertAlmostEqual(points[self.today]["value"], 90)
+        self.assertAlmostEqual(points[self.today]["net_invested"], 32)
+
+    def test_downsampling(self):
+        start = self.days_ago(60)
+        daily = {point["date"]: point for point in portfolio_history(self.user, start, self.today)}
+        periods = {"weekly": lambda day: day.isocalendar()[:2], "monthly": lambda day: day.month}
+        for interval, period in periods.items():
+            points = portfolio_history(self.user, start, self.today, interval)
+            self.assertEqual(points[-1]["date"], self.today)
+            self.assertEqual(len({period(point["date"]) for point in points}), len(points))
+            for point in points:
+                self.assertEqual(point, daily[point["date"]])
+                following = point["date"] + datetime.timedelta(days=1)
+                self.assertTrue(
+                    following > self.today or period(following) != period(point["date"])
+                )
+
+    def test_range_before_first_trade(self):
+        points = portfolio_history(self.user, self.days_ago(40), self.days_ago(35))
+        self.assertEqual(len(points), 6)
+        self.assertEqual(
+            {(point["value"], point["net_invested"]) for point in points}, {(0.0, 0.0)}
+        )
+
+        cache.clear()
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+        response = client.get(
+            reverse("ums:report-history"), {"start": self.days_ago(40), "end": self.days_ago(35)}
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def test_validates_range(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+        url = reverse("ums:report-history")
+        response = client.get(url, {"start": self.today, "end": self.days_ago(1)})
+        self.assertEqual(response.status_code, 400)
+        response = client.get(url, {"interval": "hourly"})
+        self.assertEqual(response.status_code, 400)
+        response = client.get(url, {"start": "0001-01-01"})
+        self.assertEqual(response.status_code, 400)
+        response = client.get(url, {"start": self.days_ago(3653)})
+        self.assertEqual(response.status_code, 200)
+        response = client.get(url, {"start": self.days_ago(3654)})
+        self.assertEqual(response.status_code, 400)
+        response = client.get(url, {"start": self.days_ago(3654), "interval": "weekly"})
+        self.assertEqual(response.status_code, 200)
+
+
+class SeedDataTests(TestCase):
+    """
+    The seed_data command.
+    """
+
+    def test_seeds_consistent_data(self):
+        call_command("seed_data", funds=5, users=4, investments=50, nav_days=10, stdout=StringIO())
+        self.assertEqual(MutualFunds.objects.count(), 5)
+        self.assertEqual(User.objects.filter(username__startswith="user").count(), 4)
+        self.assertEqual(UserInvestment.objects.count(), 50)
+        self.assertEqual(LedgerEntry.objects.count(), 50)
+        self.assertTrue(NavHistory.objects.exists())
+        self.assertTrue(User.objects.get(username="user0").check_password("password"))
+        call_command("rebuild_holdings", verify=True, stdout=StringIO())
+        call_command("reconcile_fund_totals", verify=True, stdout=StringIO())
+
+    def test_prices_entries_from_the_nav_history(self):
+        call_command(
+            "seed_data", funds=3, users=2, investments=60, nav_days=20, history_days=30,
+            stdout=StringIO(),
+        )
+        entries = LedgerEntry.objects.select_related("mutual_fund")
+        for entry in entries:
+            self.assertEqual(entry.nav, nav_on(entry.mutual_fund, entry.trade_date))
+        self.assertTrue(any(entry.nav != entry.mutual_fund.nav for entry in entries))
+
+    def test_refuses_existing_prefix(self):
+        call_command("seed_data", funds=1, users=1, investments=0, stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command("seed_data", funds=1, users=1, investments=0, stdout=StringIO())
+
+
+class FundTotalsTests(TestCase):
+    """
+    The funds' total units and investor counts, kept current by the ledger.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.funds = [
+            MutualFunds.objects.create(name=f"Scheme {i}", fund_type="EQUITY", nav=10 * (i + 1))
+            for i in range(2)
+        ]
+        cls.users = []
+        for name in ("investor", "other"):
+            user = User(username=name)
+            user.set_password(f"{name}-password")
+            user.save()
+            cls.users.append(user)
+
+    def setUp(self):
+        cache.clear()
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+        return client
+
+    def invest(self, user, fund, units):
+        response = self.client_for(user).post(
+            reverse("ums:investments"), {"mutual_fund": fund.id, "units": units}, format="json"
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def trade(self, user, payload):
+        response = self.client_for(user).post(reverse("ums:ledger"), payload, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+
+    def totals(self, fund):
+        fund.refresh_from_db()
+        return fund.total_units, fund.investor_count
+
+    def test_investments_add_to_totals(self):
+        self.invest(self.users[0], self.funds[0], 3)
+        self.invest(self.users[0], self.funds[0], 2)
+        self.invest(self.users[1], self.funds[0], 4)
+        self.assertEqual(self.totals(self.funds[0]), (9, 2))
+        self.assertEqual(self.totals(self.funds[1]), (0, 0))
+
+    def test_bulk_investments_add_to_totals(self):
+        payload = [{"mutual_fund": fund.id, "units": 2} for fund in self.funds * 2]
+        client = self.client_for(self.users[0])
+        response = client.post(reverse("ums:investments"), payload, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.totals(self.funds[0]), (4, 1))
+        self.assertEqual(self.totals(self.funds[1]), (4, 1))
+
+    def test_updates_rows_in_key_order(self):
+        payload = [{"mutual_fund": fund.id, "units": 2} for fund in reversed(self.funds)]
+        client = self.client_for(self.users[0])
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(reverse("ums:investments"), payload, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        updated = [
+            int(query["sql"].rsplit("= ", 1)[1].split()[0])
+            for query in context.captured_queries
+            if query["sql"].startswith('UPDATE "mutualfunds_mutualfunds"')
+        ]
+        self.assertEqual(updated, sorted(fund.pk for fund in self.funds))
+
+    def test_sell_and_switch(self):
+        self.invest(self.users[0], self.funds[0], 6)
+        self.trade(
+            self.users[0], {"transaction_type": "SELL", "mutual_fund": self.funds[0].id, "units": 2}
+        )
+        self.assertEqual(self.totals(self.funds[0]), (4, 1))
+        self.trade(self.users[0], {
+            "transaction_type": "SWITCH", "mutual_fund": self.funds[0].id,
+            "to_mutual_fund": self.funds[1].id, "units": 4,
+        })
+        # The position is closed, so the investor no longer counts; 4 units at 10 buy 2 at 20.
+        self.assertEqual(self.totals(self.funds[0]), (0, 0))
+        self.assertEqual(self.totals(self.funds[1]), (2, 1))
+        call_command("reconcile_fund_totals", verify=True, stdout=StringIO())
+
+    def test_reconcile(self):
+        self.invest(self.users[0], self.funds[0], 3)
+        self.invest(self.users[1], self.funds[0], 4)
+        MutualFunds.objects.filter(pk=self.funds[0].pk).update(total_units=1, investor_count=5)
+        with self.assertRaises(CommandError):
+            call_command("reconcile_fund_totals", verify=True, stdout=StringIO())
+
+        out = StringIO()
+        call_command("reconcile_fund_totals", stdout=out)
+        self.assertIn("1 had drifted", out.getvalue())
+        self.assertEqual(self.totals(self.funds[0]), (7, 2))
+        self.assertEqual(self.totals(self.funds[1]), (0, 0))
+
+    def test_rebuild_holdings_reconciles(self):
+        self.invest(self.users[0], self.funds[0], 3)
+        MutualFunds.objects.update(total_units=0, investor_count=0)
+        call_command("rebuild_holdings", stdout=StringIO())
+        self.assertEqual(self.totals(self.funds[0]), (3, 1))
+
+    def test_rebuild_holdings_for_one_user(self):
+        self.invest(self.users[0], self.funds[0], 3)
+        self.invest(self.users[1], self.funds[1], 4)
+        # A holding the ledger doesn't back, and drifted totals on a fund the user doesn't hold.
+        Holding.objects.create(user=self.users[0], mutual_fund=self.funds[1], units=2)
+        MutualFunds.objects.update(total_units=0, investor_count=0)
+        MutualFunds.objects.filter(pk=self.funds[1].pk).update(total_units=99)
+
+        with CaptureQueriesContext(connection) as context:
+            call_command("rebuild_holdings", user=self.users[0].pk, stdout=StringIO())
+        [reconcile] = [
+            query["sql"] for query in context.captured_queries
+            if query["sql"].startswith("UPDATE")
+        ]
+        self.assertIn(" IN (", reconcile)
+        self.assertEqual(self.totals(self.funds[0]), (3, 1))
+        # The user's stray holding is gone, and the other user's units are totalled again.
+        self.assertEqual(self.totals(self.funds[1]), (4, 1))
+
+        other = MutualFunds.objects.create(name="Scheme 2", fund_type="DEBT", nav=5, total_units=7)
+        call_command("rebuild_holdings", user=self.users[0].pk, stdout=StringIO())
+        self.assertEqual(self.totals(other), (7, 0))
+
+    def test_top_funds(self):
+        self.invest(self.users[0], self.funds[0], 5)  # AUM 50
+        self.invest(self.users[1], self.funds[1], 3)  # AUM 60
+        url = reverse("mutual_funds:mutual-funds-top")
+        self.assertEqual(self.client_for(self.users[0]).get(url).status_code, 403)
+
+        staff = User.objects.create(username="operations", is_staff=True)
+        for fast_read_path in (True, False):
+            with self.subTest(fast_read_path=fast_read_path), override_settings(
+                FAST_READ_PATH=fast_read_path
+            ):
+                response = self.client_for(staff).get(url, {"limit": 1})
+                self.assertEqual(response.status_code, 200, response.content)
+                [fund] = response.json()["data"]
+                self.assertEqual(fund["id"], self.funds[1].id)
+                self.assertEqual(
+                    (fund["total_units"], fund["investor_count"], fund["aum"]), (3, 1, 60)
+                )
+        self.assertEqual(self.client_for(staff).get(url, {"limit": 0}).status_code, 400)
+
+
+class FastJSONRendererTests(TestCase):
+    """
+    The orjson renderer, against the stock renderer and across the two read paths.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.funds = MutualFunds.objects.bulk_create(
+            MutualFunds(name=name, fund_type="EQUITY", nav=nav)
+            for name, nav in (("Scheme\u2028One", 10.25), ("Scheme é", 0.1))
+        )
+        cls.user = User.objects.create(username="operations", is_staff=True)
+        for fund in cls.funds:
+            UserInvestment.objects.create(user=cls.user, mutual_fund=fund, units=1.5)
+        LedgerEntry.objects.record([
+            LedgerEntry(
+                user=cls.user, mutual_fund=fund, transaction_type=TransactionType.BUY,
+                trade_date=timezone.localdate(), units=1.5, nav=fund.nav
+            )
+            for fund in cls.funds
+        ])
+
+    def test_matches_stock_renderer(self):
+        data = {
+            "at": datetime.datetime(2026, 1, 2, 3, 4, 5, 123456, tzinfo=datetime.timezone.utc),
+            "naive": datetime.datetime(2026, 1, 2, 3, 4, 5, 999),
+            "day": datetime.date(2026, 1, 2),
+            "time": datetime.time(1, 2, 3, 456789),
+            "text": "line\u2028paragraph\u2029é",
+            "numbers": [1.5, 10.0, 0.1, 3, Decimal("2.50")],
+            "nested": [{"none": None, "flag": True}],
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_read_paths_render_the_same(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+        requests = (
+            (reverse("ums:investments"), {}),
+            (reverse("ums:report"), {}),
+            (reverse("ums:report"), {"aggregate": "true"}),
+            (reverse("mutual_funds:mutual-funds"), {}),
+            (reverse("mutual_funds:mutual-funds-top"), {}),
+        )
+        for url, params in requests:
+            with self.subTest(url=url, params=params):
+                bodies = []
+                for fast_read_path in (True, False):
+                    cache.clear()
+                    get_catalogue_cache().clear()
+                    with override_settings(FAST_READ_PATH=fast_read_path):
+                        response = client.get(url, params)
+                    self.assertEqual(response.status_code, 200, response.content)
+                    self.assertTrue(response.json()["data"])
+                    bodies.append(response.content)
+                self.assertEqual(bodies[0], bodies[1])
+
+
+class MetricsTests(TestCase):
+    """
+    Per-view request metrics and their Prometheus endpoint.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User(username="investor")
+        cls.user.set_password("investor-password")
+        cls.user.save()
+
+    def metric(self, series):
+        """
+        The value of one series in the scrape, 0 before it first appears.
+        """
+        for line in render_metrics().splitlines():
+            if line.startswith(series + " "):
+                return float(line.rsplit(" ", 1)[1])
+        return 0.0
+
+    @override_settings(METRICS_TOKEN="scrape-token")
+    def test_records_requests_per_view(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+        label = '{view="InvestmentApiView.get"}'
+        requests = self.metric(f"mfas_request_duration_seconds_count{label}")
+        queries = self.metric(f"mfas_db_queries_per_request_sum{label}")
+
+        with CaptureQueriesContext(connection) as captured:
+            client.get(reverse("ums:investments"))
+        self.assertEqual(self.metric(f"mfas_request_duration_seconds_count{label}"), requests + 1)
+        self.assertEqual(
+            self.metric(f"mfas_db_queries_per_request_sum{label}"), queries + len(captured)
+        )
+
+        response = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer scrape-token")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(f"mfas_render_duration_seconds_count{label}", response.content.decode())
+        self.assertIn(
+            f"mfas_serialization_duration_seconds_count{label}", response.content.decode()
+        )
+
+    def test_times_serializers(self):
+        class SlowSerializer(serializers.Serializer):
+            username = serializers.SerializerMethodField()
+
+            def get_username(self, user):
+                time.sleep(0.01)
+                User.objects.filter(pk=user.pk).exists()
+                return user.username
+
+        def view(request):
+            return HttpResponse(str(SlowSerializer([self.user, self.user], many=True).data))
+
+        series = 'mfas_serialization_duration_seconds_sum{view="unresolved"}'
+        serialized = self.metric(series)
+        MetricsMiddleware(view)(RequestFactory().get("/"))
+        # Both items, timed once through the list serializer.
+        self.assertGreaterEqual(self.metric(series) - serialized, 0.02)
+        self.assertLess(self.metric(series) - serialized, 1)
+
+    @override_settings(METRICS_REPEATED_QUERY_THRESHOLD=3)
+    def test_flags_repeated_queries(self):
+        def view(request):
+            for _ in range(3):
+                User.objects.filter(pk=self.user.pk).exists()
+            return HttpResponse()
+
+        flagged = self.metric('mfas_repeated_query_requests_total{view="unresolved"}')
+        with self.assertLogs("mfas.metrics", "WARNING"):
+            MetricsMiddleware(view)(RequestFactory().get("/"))
+        self.assertEqual(
+            self.metric('mfas_repeated_query_requests_total{view="unresolved"}'), flagged + 1
+        )
+
+    @override_settings(METRICS_TOKEN="scrape-token")
+    def test_token(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+        response = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer scrape-token")
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_needs_token_outside_debug(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+        with override_settings(DEBUG=True):
+            self.assertEqual(self.client.get(reverse("metrics")).status_code, 200)
+
+
+class ProfilingTests(TestCase):
+    """
+    Requests profiled on demand by staff users.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User(username="operator", is_staff=True)
+        cls.staff.set_password("operator-password")
+        cls.staff.save()
+        cls.user = User(username="investor")
+        cls.user.set_password("investor-password")
+        cls.user.save()
+
+    def setUp(self):
+        # Users of earlier tests had the same ids.
+        get_user_cache().clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.enterContext(override_settings(PROFILING_DIR=self.directory))
+
+    def get(self, user, **headers):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+        return client.get(reverse("ums:report"), **headers)
+
+    def test_profiles_staff_requests(self):
+        # The staff check runs before the profiled request, and caches the user it loads.
+        self.get(self.staff)
+        with CaptureQueriesContext(connection) as captured:
+            response = self.get(self.staff, HTTP_X_PROFILE="cprofile")
+        self.assertEqual(response.status_code, 200)
+        name = response["X-Profile-File"]
+        self.assertIn(f"-ReportGenerationListApiView.get-{len(captured)}q-", name)
+        self.assertTrue(name.endswith(".pstats"))
+        self.assertTrue(pstats.Stats(str(self.directory / name)).total_calls)
+
+    def test_sampled_profile(self):
+        response = self.get(self.staff, HTTP_X_PROFILE="sample")
+        name = response["X-Profile-File"]
+        self.assertTrue(name.endswith(".collapsed"))
+        for line in (self.directory / name).read_text().splitlines():
+            stack, count = line.rsplit(" ", 1)
+            self.assertTrue(stack and int(count) > 0)
+
+    def test_profiles_staff_session_requests(self):
+        # The middleware runs before the session and authentication middleware.
+        client = self.client_class()
+        client.force_login(self.staff)
+        response = client.get(reverse("admin:index"), HTTP_X_PROFILE="cprofile")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue((self.directory / response["X-Profile-File"]).exists())
+
+        client.force_login(self.user)
+        response = client.get(reverse("admin:index"), HTTP_X_PROFILE="cprofile")
+        self.assertNotIn("X-Profile-File", response)
+
+    def test_ignores_other_requests(self):
+        self.assertNotIn("X-Profile-File", self.get(self.user, HTTP_X_PROFILE="cprofile"))
+        self.assertNotIn("X-Profile-File", self.get(self.staff))
+        self.assertEqual(list(self.directory.iterdir()), [])
+
+
+class PrecomputedSchemaTests(TestCase):
+    """
+    The schema rendered by generate_schema and served from its file.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        directory = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(directory.cleanup)
+        cls.path = Path(directory.name) / "openapi.json"
+        # drf-spectacular reports its warnings on the views to stderr.
+        with redirect_stderr(StringIO()):
+            call_command("generate_schema", output=cls.path, stdout=StringIO())
+
+    def get(self, **headers):
+        with override_settings(SCHEMA_FILE=self.path):
+            return precomputed_schema_view(RequestFactory().get("/api/schema/", **headers))
+
+    def test_generates_schema(self):
+        schema = json.loads(self.path.read_bytes())
+        self.assertIn("/api/ums/report/", schema["paths"])
+        self.assertEqual(
+            gzip.decompress(Path(f"{self.path}.gz").read_bytes()), self.path.read_bytes()
+        )
+
+        with redirect_stderr(StringIO()):
+            call_command("generate_schema", output=self.path, check=True, stdout=StringIO())
+            stale = Path(self.path.parent) / "stale.json"
+            stale.write_text("{}")
+            with self.assertRaises(CommandError):
+                call_command("generate_schema", output=stale, check=True, stdout=StringIO())
+
+    def test_documents_jwt_auth(self):
+        schema = json.loads(self.path.read_bytes())
+        self.assertEqual(schema["components"]["securitySchemes"]["jwtAuth"]["scheme"], "bearer")
+        self.assertIn({"jwtAuth": []}, schema["paths"]["/api/ums/report/"]["get"]["security"])
+
+    def test_serves_schema(self):
+        response = self.get(HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), self.path.read_bytes())
+        self.assertIn("max-age=86400", response["Cache-Control"])
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+        plain = self.get()
+        self.assertNotIn("Content-Encoding", plain)
+        self.assertEqual(plain.content, self.path.read_bytes())
+        # The representations differ, so their strong ETags do too.
+        self.assertNotEqual(plain["ETag"], response["ETag"])
+
+        not_modified = self.get(HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=plain["ETag"]).status_code, 304)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 200)
+
+    def test_negotiates_gzip(self):
+        for accept_encoding, compressed in (
+            ("gzip", True),
+            ("deflate, gzip;q=0.5", True),
+            ("*", True),
+            ("br, *;q=0.1", True),
+            ("gzip;q=0", False),
+            ("gzip; q=0.0, deflate", False),
+            ("*, gzip;q=0", False),
+            ("deflate", False),
+            ("", False),
+        ):
+            with self.subTest(accept_encoding=accept_encoding):
+                response = self.get(HTTP_ACCEPT_ENCODING=accept_encoding)
+                self.assertEqual(response.get("Content-Encoding") == "gzip", compressed)
+
+
+class ColdStartTests(TestCase):
+    """
+    What a worker imports before its first request.
+    """
+
+    def test_asgi_closes_connections(self):
+        environment = {
+            key: value for key, value in os.environ.items() if key != "MFAS_DB_CONN_MAX_AGE"
+        }
+        for module, conn_max_age in (("mfas.asgi", "0"), ("mfas.wsgi", "600")):
+            script = (
+                f"import {module}\n"
+                "from django.conf import settings\n"
+                "print(settings.DATABASES['default']['CONN_MAX_AGE'])"
+            )
+            result = subprocess.run(
+                [sys.executable, "-c", script],
+                cwd=settings.BASE_DIR, env=environment, capture_output=True, text=True, check=True,
+            )
+            self.assertEqual(result.stdout.strip(), conn_max_age, module)
+
+    def test_lean_worker_defers_heavy_imports(self):
+        script = (
+            "import sys\n"
+            "from mfas.wsgi import application\n"
+            "heavy = ('numpy', 'drf_spectacular.openapi', 'drf_spectacular.views')\n"
+            "print(sorted(name for name in heavy if name in sys.modules))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, "DJANGO_SETTINGS_MODULE": "mfas.settings_lean"},
+            capture_output=True, text=True, check=True,
+        )
+        self.assertEqual(result.stdout.strip(), "[]")